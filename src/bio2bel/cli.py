@@ -2,10 +2,13 @@
 
 """Aggregate CLI for all Bio2BEL projects."""
 
+import json
 import logging
 import os
 import sys
-from typing import TextIO
+import time
+from collections import Counter
+from typing import Callable, Iterable, Optional, TextIO, Tuple
 
 import click
 from tqdm import tqdm
@@ -14,7 +17,8 @@ from .constants import config
 from .manager import AbstractManager, get_bio2bel_manager_classes
 from .manager.bel_manager import BELManagerMixin
 from .manager.namespace_manager import BELNamespaceManagerMixin
-from .models import Action, _make_session
+from .models import Action, ActionBuffer, ActionStats, _make_session
+from .parallel import WorkerResult, exclusive_writes, module_logging, run_in_pool
 from .utils import clear_cache, get_version
 
 logger = logging.getLogger(__name__)
@@ -63,28 +67,61 @@ def _iterate_manage_classes(skip):
 @connection_option
 @click.option('--reset', is_flag=True, help='Nuke database first')
 @click.option('--force', is_flag=True, help='Force overwrite if already populated')
+@click.option('--resume', is_flag=True, help='Skip the stages completed by the last failed populations')
+@click.option('--shadow', is_flag=True, help='Load into staging tables and swap them in when done')
+@click.option(
+    '--if-changed', is_flag=True,
+    help='Skip modules whose source files are unchanged since their last population, and reset the others',
+)
+@click.option('--defer-indexes', is_flag=True, help='Build the indexes after loading the data')
+@click.option('--in-memory', is_flag=True, help='Populate the tables in memory, then copy them to the SQLite file')
 @click.option('-s', '--skip', multiple=True, help='Modules to skip. Can specify multiple.')
-def populate(connection, reset, force, skip):
+@click.option('-j', '--jobs', type=int, default=1, show_default=True, help='Number of modules to populate at once')
+def populate(connection, reset, force, resume, shadow, if_changed, defer_indexes, in_memory, skip, jobs):
     """Populate all."""
+    if shadow and (reset or resume or defer_indexes or in_memory):
+        click.secho('--shadow can not be used with --reset, --resume, --defer-indexes, or --in-memory', fg='red')
+        sys.exit(1)
+
+    if in_memory and resume:
+        click.secho('--in-memory can not be used with --resume', fg='red')
+        sys.exit(1)
+
+    if in_memory and 1 < jobs:
+        click.secho('--in-memory can not be used with --jobs, since each module would overwrite the others', fg='red')
+        sys.exit(1)
+
+    if 1 < jobs:
+        names = [name for _, name, _ in _iterate_manage_classes(skip)]
+        results = run_in_pool(
+            _populate_worker, names, jobs, connection,
+            reset=reset, force=force, resume=resume, shadow=shadow, if_changed=if_changed, defer_indexes=defer_indexes,
+        )
+        _echo_results(results, total=len(names))
+        return
+
     for idx, name, manager in _iterate_managers(connection, skip):
         click.echo(
             click.style(f'[{idx}/{len(MANAGERS)}] ', fg='blue', bold=True) +
             click.style(f'populating {name}', fg='cyan', bold=True)
         )
 
-        if reset:
+        if if_changed and not manager.sources_changed():
+            click.echo(f'👍 the sources for {name} are unchanged')
+            continue
+
+        # What was populated from the old sources is replaced, which shadow populations already do when swapping
+        if reset or (if_changed and not shadow):
             try:
                 click.echo(f'deleting the previous instance of {name}')
-                manager.drop_all()
-                click.echo(f'creating new models for {name}')
-                manager.create_all()
+                manager.reset()
             except AttributeError:
                 click.echo(f'no models available for {name}')
                 continue
 
-        else:
+        elif not shadow:
             try:
-                if manager.is_populated() and not force:
+                if manager.is_populated() and not force and not (resume and manager.has_checkpoints()):
                     click.echo(f'👍 {name} is already populated. use --force to overwrite', color='red')
                     continue
             except AttributeError:
@@ -92,7 +129,7 @@ def populate(connection, reset, force, skip):
                 continue
 
         try:
-            manager.populate()
+            manager.populate(resume=resume, shadow=shadow, defer_indexes=defer_indexes, in_memory=in_memory)
         except (AttributeError, NotImplementedError):
             click.echo(f'no population function available for {name}')
             continue
@@ -101,15 +138,131 @@ def populate(connection, reset, force, skip):
             click.secho(f'👎 {name} population failed', fg='red', bold=True)
 
 
+def _populate_worker(
+    name: str,
+    connection: str,
+    reset: bool,
+    force: bool,
+    resume: bool,
+    shadow: bool = False,
+    if_changed: bool = False,
+    defer_indexes: bool = False,
+) -> WorkerResult:
+    """Populate a single module in a worker process."""
+
+    def _populate(manager: AbstractManager) -> Tuple[str, Optional[str]]:
+        try:
+            if if_changed and not manager.sources_changed():
+                return 'skipped', 'sources unchanged'
+
+            if reset or (if_changed and not shadow):
+                with exclusive_writes():
+                    manager.reset()
+            elif not shadow and manager.is_populated() and not force and not (resume and manager.has_checkpoints()):
+                return 'skipped', 'already populated'
+
+            manager.populate(resume=resume, shadow=shadow, defer_indexes=defer_indexes)
+        except (AttributeError, NotImplementedError):
+            return 'unavailable', 'no population function available'
+
+        return 'populated', None
+
+    return _run_module(name, connection, 'populate', _populate)
+
+
+def _run_module(
+    name: str,
+    connection: str,
+    command: str,
+    func: Callable[[AbstractManager], Tuple[str, Optional[str]]],
+    clear: bool = False,
+) -> WorkerResult:
+    """Instantiate the manager for a module and run a function on it, logging to a file in the module's directory.
+
+    :param name: The name of the module
+    :param connection: The connection string
+    :param command: The name of the command, used for the name of the log file
+    :param func: A function that takes the manager and returns the status and an optional message
+    :param clear: Should the module's cache be cleared first? This happens before logging starts, since the log file
+     is in the cache.
+    """
+    if clear:
+        clear_cache(name)
+
+    with module_logging(name, command) as log_path:
+        start = time.time()
+
+        def _result(status: str, message=None) -> WorkerResult:
+            return WorkerResult(name, status, time.time() - start, message=message, log_path=log_path)
+
+        try:
+            with exclusive_writes():
+                manager = MANAGERS[name](connection=connection)
+        except TypeError as e:
+            return _result('unavailable', str(e))
+        except Exception as e:
+            logger.exception('%s could not be instantiated', name)
+            return _result('failed', str(e))
+
+        try:
+            status, message = func(manager)
+        except Exception as e:
+            logger.exception('%s %s failed', name, command)
+            return _result('failed', str(e))
+
+        return _result(status, message)
+
+
+def _repopulate(manager: AbstractManager) -> None:
+    """Drop the manager's tables, create them again, then populate them.
+
+    Clear the module's cache first with :func:`bio2bel.utils.clear_cache` so the sources are downloaded again.
+    """
+    with exclusive_writes():
+        manager.drop_all()
+        manager.create_all()
+    manager.populate()
+
+
+def _echo_results(results: Iterable[WorkerResult], total: int) -> None:
+    """Echo the results from worker processes as they finish, then a summary table."""
+    colors = {
+        'failed': 'red',
+        'unavailable': 'yellow',
+    }
+
+    finished = []
+    for idx, result in enumerate(results, start=1):
+        finished.append(result)
+        click.echo(
+            click.style(f'[{idx}/{total}] ', fg='blue', bold=True) +
+            click.style(f'{result.name} {result.status}', fg=colors.get(result.status, 'green'))
+        )
+
+    click.echo()
+    for result in sorted(finished):
+        click.echo(
+            f'{result.name:<24}' +
+            click.style(f'{result.status:<12}', fg=colors.get(result.status, 'green')) +
+            f'{result.duration:>10.1f}s  {result.message or ""}'.rstrip()
+        )
+        if result.log_path:
+            click.echo(f'{"":<24}log: {result.log_path}')
+
+    counts = Counter(result.status for result in finished)
+    click.echo(', '.join(f'{count} {status}' for status, count in sorted(counts.items())))
+
+
 @main.command(help='Drop all')
 @click.confirmation_option('Drop all?')
 @connection_option
 @click.option('-s', '--skip', multiple=True, help='Modules to skip. Can specify multiple.')
 def drop(connection, skip):
     """Drop all."""
-    for idx, name, manager in _iterate_managers(connection, skip):
-        click.secho(f'dropping {name}', fg='cyan', bold=True)
-        manager.drop_all()
+    with ActionBuffer(connection=connection):
+        for idx, name, manager in _iterate_managers(connection, skip):
+            click.secho(f'dropping {name}', fg='cyan', bold=True)
+            manager.drop_all()
 
 
 @main.group()
@@ -259,33 +412,49 @@ def belns():
 @click.option('-d', '--directory', type=click.Path(file_okay=False, dir_okay=True), default=os.getcwd(),
               help='output directory')
 @click.option('-f', '--force', is_flag=True, help='Force re-download and re-population of resources')
-def write(connection, skip, directory, force):
+@click.option('--gzip', 'compress', is_flag=True, help='Compress the BEL namespace files')
+@click.option('--verify', is_flag=True, help='Recompute the hashes instead of using the ones stored after populating')
+@click.option('-j', '--jobs', type=int, default=1, show_default=True, help='Number of modules to export at once')
+def write(connection, skip, directory, force, compress, verify, jobs):
     """Write a BEL namespace names/identifiers to terminology store."""
     os.makedirs(directory, exist_ok=True)
-    from .manager.namespace_manager import BELNamespaceManagerMixin
-    for idx, name, manager in _iterate_managers(connection, skip):
-        if not (isinstance(manager, AbstractManager) and isinstance(manager, BELNamespaceManagerMixin)):
-            continue
-        click.secho(name, fg='cyan', bold=True)
+
+    names = [
+        name
+        for _, name, manager_cls in _iterate_manage_classes(skip)
+        if issubclass(manager_cls, AbstractManager) and issubclass(manager_cls, BELNamespaceManagerMixin)
+    ]
+    kwargs = dict(directory=directory, force=force, compress=compress, verify=verify)
+
+    if 1 < jobs:
+        results = run_in_pool(_write_belns_worker, names, jobs, connection, **kwargs)
+    else:
+        results = (_write_belns_worker(name, connection, **kwargs) for name in names)
+
+    _echo_results(results, total=len(names))
+
+
+def _write_belns_worker(
+    name: str,
+    connection: str,
+    directory: str,
+    force: bool = False,
+    compress: bool = False,
+    verify: bool = False,
+) -> WorkerResult:
+    """Write the BEL namespace files for a single module, in a worker process or in this one."""
+
+    def _write(manager: AbstractManager) -> Tuple[str, Optional[str]]:
+        if not isinstance(manager, BELNamespaceManagerMixin):
+            return 'unavailable', 'not a namespace manager'
+
         if force:
-            try:
-                click.echo(f'dropping')
-                manager.drop_all()
-                click.echo('clearing cache')
-                clear_cache(name)
-                click.echo('populating')
-                manager.populate()
-            except Exception:
-                click.secho(f'{name} failed', fg='red')
-                continue
+            _repopulate(manager)
 
-        try:
-            r = manager.write_directory(directory)
-        except TypeError as e:
-            click.secho(f'error with {name}: {e}'.rstrip(), fg='red')
-        else:
-            if not r:
-                click.echo('no update')
+        written = manager.write_directory(directory, compress=compress, verify=verify)
+        return 'written' if written else 'unchanged', None
+
+    return _run_module(name, connection, 'belns', _write, clear=force)
 
 
 @main.group()
@@ -335,11 +504,38 @@ def web(connection, host, port):
 
 @main.command()
 @connection_option
-def actions(connection):
+@click.option('-r', '--resource', help='Only list the actions for this resource')
+@click.option('--stats', is_flag=True, help='Show the duration, rows, and peak memory of each population')
+@click.option('--json', 'as_json', is_flag=True, help='Output the statistics of each population as JSON')
+def actions(connection, resource, stats, as_json):
     """List all actions."""
     session = _make_session(connection=connection)
-    for action in Action.ls(session=session):
+
+    if as_json:
+        query = session.query(ActionStats).join(Action)
+        if resource:
+            query = query.filter(Action.resource == resource.lower())
+        click.echo(json.dumps([action_stats.to_json() for action_stats in query.order_by(Action.created)], indent=2))
+        return
+
+    query = session.query(Action)
+    if resource:
+        query = query.filter(Action.resource == resource.lower())
+
+    for action in query.order_by(Action.created.desc()):
         click.echo(f'{action.created} {action.action} {action.resource}')
+        if stats and action.stats is not None:
+            _echo_stats(action.stats)
+
+
+def _echo_stats(stats: ActionStats) -> None:
+    """Echo the statistics of a population."""
+    peak_memory = 'unknown' if stats.peak_memory is None else f'{stats.peak_memory / 2 ** 20:.0f} MiB'
+    click.echo(f'    duration: {stats.duration:.1f}s, peak memory: {peak_memory}')
+    for table_name, count in sorted(stats.rows.items()):
+        click.echo(f'    rows in {table_name}: {count}')
+    for stage, duration in stats.stages.items():
+        click.echo(f'    stage {stage}: {duration:.1f}s')
 
 
 @main.command()
@@ -37,6 +37,12 @@ class Config(EasyConfig):
     #: The SQLAlchemy connection string to the database
     connection: str = None
 
+    #: The name of the performance profile to apply to SQLite connections. See :data:`bio2bel.engines.SQLITE_PROFILES`
+    sqlite_profile: str = None
+
+    #: The resident memory, in MiB, over which streaming populations commit early. See :mod:`bio2bel.manager.streaming`
+    memory_limit: int = None
+
     def __post_init__(self):
         os.makedirs(self.directory, exist_ok=True)
         if self.connection is None:
@@ -11,6 +11,8 @@ from zipfile import ZipFile
 
 import pandas as pd
 
+from .utils import _record_source
+
 logger = logging.getLogger(__name__)
 
 __all__ = [
@@ -40,6 +42,7 @@ def make_downloader(url: str, path: str) -> Callable[[bool], str]:  # noqa: D202
             logger.info('downloading %s to %s', url, path)
             urlretrieve(url, path)
 
+        _record_source(url, path)
         return path
 
     return download_data
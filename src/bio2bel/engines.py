@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+"""A process-wide registry of SQLAlchemy engines.
+
+Every Bio2BEL manager used to build its own engine (and therefore its own connection pool) even though most of them
+point at the same database. Engines built with :func:`get_engine` are shared between all callers in the process that
+use the same connection string.
+
+.. code-block:: python
+
+    from bio2bel.engines import dispose_all, get_engine
+
+    engine = get_engine('sqlite:///bio2bel.db')
+    assert engine is get_engine('sqlite:///bio2bel.db')
+
+    # Close all pooled connections, e.g., before forking or at the end of a script
+    dispose_all()
+
+SQLite connections can be tuned with one of the named :data:`SQLITE_PROFILES`, either by passing ``sqlite_profile``
+or by setting ``sqlite_profile`` in the Bio2BEL configuration (or the ``BIO2BEL_SQLITE_PROFILE`` environment
+variable). Use ``bulk`` while populating large resources and ``read`` for serving queries.
+
+.. code-block:: python
+
+    from bio2bel.engines import get_engine
+
+    engine = get_engine('sqlite:///bio2bel.db', sqlite_profile='bulk')
+
+Populating in memory (see :class:`bio2bel.AbstractManager`) builds a manager's tables in an in-memory
+database from :func:`build_memory_engine`, then copies their rows to the file.
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import StaticPool
+
+from .constants import config
+
+__all__ = [
+    'SQLITE_PROFILES',
+    'get_engine',
+    'apply_sqlite_profile',
+    'dispose_all',
+    'build_memory_engine',
+]
+
+logger = logging.getLogger(__name__)
+
+#: Named sets of PRAGMAs that are applied to each new SQLite connection
+SQLITE_PROFILES: Dict[str, Dict[str, Union[str, int]]] = {
+    # Favors write throughput while populating. Not crash-safe until the populate is done.
+    'bulk': dict(
+        journal_mode='WAL',
+        synchronous='OFF',
+        cache_size=-262144,  # 256 MiB
+        mmap_size=268435456,  # 256 MiB
+        temp_store='MEMORY',
+    ),
+    # Favors query latency on a database that is mostly read
+    'read': dict(
+        journal_mode='WAL',
+        synchronous='NORMAL',
+        cache_size=-65536,  # 64 MiB
+        mmap_size=1073741824,  # 1 GiB
+        temp_store='MEMORY',
+    ),
+}
+
+_EngineKey = Tuple[str, bool, Optional[str]]
+
+#: Engines that have been built, keyed by their normalized connection string and options
+_ENGINES: Dict[_EngineKey, Engine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def _normalize_connection(connection: str) -> str:
+    """Normalize a connection string so equivalent connections share the same engine."""
+    url = make_url(connection)
+    if hasattr(url, 'render_as_string'):  # SQLAlchemy 1.4+ hides the password in str()
+        return url.render_as_string(hide_password=False)
+    return str(url)
+
+
+def _is_memory_connection(connection: str) -> bool:
+    """Check if the connection is to an in-memory SQLite database.
+
+    Each engine for an in-memory database has its own database, so these are never shared.
+    """
+    url = make_url(connection)
+    return url.get_backend_name() == 'sqlite' and url.database in {None, '', ':memory:'}
+
+
+def _get_sqlite_profile(connection: str, sqlite_profile: Optional[str] = None) -> Optional[str]:
+    """Get the name of the SQLite profile to use, or None if the connection isn't to SQLite."""
+    if make_url(connection).get_backend_name() != 'sqlite':
+        return
+
+    if sqlite_profile is None:
+        sqlite_profile = config.sqlite_profile
+
+    if sqlite_profile is not None and sqlite_profile not in SQLITE_PROFILES:
+        raise ValueError(f'invalid SQLite profile: {sqlite_profile}. Should be one of: {sorted(SQLITE_PROFILES)}')
+
+    return sqlite_profile
+
+
+def get_engine(connection: str, echo: bool = False, sqlite_profile: Optional[str] = None) -> Engine:
+    """Get the engine for the given connection, building it if it doesn't exist yet.
+
+    :param connection: An RFC-1738 database connection string
+    :param echo: Turn on echoing SQL
+    :param sqlite_profile: The name of a profile from :data:`SQLITE_PROFILES` to apply if the connection is to
+     SQLite. Defaults to the ``sqlite_profile`` from the configuration.
+    """
+    sqlite_profile = _get_sqlite_profile(connection, sqlite_profile=sqlite_profile)
+
+    if _is_memory_connection(connection):
+        engine = create_engine(connection, echo=echo)
+        apply_sqlite_profile(engine, sqlite_profile)
+        return engine
+
+    key = _normalize_connection(connection), echo, sqlite_profile
+
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None:
+            logger.debug('building engine for %s', key[0])
+            engine = _ENGINES[key] = create_engine(key[0], echo=echo)
+            apply_sqlite_profile(engine, sqlite_profile)
+
+    return engine
+
+
+def apply_sqlite_profile(engine: Engine, sqlite_profile: Optional[str] = None) -> None:
+    """Apply a SQLite profile to all new connections made by the engine.
+
+    :param engine: A SQLAlchemy engine. Nothing is done if it doesn't connect to SQLite.
+    :param sqlite_profile: The name of a profile from :data:`SQLITE_PROFILES`. Defaults to the ``sqlite_profile``
+     from the configuration.
+    """
+    sqlite_profile = _get_sqlite_profile(str(engine.url), sqlite_profile=sqlite_profile)
+    if sqlite_profile is None:
+        return
+
+    pragmas = [
+        f'PRAGMA {key}={value}'
+        for key, value in SQLITE_PROFILES[sqlite_profile].items()
+    ]
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Set the PRAGMAs from the profile on a new connection."""
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    logger.debug('applied SQLite profile %s to %s', sqlite_profile, engine.url)
+
+
+def dispose_all() -> None:
+    """Dispose the connection pools of all registered engines and clear the registry."""
+    with _ENGINES_LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
+
+
+def build_memory_engine() -> Engine:
+    """Build an engine for a new in-memory SQLite database.
+
+    All connections from the engine share the same database, so it can be used from several sessions.
+    """
+    return create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
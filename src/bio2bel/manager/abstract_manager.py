@@ -5,16 +5,31 @@
 import logging
 import os
 import sys
+import tempfile
+import time
 from abc import ABCMeta, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
 from functools import wraps
-from typing import List, Mapping, Type
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Mapping, Optional, Sequence, Type, Union
+from urllib.request import urlretrieve
 
 import click
+from sqlalchemy import Index, Table, inspect
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative.api import DeclarativeMeta
+from sqlalchemy.orm import scoped_session, sessionmaker
 
 from .cli_manager import CliMixin
 from .connection_manager import ConnectionManager
-from ..utils import _get_managers, clear_cache, get_data_dir
+from .staging import build_staging_engine, drop_staging, get_staging_schema, swap_staging_tables
+from .stats import PopulateRecorder
+from .streaming import StreamingSession
+from ..constants import config
+from ..engines import build_memory_engine
+from ..models import Action, ActionStats, Checkpoint, Source, clear_schema, create_schema, ensure_schema, has_schema
+from ..utils import _get_managers, clear_cache, get_data_dir, get_file_md5, track_sources
 
 __all__ = [
     'AbstractManager',
@@ -33,16 +48,49 @@ class AbstractManagerMeta(ABCMeta):
         cls._populate_original = cls.populate
 
         @wraps(cls._populate_original)
-        def populate_wrapped(self, *populate_args, **populate_kwargs):
+        def populate_wrapped(
+            self,
+            *populate_args,
+            resume: bool = False,
+            shadow: bool = False,
+            defer_indexes: bool = False,
+            in_memory: bool = False,
+            **populate_kwargs
+        ):
             """Populate the database."""
+            if self._recorder is not None:
+                # Already populating, like when a subclass's populate calls its parent's
+                return cls._populate_original(self, *populate_args, **populate_kwargs)
+
+            if shadow and defer_indexes:
+                raise ValueError('can not defer indexes while populating staging tables')
+            if shadow and in_memory:
+                raise ValueError('can not populate staging tables in memory')
+            if resume and in_memory:
+                raise ValueError('can not resume a population in memory')
+
+            self._bulk_load_counts.clear()
+            self._recorder = PopulateRecorder(table.name for table in self._metadata.sorted_tables)
+
             try:
-                cls._populate_original(self, *populate_args, **populate_kwargs)
-            except Exception:
-                self._store_populate_failed()
-                raise
-            else:
-                # Hack in the action storage
-                self._store_populate()
+                with track_sources() as self._sources:
+                    if shadow:
+                        self._populate_staged(cls._populate_original, *populate_args, **populate_kwargs)
+                    elif in_memory:
+                        self._populate_in_memory(
+                            cls._populate_original, *populate_args, defer_indexes=defer_indexes, **populate_kwargs
+                        )
+                    else:
+                        self._populate_checkpointed(
+                            cls._populate_original, *populate_args,
+                            resume=resume, defer_indexes=defer_indexes, **populate_kwargs
+                        )
+            finally:
+                self._recorder.close()
+                self._recorder = None
+
+            for table_name, count in sorted(self._bulk_load_counts.items()):
+                log.info('bulk loaded %d rows into %s', count, table_name)
 
         cls.populate = populate_wrapped
 
@@ -149,6 +197,88 @@ class AbstractManager(ConnectionManager, CliMixin, metaclass=AbstractManagerMeta
             def populate(self) -> None:
                 ...
 
+    For large resources, building ORM objects one at a time and adding them to the session gets slow since the cost of
+    each flush grows with the session's identity map. Instead, rows can be streamed into tables with
+    :meth:`AbstractManager.bulk_load`, which also works for association tables.
+
+    .. code-block:: python
+
+        class Manager(AbstractManager):
+            ...
+
+            def populate(self) -> None:
+                self.bulk_load(MyImportantModel, (
+                    dict(identifier=identifier, name=name)
+                    for identifier, name in iterate_my_data()
+                ))
+
+    Managers that build ORM objects can add them through :meth:`AbstractManager.streaming` instead of adding them all
+    to the session and committing at the end. It commits them and empties the session every so often, so the memory
+    used doesn't grow with the size of the resource.
+
+    .. code-block:: python
+
+        class Manager(AbstractManager):
+            ...
+
+            def populate(self) -> None:
+                with self.streaming(batch_size=5000) as session:
+                    for identifier, name in iterate_my_data():
+                        session.add(MyImportantModel(identifier=identifier, name=name))
+
+    **Resuming a Failed Population**
+
+    Populating a large resource can take hours. Managers can opt in to having a failed population resumed by splitting
+    their population into named stages with :meth:`AbstractManager.run_stage`. Each completed stage is stored as a
+    checkpoint and is skipped when the population is run with ``resume=True`` (or ``populate --resume`` from the
+    command line). Long stages can also store how many chunks they have completed with
+    :meth:`AbstractManager.store_checkpoint` and look it up with :meth:`AbstractManager.get_checkpoint_offset`.
+
+    .. code-block:: python
+
+        class Manager(AbstractManager):
+            ...
+
+            def populate(self) -> None:
+                self.run_stage('proteins', self._populate_proteins)
+                self.run_stage('interactions', self._populate_interactions)
+
+    Checkpoints are cleared after a successful population, when a population is started without resuming, and when
+    the tables are dropped or reset, since the stages they mark as completed are gone.
+
+    How long the population took, how many rows it inserted into each table, and its peak memory are stored with its
+    action, along with the timings of any stages run with :meth:`AbstractManager.run_stage` or timed with
+    :meth:`AbstractManager.time_stage`. They can be listed with ``bio2bel actions --stats``.
+
+    **Deferring Indexes**
+
+    Running the population with ``defer_indexes=True`` (or ``populate --defer-indexes`` from the command line) drops the
+    non-unique indexes of the manager's tables before the population, then builds them again and runs ``ANALYZE``
+    afterwards. This saves maintaining the indexes on each insert, which is worth it for large resources.
+
+    **Populating in Memory**
+
+    For SQLite, running the population with ``in_memory=True`` (or ``populate --in-memory`` from the command line)
+    creates the manager's tables in an in-memory database, runs the population there, then copies the tables to the file
+    in one transaction. This trades memory for avoiding many small writes to the file. Other processes can read and
+    write the file in the meantime, except while the tables are copied. It can't be resumed, since the checkpoints are
+    only kept in memory.
+
+    **Skipping Unchanged Sources**
+
+    The source files used during a successful population through :func:`bio2bel.utils.ensure_path` or
+    :func:`bio2bel.downloading.make_downloader` are stored along with their checksums. :meth:`sources_changed` downloads
+    them again to see if any changed, which ``populate --if-changed`` uses to skip the population when none did. When
+    any did, it resets the database before populating it again, unless ``--shadow`` is given, since swapping in the
+    staging tables already replaces the old data.
+
+    **Refreshing Without Downtime**
+
+    Running the population with ``shadow=True`` (or ``populate --shadow`` from the command line) loads the data into
+    staging copies of the manager's tables, then replaces the contents of the real tables with them in a single
+    transaction. Until then, readers keep seeing the previous contents, and if the population fails they are left as
+    they were. See :mod:`bio2bel.manager.staging`.
+
     **Checking the Database is Populated**
 
     A method for checking if the database has been populated already must be implemented as well. The easiest way to
@@ -209,7 +339,19 @@ class AbstractManager(ConnectionManager, CliMixin, metaclass=AbstractManagerMeta
 
     def __init__(self, *args, **kwargs):  # noqa: D107
         super().__init__(*args, **kwargs)
-        self.create_all()
+        ensure_schema(self.engine, self._metadata)
+
+        #: The number of rows inserted with :meth:`bulk_load` into each table during the current population
+        self._bulk_load_counts = Counter()
+
+        #: Is the current population resuming from the checkpoints of a previous one?
+        self._resume = False
+
+        #: The source files used during the current population. See :func:`bio2bel.utils.track_sources`.
+        self._sources = {}
+
+        #: Records the statistics of the current population
+        self._recorder: Optional[PopulateRecorder] = None
 
     @abstractmethod
     def is_populated(self) -> bool:
@@ -231,10 +373,13 @@ class AbstractManager(ConnectionManager, CliMixin, metaclass=AbstractManagerMeta
     def create_all(self, check_first: bool = True):
         """Create the empty database (tables).
 
+        Unlike instantiation, which skips the check when the tables are already known to exist (see
+        :func:`bio2bel.models.ensure_schema`), this always checks the database.
+
         :param bool check_first: Defaults to True, don't issue CREATEs for tables already present
          in the target database. Defers to :meth:`sqlalchemy.sql.schema.MetaData.create_all`
         """
-        self._metadata.create_all(self.engine, checkfirst=check_first)
+        create_schema(self.engine, self._metadata, checkfirst=check_first)
 
     def drop_all(self, check_first: bool = True):
         """Drop all tables from the database.
@@ -243,6 +388,302 @@ class AbstractManager(ConnectionManager, CliMixin, metaclass=AbstractManagerMeta
           present in the target database. Defers to :meth:`sqlalchemy.sql.schema.MetaData.drop_all`
         """
         self._metadata.drop_all(self.engine, checkfirst=check_first)
+        clear_schema(self.engine, self._metadata)
+        Checkpoint.clear(self.module_name, session=self.session)
+        self._store_drop()
+
+    def _populate_checkpointed(
+        self,
+        populate: Callable[..., None],
+        *args,
+        resume: bool = False,
+        defer_indexes: bool = False,
+        **kwargs
+    ) -> None:
+        """Run the population, keeping the checkpoints of a failed population so it can be resumed.
+
+        :param populate: The unwrapped populate function
+        :param args: Positional arguments to pass to the populate function
+        :param resume: Should the stages completed by the last failed population be skipped?
+        :param defer_indexes: Should the non-unique indexes be built after the population?
+        :param kwargs: Keyword arguments to pass to the populate function
+        """
+        self._resume = resume
+        if not resume:
+            Checkpoint.clear(self.module_name, session=self.session)
+
+        try:
+            with self._deferring_indexes(defer_indexes), self._recorder.counting_rows(self.engine):
+                populate(self, *args, **kwargs)
+        except Exception:
+            self.session.rollback()
+            self._store_populate_failed()
+            raise
+        else:
+            # Hack in the action storage
+            self._store_populate()
+            Checkpoint.clear(self.module_name, session=self.session)
+        finally:
+            self._resume = False
+
+    def _populate_staged(self, populate: Callable[..., None], *args, **kwargs) -> None:
+        """Run the population against staging tables then swap them in.
+
+        :param populate: The unwrapped populate function
+        :param args: Positional arguments to pass to the populate function
+        :param kwargs: Keyword arguments to pass to the populate function
+        """
+        schema = get_staging_schema(self.module_name)
+        staging_engine = build_staging_engine(self.engine, schema)
+        staging_metadatas = self._metadata, Action.metadata
+
+        try:
+            for metadata in staging_metadatas:
+                metadata.drop_all(staging_engine)
+                metadata.create_all(staging_engine)
+
+            staging_session = scoped_session(sessionmaker(bind=staging_engine))
+            try:
+                with self._using(staging_engine, staging_session), self._recorder.counting_rows(staging_engine):
+                    populate(self, *args, **kwargs)
+            finally:
+                staging_session.remove()
+
+            log.info('swapping in the staged tables for %s', self.module_name)
+            with self.time_stage('swap'):
+                swap_staging_tables(self.engine, self._metadata, schema)
+        except Exception:
+            self.session.rollback()
+            self._store_populate_failed()
+            raise
+        else:
+            self.session.expire_all()
+            self._store_populate()
+        finally:
+            drop_staging(staging_engine, *staging_metadatas)
+
+    def _store_populate(self) -> Action:
+        action = super()._store_populate()
+        if self._sources:
+            Source.store(action, self._sources, session=self.session)
+        self._store_stats(action)
+        return action
+
+    def _store_populate_failed(self) -> Action:
+        action = super()._store_populate_failed()
+        self._store_stats(action)
+        return action
+
+    def _store_stats(self, action: Action) -> None:
+        """Store the statistics of the current population with its action."""
+        if self._recorder is None:
+            return
+
+        stats = self._recorder.get_stats()
+        ActionStats.store(action, session=self.session, **stats)
+        log.info('populated %s in %.2f seconds', self.module_name, stats['duration'])
+
+    def sources_changed(self) -> bool:
+        """Check if any of the source files used by the current population have changed.
+
+        Each source file is downloaded again and compared to the checksum stored after the last successful population.
+        Changed files replace their cached copies, so the next population uses them.
+
+        :return: True if the resource isn't populated (it never was or it was dropped afterwards), if no source files
+         were recorded for its population, or if any of them changed
+        """
+        sources = Source.get_last(self.module_name, session=self.session)
+        if not sources:
+            return True
+
+        changed = False
+        for source in sources:
+            directory = os.path.dirname(source.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory)
+            os.close(fd)
+            try:
+                urlretrieve(source.url, temp_path)
+                if get_file_md5(temp_path) == source.md5:
+                    log.info('%s is unchanged', source.url)
+                    continue
+                log.info('%s has changed', source.url)
+                os.replace(temp_path, source.path)
+                changed = True
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+        return changed
+
+    @contextmanager
+    def _deferring_indexes(self, defer: bool = True):
+        """Drop the non-unique indexes while in the context, then build them again and analyze the tables.
+
+        :param defer: If false, does nothing
+        """
+        if not defer:
+            yield
+            return
+
+        indexes = [
+            index
+            for table in self._metadata.sorted_tables
+            for index in table.indexes
+            if not index.unique
+        ]
+
+        inspector = inspect(self.engine)
+        dropped = 0
+        for table_name in {index.table.name for index in indexes}:
+            existing = {index['name'] for index in inspector.get_indexes(table_name)}
+            for index in indexes:
+                if index.table.name == table_name and index.name in existing:
+                    index.drop(self.engine)
+                    dropped += 1
+        log.info('dropped %d indexes from the tables for %s', dropped, self.module_name)
+
+        try:
+            yield
+        except Exception:
+            self.session.rollback()
+            self._create_indexes(indexes)
+            raise
+
+        self.session.commit()
+        self._create_indexes(indexes)
+        self._analyze()
+
+    def _create_indexes(self, indexes: Iterable[Index]) -> None:
+        """Create the indexes."""
+        t = time.time()
+        for index in indexes:
+            index.create(self.engine)
+        log.info('built the indexes for %s in %.2f seconds', self.module_name, time.time() - t)
+
+    def _analyze(self) -> None:
+        """Update the statistics the query planner uses for this manager's tables."""
+        statement = 'ANALYZE TABLE {}' if self.engine.dialect.name == 'mysql' else 'ANALYZE {}'
+        quote = self.engine.dialect.identifier_preparer.quote
+
+        with self.engine.begin() as connection:
+            for table in self._metadata.sorted_tables:
+                connection.execute(statement.format(quote(table.name)))
+
+    def _populate_in_memory(
+        self,
+        populate: Callable[..., None],
+        *args,
+        defer_indexes: bool = False,
+        **kwargs
+    ) -> None:
+        """Run the population against this manager's tables in an in-memory SQLite database, then copy them to the file.
+
+        Only this manager's tables and the Bio2BEL tables are created in memory, and they start out empty. The file's
+        write lock is only held while the tables are copied back, so other processes can keep writing to the file
+        during the population.
+
+        :param populate: The unwrapped populate function
+        :param args: Positional arguments to pass to the populate function
+        :param defer_indexes: Should the non-unique indexes be built after the population?
+        :param kwargs: Keyword arguments to pass to the populate function
+        """
+        url = self.engine.url
+        if url.get_backend_name() != 'sqlite' or url.database in {None, '', ':memory:'}:
+            raise ValueError(f'can only populate in memory for SQLite database files: {url}')
+
+        self.session.commit()
+        memory_engine = build_memory_engine()
+
+        try:
+            for metadata in (self._metadata, Action.metadata):
+                metadata.create_all(memory_engine)
+
+            memory_session = scoped_session(sessionmaker(bind=memory_engine))
+            try:
+                with self._using(memory_engine, memory_session), self._recorder.counting_rows(memory_engine):
+                    with self._deferring_indexes(defer_indexes):
+                        populate(self, *args, **kwargs)
+            finally:
+                memory_session.remove()
+
+            log.info('copying the in-memory tables for %s to %s', self.module_name, url.database)
+            with self.time_stage('save'), self.engine.connect() as connection:
+                with connection.begin():
+                    # Take the write lock before reading the in-memory tables instead of at the first write
+                    connection.execute('BEGIN IMMEDIATE')
+                    self._copy_tables(memory_engine, connection)
+        except Exception:
+            self.session.rollback()
+            self._store_populate_failed()
+            raise
+        else:
+            self.session.expire_all()
+            self._store_populate()
+        finally:
+            memory_engine.dispose()
+
+    def _copy_tables(self, source: Engine, connection, batch_size: int = 10000) -> None:
+        """Replace the contents of this manager's tables through the connection with their contents in another database.
+
+        :param source: The engine for the database to copy from
+        :param connection: A connection to the database to copy to
+        :param batch_size: The number of rows to insert at a time
+        """
+        tables = self._metadata.sorted_tables
+        for table in reversed(tables):
+            connection.execute(table.delete())
+
+        for table in tables:
+            result = source.execute(table.select())
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                connection.execute(table.insert(), [dict(row) for row in rows])
+
+    @contextmanager
+    def _using(self, engine, session):
+        """Temporarily use a different engine and session while in the context."""
+        old_engine, old_session = self.engine, self.session
+        self.engine, self.session = engine, session
+        try:
+            yield
+        finally:
+            self.engine, self.session = old_engine, old_session
+
+    def reset(self) -> None:
+        """Delete everything from this manager's tables, keeping the tables and their indexes.
+
+        The tables are emptied in one transaction in an order that respects their foreign keys. On PostgreSQL, they're
+        truncated and their sequences are restarted. If the tables weren't recorded as created from the current
+        declarative base (see :func:`bio2bel.models.has_schema`), like when a model gained a column since they were
+        created (see :func:`bio2bel.models.create_schema`), they're dropped and created again instead.
+        """
+        if not has_schema(self.engine, self._metadata):
+            log.info('the tables for %s have changed. Dropping and creating them again', self.module_name)
+            self.drop_all()
+            self.create_all()
+            return
+
+        t = time.time()
+        tables = self._metadata.sorted_tables
+        self.session.rollback()
+
+        with self.engine.begin() as connection:
+            if self.engine.dialect.name == 'postgresql':
+                quote = self.engine.dialect.identifier_preparer.quote
+                connection.execute('TRUNCATE {} RESTART IDENTITY'.format(', '.join(
+                    quote(table.name)
+                    for table in tables
+                )))
+            else:
+                for table in reversed(tables):
+                    connection.execute(table.delete())
+
+        self.session.expunge_all()
+        log.info('reset %d tables for %s in %.2f seconds', len(tables), self.module_name, time.time() - t)
+        Checkpoint.clear(self.module_name, session=self.session)
         self._store_drop()
 
     def _get_query(self, model):
@@ -267,6 +708,143 @@ class AbstractManager(ConnectionManager, CliMixin, metaclass=AbstractManagerMeta
         """
         return self._get_query(model).all()
 
+    def bulk_load(
+        self,
+        model_or_table: Union[DeclarativeMeta, Table],
+        rows: Iterable[Union[Mapping, Sequence]],
+        batch_size: int = 10000,
+        columns: Optional[Sequence[str]] = None,
+    ) -> int:
+        """Insert rows into a table with SQLAlchemy Core, bypassing the ORM's unit of work.
+
+        Each batch is inserted with one ``executemany`` in its own transaction, so pending changes in this manager's
+        session should be committed first.
+
+        :param model_or_table: A SQLAlchemy model class or a table, like an association table
+        :param rows: An iterable of dictionaries of column names to values, or of tuples of values
+        :param batch_size: The number of rows to insert in each transaction
+        :param columns: The names of the columns corresponding to the values in tuple rows. Defaults to all columns
+         of the table, in order.
+        :return: The number of rows inserted
+        """
+        table = getattr(model_or_table, '__table__', model_or_table)
+
+        if columns is None:
+            columns = [column.key for column in table.columns]
+
+        count = 0
+        t = time.time()
+
+        for batch in _iterate_batches(rows, batch_size):
+            batch = [
+                row if isinstance(row, Mapping) else dict(zip(columns, row))
+                for row in batch
+            ]
+            with self.engine.begin() as connection:
+                connection.execute(table.insert(), batch)
+            count += len(batch)
+
+        elapsed = time.time() - t
+        log.info(
+            'inserted %d rows into %s in %.2f seconds (%.0f rows/second)',
+            count, table.name, elapsed, count / elapsed if elapsed else count,
+        )
+        self._bulk_load_counts[table.name] += count
+
+        return count
+
+    @contextmanager
+    def streaming(self, batch_size: int = 10000, memory_limit: Optional[int] = None) -> Iterator[StreamingSession]:
+        """Add objects to this manager's session in batches that are committed and expunged while in the context.
+
+        The last batch is committed when the context exits.
+
+        :param batch_size: The number of objects to add before committing them
+        :param memory_limit: The resident memory, in MiB, over which the objects are committed early. Defaults to
+         the ``memory_limit`` from the configuration.
+        """
+        if memory_limit is None:
+            memory_limit = config.memory_limit
+
+        streaming_session = StreamingSession(self.session, batch_size=batch_size, memory_limit=memory_limit)
+        yield streaming_session
+        streaming_session.flush()
+
+        log.info(
+            'added %d objects in %d batches for %s',
+            streaming_session.count, streaming_session.flushes, self.module_name,
+        )
+
+    def run_stage(self, name: str, func: Callable[..., None], *args, **kwargs) -> bool:
+        """Run a stage of the population and store a checkpoint after it completes.
+
+        If the population is resuming and this stage has already been completed, it is skipped.
+
+        :param name: The name of the stage, unique within this manager
+        :param func: The function that runs the stage
+        :param args: Positional arguments to pass to the function
+        :param kwargs: Keyword arguments to pass to the function
+        :return: If the stage was run
+        """
+        if self._resume:
+            checkpoint = Checkpoint.get(self.module_name, name, session=self.session)
+            if checkpoint is not None and checkpoint.offset is None:
+                log.info('skipping completed stage %s of %s', name, self.module_name)
+                return False
+
+        with self.time_stage(name):
+            func(*args, **kwargs)
+        self.store_checkpoint(name)
+        return True
+
+    @contextmanager
+    def time_stage(self, name: str):
+        """Record the time spent in the context as a named stage of the current population.
+
+        The timings are stored with the population's action. See :class:`bio2bel.models.ActionStats`. Stages run with
+        :meth:`run_stage` are timed automatically.
+
+        :param name: The name of the stage
+        """
+        if self._recorder is None:
+            yield
+            return
+
+        with self._recorder.timing_stage(name):
+            yield
+
+    def store_checkpoint(self, name: str, offset: Optional[int] = None) -> None:
+        """Store that a stage was completed, or that a given number of chunks of the stage were completed.
+
+        A stage with an offset is not considered complete by :meth:`run_stage`.
+
+        This commits this manager's session, so what has been added during the stage is kept if a later stage fails.
+
+        :param name: The name of the stage
+        :param offset: The number of chunks of the stage that are complete
+        """
+        Checkpoint.store(self.module_name, name, session=self.session, offset=offset)
+
+    def has_checkpoints(self) -> bool:
+        """Check if there are checkpoints left from a population that didn't finish."""
+        return 0 < self.session.query(Checkpoint).filter(Checkpoint.resource == self.module_name).count()
+
+    def get_checkpoint_offset(self, name: str) -> int:
+        """Get the number of chunks of a stage that can be skipped.
+
+        This is zero unless the population is resuming and a checkpoint with an offset was stored for the stage.
+
+        :param name: The name of the stage
+        """
+        if not self._resume:
+            return 0
+
+        checkpoint = Checkpoint.get(self.module_name, name, session=self.session)
+        if checkpoint is None or checkpoint.offset is None:
+            return 0
+
+        return checkpoint.offset
+
     @staticmethod
     def _cli_add_populate(main: click.Group) -> click.Group:
         """Add the populate command."""
@@ -300,26 +878,55 @@ class AbstractManager(ConnectionManager, CliMixin, metaclass=AbstractManagerMeta
         return main
 
 
+def _iterate_batches(iterable: Iterable, batch_size: int) -> Iterable[List]:
+    """Iterate over lists of at most the given size."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
 def add_cli_populate(main: click.Group) -> click.Group:  # noqa: D202
     """Add a ``populate`` command to main :mod:`click` function."""
 
     @main.command()
     @click.option('-r', '--reset', is_flag=True, help='Nuke database first')
     @click.option('-f', '--force', is_flag=True, help='Force overwrite if already populated')
+    @click.option('--resume', is_flag=True, help='Skip the stages completed by the last failed population')
+    @click.option('--shadow', is_flag=True, help='Load into staging tables and swap them in when done')
+    @click.option(
+        '--if-changed', is_flag=True,
+        help='Skip if the source files are unchanged since the last population, otherwise nuke the database first',
+    )
+    @click.option('--defer-indexes', is_flag=True, help='Build the indexes after loading the data')
+    @click.option('--in-memory', is_flag=True, help='Populate the tables in memory, then copy them to the SQLite file')
     @click.pass_obj
-    def populate(manager: AbstractManager, reset, force):
+    def populate(manager: AbstractManager, reset, force, resume, shadow, if_changed, defer_indexes, in_memory):
         """Populate the database."""
-        if reset:
+        if shadow and (reset or resume or defer_indexes or in_memory):
+            click.secho('--shadow can not be used with --reset, --resume, --defer-indexes, or --in-memory', fg='red')
+            sys.exit(1)
+
+        if in_memory and resume:
+            click.secho('--in-memory can not be used with --resume', fg='red')
+            sys.exit(1)
+
+        if if_changed and not manager.sources_changed():
+            click.echo('Sources unchanged since the last population')
+            sys.exit(0)
+
+        # What was populated from the old sources is replaced, which shadow populations already do when swapping
+        if reset or (if_changed and not shadow):
             click.echo('Deleting the previous instance of the database')
-            manager.drop_all()
-            click.echo('Creating new models')
-            manager.create_all()
+            manager.reset()
 
-        if manager.is_populated() and not force:
+        if not shadow and manager.is_populated() and not force and not (resume and manager.has_checkpoints()):
             click.echo('Database already populated. Use --force to overwrite')
             sys.exit(0)
 
-        manager.populate()
+        manager.populate(resume=resume, shadow=shadow, defer_indexes=defer_indexes, in_memory=in_memory)
 
     return main
 
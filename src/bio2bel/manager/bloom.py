@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""A Bloom filter for quickly ruling out values that aren't in a namespace.
+
+A Bloom filter never says a value that was added is missing, but might say that a value that wasn't added is
+present, at about the error rate it was made for. Checking terms against it first means only the terms that might be
+valid need an exact lookup.
+"""
+
+import hashlib
+import logging
+import math
+import struct
+from typing import Iterable, List, Optional, Tuple
+
+__all__ = [
+    'BloomFilter',
+    'screen_terms',
+]
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b'B2BBLM01'
+#: The magic bytes, the number of bits, and the number of hash functions
+_HEADER = struct.Struct('<8sQI')
+
+
+class BloomFilter:
+    """A Bloom filter over strings. Values that aren't strings are converted to strings."""
+
+    def __init__(self, size: int, hash_count: int, bits: Optional[bytearray] = None) -> None:
+        """Initialize the Bloom filter.
+
+        :param size: The number of bits
+        :param hash_count: The number of hash functions
+        :param bits: The bits, if they're already known
+        """
+        self.size = size
+        self.hash_count = hash_count
+        self.bits = bytearray((size + 7) // 8) if bits is None else bits
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.001) -> 'BloomFilter':
+        """Make an empty Bloom filter with the optimal size for the given number of values and error rate.
+
+        :param capacity: The number of values that will be added
+        :param error_rate: The probability of a value that wasn't added appearing to be present
+        """
+        capacity = max(capacity, 1)
+        size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hash_count = max(1, round(size / capacity * math.log(2)))
+        return cls(size, hash_count)
+
+    def _iterate_positions(self, value: str) -> Iterable[int]:
+        """Iterate over the positions of the bits for the value, using double hashing."""
+        first, second = struct.unpack('<QQ', hashlib.blake2b(str(value).encode('utf8'), digest_size=16).digest())
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, value: str) -> None:
+        """Add a value."""
+        for position in self._iterate_positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def update(self, values: Iterable[str]) -> None:
+        """Add several values."""
+        for value in values:
+            self.add(value)
+
+    def might_contain(self, value: str) -> bool:
+        """Check if the value might have been added. If this is false, it definitely wasn't."""
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._iterate_positions(value)
+        )
+
+    def __contains__(self, value: str) -> bool:  # noqa: D105
+        return self.might_contain(value)
+
+    def to_file(self, path: str) -> None:
+        """Write the Bloom filter to a file."""
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, self.size, self.hash_count))
+            file.write(self.bits)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'BloomFilter':
+        """Read a Bloom filter written with :meth:`to_file`.
+
+        :raises ValueError: If the file isn't a Bloom filter
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        magic, size, hash_count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC:
+            raise ValueError(f'not a Bloom filter: {path}')
+
+        return cls(size, hash_count, bytearray(data[_HEADER.size:]))
+
+
+def screen_terms(bloom: BloomFilter, terms: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Split terms into the ones that definitely aren't in the Bloom filter and the ones that need an exact check.
+
+    :param bloom: A Bloom filter
+    :param terms: The terms to check
+    :return: A pair of the terms that are missing and the terms that might be present
+    """
+    missing, candidates = [], []
+    for term in terms:
+        (candidates if bloom.might_contain(term) else missing).append(term)
+    return missing, candidates
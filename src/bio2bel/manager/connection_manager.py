@@ -5,11 +5,11 @@
 import logging
 from typing import Optional
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker
 
+from ..engines import get_engine
 from ..exc import Bio2BELMissingNameError, Bio2BELModuleCaseError
-from ..models import Action, create_all
+from ..models import Action, ensure_schema
 from ..utils import get_connection
 
 __all__ = [
@@ -60,7 +60,7 @@ class ConnectionManager:
         self.engine = engine
         self.session = session
 
-        create_all(self.engine)
+        ensure_schema(self.engine)
 
     @property
     def connection(self) -> str:
@@ -84,14 +84,14 @@ class ConnectionManager:
         """
         return get_connection(cls.module_name, connection=connection)
 
-    def _store_populate(self):
-        Action.store_populate(self.module_name, session=self.session)
+    def _store_populate(self) -> Action:
+        return Action.store_populate(self.module_name, session=self.session)
 
-    def _store_populate_failed(self):
-        Action.store_populate_failed(self.module_name, session=self.session)
+    def _store_populate_failed(self) -> Action:
+        return Action.store_populate_failed(self.module_name, session=self.session)
 
-    def _store_drop(self):
-        Action.store_drop(self.module_name, session=self.session)
+    def _store_drop(self) -> Action:
+        return Action.store_drop(self.module_name, session=self.session)
 
     def __repr__(self):  # noqa: D105
         return '<{module_name}Manager url={url}>'.format(
@@ -107,15 +107,21 @@ def build_engine_session(
     autocommit: Optional[bool] = None,
     expire_on_commit: Optional[bool] = None,
     scopefunc=None,
+    sqlite_profile: Optional[str] = None,
 ):
     """Build an engine and a session.
 
+    The engine is shared with all other managers in the process using the same connection. See
+    :func:`bio2bel.engines.get_engine`.
+
     :param connection: An RFC-1738 database connection string
     :param echo: Turn on echoing SQL
     :param autoflush: Defaults to True if not specified in kwargs or configuration.
     :param autocommit: Defaults to False if not specified in kwargs or configuration.
     :param expire_on_commit: Defaults to False if not specified in kwargs or configuration.
     :param scopefunc: Scoped function to pass to :func:`sqlalchemy.orm.scoped_session`
+    :param sqlite_profile: The name of a profile from :data:`bio2bel.engines.SQLITE_PROFILES` to apply if the
+     connection is to SQLite. Defaults to the ``sqlite_profile`` from the configuration.
     :rtype: tuple[Engine,Session]
 
     From the Flask-SQLAlchemy documentation:
@@ -126,7 +132,7 @@ def build_engine_session(
     created and removed with the request/response cycle, and should be fine
     in most cases.
     """
-    engine = create_engine(connection, echo=echo)
+    engine = get_engine(connection, echo=echo, sqlite_profile=sqlite_profile)
 
     autoflush = autoflush if autoflush is not None else False
     autocommit = autocommit if autocommit is not None else False
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+"""A memory-mapped index for looking up the names of a namespace's identifiers and vice versa.
+
+The index is a single file with a header, a key saying what the index was built from, an array of fixed-size records
+for the (identifier, name) pairs sorted by identifier, an array of the positions of the records that have names sorted
+by name, and the UTF-8 encoded strings. Lookups are binary
+searches over the memory-mapped file, so opening it doesn't read anything but the header, and the pages are shared
+between all of the processes that open the same file.
+
+The file is replaced atomically when it's rebuilt. Indexes that were already open keep reading the old file until
+they're opened again.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from typing import Iterable, List, Optional, Tuple
+
+__all__ = [
+    'NamespaceIndex',
+    'write_namespace_index',
+]
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b'B2BNSIX3'
+#: The magic bytes, the number of records, the number of records with names, and the length of the key
+_HEADER = struct.Struct('<8sQQI')
+#: The offset and length of the identifier, then the offset and length of the name
+_RECORD = struct.Struct('<QIQI')
+#: The position of a record in the name order
+_POSITION = struct.Struct('<I')
+
+
+def write_namespace_index(path: str, pairs: Iterable[Tuple[str, str]], key: str = '') -> int:
+    """Write an index file for the given identifiers and names and return the number of entries.
+
+    Like in a dictionary, only the last name is kept if an identifier appears several times. Identifiers and names
+    that aren't strings are converted to strings. Pairs without an identifier are skipped, and identifiers without
+    a name are indexed, but can't be looked up by name.
+
+    :param path: The path of the index file. It's replaced atomically if it exists.
+    :param pairs: Pairs of identifiers and names, in any order
+    :param key: A string saying what the index was built from, so readers can tell if it's stale
+    """
+    encoded_key = key.encode('utf8')
+    identifier_to_name = {
+        str(identifier).encode('utf8'): b'' if name is None else str(name).encode('utf8')
+        for identifier, name in pairs
+        if identifier is not None and identifier != ''
+    }
+    entries = sorted(identifier_to_name.items())
+    name_order = sorted(
+        (i for i, (_, name) in enumerate(entries) if name),
+        key=lambda i: (entries[i][1], entries[i][0]),
+    )
+
+    offset = _HEADER.size + len(encoded_key) + len(entries) * _RECORD.size + len(name_order) * _POSITION.size
+    records = bytearray()
+    for identifier, name in entries:
+        records += _RECORD.pack(offset, len(identifier), offset + len(identifier), len(name))
+        offset += len(identifier) + len(name)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.index')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, len(entries), len(name_order), len(encoded_key)))
+            file.write(encoded_key)
+            file.write(records)
+            file.write(b''.join(_POSITION.pack(i) for i in name_order))
+            for identifier, name in entries:
+                file.write(identifier)
+                file.write(name)
+        os.replace(temporary_path, path)
+    except Exception:
+        os.remove(temporary_path)
+        raise
+
+    logger.info('wrote an index of %d entries to %s', len(entries), path)
+    return len(entries)
+
+
+class NamespaceIndex:
+    """A read-only, memory-mapped index of a namespace's identifiers and names.
+
+    If several identifiers have the same name, looking up the identifier for the name gives the first of them.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open an index file written with :func:`write_namespace_index`.
+
+        :param path: The path of the index file
+        :raises ValueError: If the file isn't an index file
+        """
+        self.path = path
+
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._size, self._named_size, key_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            self._mmap.close()
+            raise ValueError(f'not a namespace index: {path}')
+
+        #: The key the index was written with
+        self.key = self._mmap[_HEADER.size:_HEADER.size + key_length].decode('utf8')
+
+        self._records_offset = _HEADER.size + key_length
+        self._positions_offset = self._records_offset + self._size * _RECORD.size
+
+    def __len__(self) -> int:  # noqa: D105
+        return self._size
+
+    def __enter__(self) -> 'NamespaceIndex':  # noqa: D105
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):  # noqa: D105
+        self.close()
+
+    def close(self) -> None:
+        """Close the memory map."""
+        self._mmap.close()
+
+    def _get_record(self, i: int) -> Tuple[bytes, bytes]:
+        identifier_offset, identifier_length, name_offset, name_length = _RECORD.unpack_from(
+            self._mmap, self._records_offset + i * _RECORD.size,
+        )
+        return (
+            self._mmap[identifier_offset:identifier_offset + identifier_length],
+            self._mmap[name_offset:name_offset + name_length],
+        )
+
+    def _get_name_position(self, i: int) -> int:
+        return _POSITION.unpack_from(self._mmap, self._positions_offset + i * _POSITION.size)[0]
+
+    def _find_identifier(self, identifier: str) -> Optional[bytes]:
+        """Get the encoded name for the identifier, which is empty if it has no name, or None if it's missing."""
+        key = str(identifier).encode('utf8')
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self._size:
+            found_identifier, name = self._get_record(low)
+            if found_identifier == key:
+                return name
+
+    def __contains__(self, identifier: str) -> bool:  # noqa: D105
+        return self._find_identifier(identifier) is not None
+
+    def lookup_name(self, identifier: str) -> Optional[str]:
+        """Get the name for the identifier, or None if it's not in the namespace or doesn't have a name."""
+        name = self._find_identifier(identifier)
+        if name:
+            return name.decode('utf8')
+
+    def lookup_identifier(self, name: str) -> Optional[str]:
+        """Get the identifier for the name, or None if it's not in the namespace."""
+        key = str(name).encode('utf8')
+        low, high = 0, self._named_size
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_record(self._get_name_position(middle))[1] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self._named_size:
+            identifier, found_name = self._get_record(self._get_name_position(low))
+            if found_name == key:
+                return identifier.decode('utf8')
+
+    def lookup_names(self, identifiers: Iterable[str]) -> List[Optional[str]]:
+        """Get the names for several identifiers, with None for the ones that aren't in the namespace."""
+        return [self.lookup_name(identifier) for identifier in identifiers]
+
+    def lookup_identifiers(self, names: Iterable[str]) -> List[Optional[str]]:
+        """Get the identifiers for several names, with None for the ones that aren't in the namespace."""
+        return [self.lookup_identifier(name) for name in names]
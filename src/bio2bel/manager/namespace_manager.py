@@ -2,37 +2,71 @@
 
 """Provide abstractions over BEL namespace generation procedures."""
 
+import gzip
+import hashlib
 import json
 import logging
 import os
 import time
 from abc import ABC, abstractmethod
-from typing import Iterable, List, Mapping, Optional, Set, TextIO
+from io import StringIO
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, TextIO, Tuple, Union
 
 import click
+from sqlalchemy import (
+    Column, Index, LargeBinary, MetaData, String, Table, and_, bindparam, cast, exists, func, inspect, literal, or_,
+    select,
+)
 from sqlalchemy.ext.declarative import DeclarativeMeta
+from sqlalchemy.orm import ColumnProperty
+from sqlalchemy.orm.attributes import InstrumentedAttribute
 from tqdm import tqdm
 
 from bel_resources import write_annotation, write_namespace
 from pybel import BELGraph
 from pybel.manager.models import Base, Namespace, NamespaceEntry
+from .abstract_manager import AbstractManager, _iterate_batches
+from .bloom import BloomFilter, screen_terms
 from .cli_manager import CliMixin
 from .connection_manager import ConnectionManager
+from .namespace_index import NamespaceIndex, write_namespace_index
 from ..constants import directory_option
-from ..utils import get_namespace_hash
+from ..models import Action, NamespaceHash, ensure_schema, has_schema
+from ..utils import NamespaceHasher, get_changed_chunks, get_data_dir, get_namespace_hash
 
 __all__ = [
     'Bio2BELMissingNamespaceModelError',
+    'NamespaceUpdate',
     'BELNamespaceManagerMixin',
 ]
 
 logger = logging.getLogger(__name__)
 
+#: How :func:`bel_resources.write_namespace` and :func:`bel_resources.write_annotation` end a file without values
+_EMPTY_VALUES_SECTION = '[Values]\n\n'
+
+#: The collations that compare UTF-8 strings byte by byte, which is the same as by their code points
+_BINARY_COLLATIONS = {
+    'sqlite': 'BINARY',
+    'postgresql': 'C',
+}
+
 
 class Bio2BELMissingNamespaceModelError(TypeError):
     """Raised when the namespace_model class variable is not defined."""
 
 
+class NamespaceUpdate(NamedTuple):
+    """The number of entries affected by updating a namespace."""
+
+    #: The number of entries that were added
+    new: int
+    #: The number of entries whose names, encodings, or flags were changed
+    changed: int
+    #: The number of entries whose identifiers are no longer present, which were deleted if requested
+    removed: int
+
+
 class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
     """A mixin for generating a BEL namespace file and uploading it to the PyBEL database.
 
@@ -145,6 +179,23 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
         ...             name=model.hgnc_symbol,
         ...             namespace=namespace,
         ...         )
+
+    Exporting the namespace only needs the identifier, name, and encoding of each model, so they're queried directly
+    instead of loading whole models when the columns are known. They default to the ``<module name>_id``, ``name``,
+    and ``bel_encoding`` columns unless the corresponding ``_get_*`` method is overridden, and can be set explicitly
+    with ``namespace_identifier_column``, ``namespace_name_column``, and ``namespace_encoding_column``.
+
+    .. code-block:: python
+
+        >>> from sqlalchemy import literal
+        >>>
+        >>> class MyManager(AbstractManager, NamespaceManagerMixin):
+        ...     module_name = 'hgnc'
+        ...     ...
+        ...     namespace_model = HumanGene
+        ...     namespace_identifier_column = HumanGene.hgnc_id
+        ...     namespace_name_column = HumanGene.hgnc_symbol
+        ...     namespace_encoding_column = literal('GRP')
     """
 
     namespace_model: DeclarativeMeta
@@ -161,6 +212,26 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
     identifiers_namespace = None
     identifiers_url = None
 
+    #: Column expressions for the identifier, name, and encoding, so exports only query the columns they need. See
+    #: :meth:`_get_namespace_columns` for their defaults.
+    namespace_identifier_column = None
+    namespace_name_column = None
+    namespace_encoding_column = None
+
+    #: The average number of values in each chunk of the namespace's Merkle hash. See :class:`NamespaceHasher`.
+    namespace_hash_chunk_size: int = 1000
+
+    #: Should a memory-mapped index of the identifiers and names be built after each population? See
+    #: :meth:`lookup_name` and :meth:`lookup_identifier`.
+    namespace_index: bool = False
+
+    #: How many seconds an open index is used before checking if the namespace was populated or dropped again, e.g.,
+    #: by another process. Populating or dropping with this manager closes its index right away.
+    namespace_index_check_interval: float = 60.0
+
+    _namespace_index: Optional[NamespaceIndex] = None
+    _namespace_index_checked: float = 0.0
+
     def __init__(self, *args, **kwargs):  # noqa: D107
         if not hasattr(self, 'namespace_model'):
             raise Bio2BELMissingNamespaceModelError('Class variable `namespace_model` was not defined.')
@@ -168,14 +239,16 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
         super().__init__(*args, **kwargs)
 
         # Ensure that the PyBEL database is ready to go
-        Base.metadata.create_all(self.engine, checkfirst=True)
+        ensure_schema(self.engine, Base.metadata)
 
     @abstractmethod
     def _create_namespace_entry_from_model(self, model, namespace: Namespace) -> NamespaceEntry:
         """Create a PyBEL NamespaceEntry model from a Bio2BEL model.
 
         :param model: The model to convert
-        :param namespace: The PyBEL namespace to add to
+        :param namespace: The PyBEL namespace to add to. This is None when the entries are bulk inserted by
+         :meth:`_make_namespace` and :meth:`_update_namespace`, which only read the entry's columns, so the entry
+         shouldn't depend on it.
         """
 
     @classmethod
@@ -202,14 +275,124 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
         """
         return model.name
 
-    def _iterate_namespace_models(self, **kwargs) -> Iterable:
-        """Return an iterator over the models to be converted to the namespace."""
+    def _iterate_namespace_models(self, batch_size: int = 10000, **kwargs) -> Iterable:
+        """Return an iterator over the models to be converted to the namespace.
+
+        The models are loaded in pages of ``batch_size`` ordered by their primary key. Each page is fetched completely,
+        so no cursor is left open while the models are used, like while :meth:`bulk_load` writes the entries made from
+        them, which SQLite would otherwise block.
+
+        :param batch_size: The number of models to load at a time
+        :param kwargs: Keyword arguments to pass to :func:`tqdm.tqdm`
+        """
         return tqdm(
-            self._get_query(self.namespace_model),
+            _iterate_pages(self._get_query(self.namespace_model), self.namespace_model, batch_size),
             total=self._count_model(self.namespace_model),
             **kwargs
         )
 
+    @classmethod
+    def _get_namespace_columns(cls) -> Optional[List]:
+        """Get the column expressions for the identifier, name, and encoding, or None if any can't be determined.
+
+        Each defaults to the column that the corresponding ``_get_*`` method uses, unless the method is overridden.
+        The name is skipped if this namespace doesn't have names.
+        """
+        identifier_column = cls.namespace_identifier_column
+        if identifier_column is None and _is_inherited(cls, '_get_identifier'):
+            identifier_column = _get_column(cls.namespace_model, f'{cls.module_name}_id')
+
+        name_column = cls.namespace_name_column
+        if name_column is None and _is_inherited(cls, '_get_name'):
+            name_column = _get_column(cls.namespace_model, 'name')
+
+        encoding_column = cls.namespace_encoding_column
+        if encoding_column is None and _is_inherited(cls, '_get_encoding'):
+            encoding_column = _get_column(cls.namespace_model, 'bel_encoding')
+
+        columns = [identifier_column, name_column, encoding_column] if cls.has_names else [
+            identifier_column, encoding_column,
+        ]
+        if any(column is None for column in columns):
+            return
+
+        return columns
+
+    def _iterate_namespace_tuples(self, yield_per: int = 10000, **kwargs) -> Iterable[Tuple[str, Optional[str], str]]:
+        """Iterate over the identifier, name, and encoding of each namespace model.
+
+        If the columns can be determined with :meth:`_get_namespace_columns`, only they are queried and the rows
+        are streamed in batches. Otherwise, whole models are loaded and converted. The name is None if this namespace
+        doesn't have names.
+
+        :param yield_per: The number of rows to fetch at a time
+        :param kwargs: Keyword arguments to pass to :func:`tqdm.tqdm`
+        """
+        columns = self._get_namespace_columns()
+
+        if columns is None:
+            for model in self._iterate_namespace_models(**kwargs):
+                yield (
+                    self._get_identifier(model),
+                    self._get_name(model) if self.has_names else None,
+                    self._get_encoding(model),
+                )
+            return
+
+        query = self.session.query(*columns).yield_per(yield_per)
+
+        if self.has_names:
+            yield from tqdm(query, **kwargs)
+        else:
+            for identifier, encoding in tqdm(query, **kwargs):
+                yield identifier, None, encoding
+
+    def _iterate_sorted_namespace_pairs(
+        self,
+        key: str,
+        *values: str,
+        yield_per: int = 10000,
+        **kwargs
+    ) -> Optional[Iterable[Tuple[str, ...]]]:
+        """Iterate over pairs of two of the identifier, name, and encoding, sorted by the first.
+
+        The pairs are sorted by the database and streamed in batches, so they're never all in memory at once. Like
+        in a dictionary, only the last value is kept if a key appears several times. If more than one value is given,
+        each row has the key followed by all of the values. See :meth:`_get_sorted_namespace_query` for the order.
+
+        :param key: Either "identifier", "name", or "encoding"
+        :param values: Any of "identifier", "name", or "encoding"
+        :param yield_per: The number of rows to fetch at a time
+        :param kwargs: Keyword arguments to pass to :func:`tqdm.tqdm`
+        :return: The sorted pairs, or None if the columns can't be determined with :meth:`_get_namespace_columns`
+        """
+        query = self._get_sorted_namespace_query(key, *values)
+        if query is None:
+            return
+
+        return _iterate_last_values(tqdm(query.yield_per(yield_per), **kwargs))
+
+    def _get_sorted_namespace_query(self, key: str, *values: str):
+        """Get a query for the key and values ordered like the dictionaries built from the namespace models.
+
+        Strings are compared by their code points, like :func:`sorted` does, instead of with the database's collation.
+        Rows with the same key are ordered by the primary key, which is the order the models are iterated in, so the
+        last one is the same one a dictionary would keep.
+
+        :return: The query, or None if the columns can't be determined with :meth:`_get_namespace_columns`
+        """
+        columns = self._get_namespace_columns()
+        if columns is None:
+            return
+
+        keys = ('identifier', 'name', 'encoding') if self.has_names else ('identifier', 'encoding')
+        columns = dict(zip(keys, columns))
+
+        return self.session.query(columns[key], *(columns[value] for value in values)).order_by(
+            _order_by_code_points(columns[key], self.engine.dialect.name),
+            *inspect(self.namespace_model).primary_key,
+        )
+
     @classmethod
     def _get_namespace_name(cls) -> str:
         """Get the nicely formatted name of this namespace."""
@@ -239,8 +422,35 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
             if namespace_entry is not None
         ]
 
+    def _iterate_namespace_entry_rows(self, namespace_id: int) -> Iterable[Dict]:
+        """Iterate over the rows for the namespace entries, without adding any to the session.
+
+        :param namespace_id: The database identifier of the PyBEL namespace the entries belong to
+        """
+        for model in self._iterate_namespace_models():
+            # Don't pass the namespace, otherwise the entry is cascaded into the session through the backref
+            entry = self._create_namespace_entry_from_model(model, namespace=None)
+            if entry is None:
+                continue
+
+            yield dict(
+                name=entry.name,
+                identifier=entry.identifier,
+                encoding=entry.encoding,
+                is_name=entry.is_name,
+                is_annotation=entry.is_annotation,
+                namespace_id=namespace_id,
+            )
+
     def _make_namespace(self) -> Namespace:
-        """Make a namespace."""
+        """Make a namespace.
+
+        The namespace is committed first, then its entries are inserted in batches with
+        :meth:`_insert_namespace_entries`, so they're never all in memory at once. They're built with
+        :meth:`_create_namespace_entry_from_model` without a namespace and never go through the session, so the
+        returned namespace's ``entries`` are loaded from the database when they're used. If inserting them fails, the
+        namespace is removed again.
+        """
         namespace = Namespace(
             name=self._get_namespace_name(),
             keyword=self._get_namespace_keyword(),
@@ -248,17 +458,41 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
             version=str(time.asctime()),
         )
         self.session.add(namespace)
-
-        entries = self._get_namespace_entries(namespace)
-        self.session.add_all(entries)
-
-        t = time.time()
-        logger.info('committing models')
         self.session.commit()
-        logger.info('committed models in %.2f seconds', time.time() - t)
 
+        namespace_id = namespace.id
+        try:
+            self._insert_namespace_entries(self._iterate_namespace_entry_rows(namespace_id))
+        except Exception:
+            logger.exception('failed to insert the entries for %s. removing the namespace', namespace.keyword)
+            self.session.rollback()
+            self._delete_namespace_entries(namespace_id)
+            self.session.delete(namespace)
+            self.session.commit()
+            raise
+
+        self.session.expire(namespace)
         return namespace
 
+    def _insert_namespace_entries(self, rows: Iterable[Dict], batch_size: int = 10000) -> int:
+        """Insert rows into the PyBEL namespace entry table in batches and return how many were inserted.
+
+        This uses :meth:`bio2bel.AbstractManager.bulk_load` if the mixin is used with the abstract manager. Otherwise,
+        each batch goes through :meth:`sqlalchemy.orm.Session.bulk_insert_mappings` and is committed.
+
+        :param rows: Dictionaries of the namespace entry columns to their values
+        :param batch_size: The number of rows to insert at a time
+        """
+        if isinstance(self, AbstractManager):
+            return self.bulk_load(NamespaceEntry, rows, batch_size=batch_size)
+
+        count = 0
+        for batch in _iterate_batches(rows, batch_size):
+            self.session.bulk_insert_mappings(NamespaceEntry, batch)
+            self.session.commit()
+            count += len(batch)
+        return count
+
     @staticmethod
     def _get_old_entry_identifiers(namespace: Namespace) -> Set[NamespaceEntry]:
         """Convert a PyBEL generalized namespace entries to a set.
@@ -269,31 +503,65 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
         """
         return {term.identifier for term in namespace.entries}
 
-    def _update_namespace(self, namespace: Namespace) -> None:
+    def _update_namespace(self, namespace: Namespace, remove: bool = False) -> NamespaceUpdate:
         """Update an already-created namespace.
 
+        The current entries are built with :meth:`_create_namespace_entry_from_model`, like when the namespace was
+        made, and put in a temporary table, then compared to the namespace's entries by identifier in the database.
+
+        If :meth:`_get_old_entry_identifiers` is overridden, the entries whose identifiers aren't in the set it gives
+        are added instead, and nothing is counted as changed or removed.
+
         Note: Only call this if namespace won't be none!
+
+        :param namespace: The namespace to update
+        :param remove: Should the entries whose identifiers are no longer present be deleted? Otherwise, they're
+         only counted.
         """
-        old_entry_identifiers = self._get_old_entry_identifiers(namespace)
-        new_count = 0
-        skip_count = 0
+        t = time.time()
 
-        for model in self._iterate_namespace_models():
-            if self._get_identifier(model) in old_entry_identifiers:
-                continue
+        if not _is_inherited(type(self), '_get_old_entry_identifiers'):
+            update = self._add_new_namespace_entries(namespace)
+            logger.info('updated %s in %.2f seconds. %d new', namespace.keyword, time.time() - t, update.new)
+            return update
+
+        entries = NamespaceEntry.__table__
+        current = _make_current_entries_table()
+
+        with self.engine.begin() as connection:
+            current.create(connection)
+            try:
+                self._fill_current_entries(connection, current, namespace.id)
+                update = _diff_namespace_entries(connection, entries, current, namespace.id, remove=remove)
+            finally:
+                current.drop(connection)
+
+        self.session.expire(namespace)
+        logger.info(
+            'updated %s in %.2f seconds. %d new, %d changed, %d %s',
+            namespace.keyword, time.time() - t, update.new, update.changed, update.removed,
+            'removed' if remove else 'no longer present',
+        )
+        return update
 
-            entry = self._create_namespace_entry_from_model(model, namespace=namespace)
-            if entry is None or entry.name is None:
-                skip_count += 1
-                continue
+    def _fill_current_entries(self, connection, current: Table, namespace_id: int) -> None:
+        """Fill the temporary table with the current entries, built the same way as when the namespace was made."""
+        rows = self._iterate_namespace_entry_rows(namespace_id)
+        for batch in _iterate_batches(rows, 10000):
+            connection.execute(current.insert(), batch)
 
-            new_count += 1
-            self.session.add(entry)
+    def _add_new_namespace_entries(self, namespace: Namespace) -> NamespaceUpdate:
+        """Add the entries whose identifiers aren't in the set from :meth:`_get_old_entry_identifiers`."""
+        old_entry_identifiers = self._get_old_entry_identifiers(namespace)
 
-        t = time.time()
-        logger.info('got %d new entries. skipped %d entries missing names. committing models', new_count, skip_count)
-        self.session.commit()
-        logger.info('committed models in %.2f seconds', time.time() - t)
+        rows = (
+            row
+            for row in self._iterate_namespace_entry_rows(namespace.id)
+            if row['identifier'] not in old_entry_identifiers and row['name'] is not None
+        )
+        new_count = self._insert_namespace_entries(rows)
+        self.session.expire(namespace)
+        return NamespaceUpdate(new=new_count, changed=0, removed=0)
 
     def add_namespace_to_graph(self, graph: BELGraph) -> Namespace:
         """Add this manager's namespace to the graph."""
@@ -331,39 +599,89 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
 
         return namespace
 
-    def drop_bel_namespace(self) -> Optional[Namespace]:
-        """Remove the default namespace if it exists."""
+    def drop_bel_namespace(self, chunk_size: Optional[int] = None) -> Optional[Namespace]:
+        """Remove the default namespace if it exists.
+
+        :param chunk_size: If given, delete the entries in chunks of this many primary keys, each in its own
+         transaction, instead of all at once. Useful for very large namespaces.
+        """
         namespace = self._get_default_namespace()
 
         if namespace is not None:
-            for entry in tqdm(namespace.entries, desc=f'deleting entries in {self._get_namespace_name()}'):
-                self.session.delete(entry)
+            t = time.time()
+            count = self._delete_namespace_entries(namespace.id, chunk_size=chunk_size)
             self.session.delete(namespace)
-
-            logger.info('committing deletions')
             self.session.commit()
+            logger.info('dropped %s and its %d entries in %.2f seconds', namespace.keyword, count, time.time() - t)
             return namespace
 
+    def _delete_namespace_entries(self, namespace_id: int, chunk_size: Optional[int] = None) -> int:
+        """Delete the entries of a namespace without loading them and return how many were deleted.
+
+        :param namespace_id: The database identifier of the PyBEL namespace
+        :param chunk_size: If given, delete the entries in ranges of this many primary keys, committing after each
+        """
+        query = self.session.query(NamespaceEntry).filter(NamespaceEntry.namespace_id == namespace_id)
+
+        if chunk_size is None:
+            count = query.delete(synchronize_session=False)
+            self.session.commit()
+            return count
+
+        low, high = self.session.query(func.min(NamespaceEntry.id), func.max(NamespaceEntry.id)).filter(
+            NamespaceEntry.namespace_id == namespace_id,
+        ).one()
+        if low is None:
+            return 0
+
+        count = 0
+        for start in range(low, high + 1, chunk_size):
+            count += query.filter(NamespaceEntry.id.between(start, start + chunk_size - 1)).delete(
+                synchronize_session=False,
+            )
+            self.session.commit()
+            logger.debug('deleted %d entries from namespace %d', count, namespace_id)
+
+        return count
+
     def write_bel_namespace(self, file: TextIO, use_names: bool = False) -> None:
-        """Write as a BEL namespace file."""
+        """Write as a BEL namespace file.
+
+        The values are streamed in sorted order from the database if the columns can be determined with
+        :meth:`_get_namespace_columns`. Otherwise, they're collected in a dictionary first.
+        """
         if not self.is_populated():
             self.populate()
 
         if use_names and not self.has_names:
             raise ValueError
 
-        values = (
-            self._get_namespace_name_to_encoding(desc='writing names')
-            if use_names else
-            self._get_namespace_identifier_to_encoding(desc='writing identifiers')
-        )
+        key = 'name' if use_names else 'identifier'
+        desc = f'writing {key}s'
+        values = self._iterate_sorted_namespace_pairs(key, 'encoding', desc=desc)
+        if values is None:
+            values = (
+                self._get_namespace_name_to_encoding(desc=desc)
+                if use_names else
+                self._get_namespace_identifier_to_encoding(desc=desc)
+            )
+
+        self._write_bel_namespace_values(file, values)
 
-        write_namespace(
+    def _write_bel_namespace_values(self, file: TextIO, values: Union[Mapping[str, str], Iterable[Tuple[str, str]]]):
+        """Write the values with this namespace's header as a BEL namespace file.
+
+        :param file: A writable file or file-like
+        :param values: Either a dictionary of values to their encodings, or pairs of values and their encodings
+         that are already sorted by value
+        """
+        _write_bel_resource(
+            write_namespace,
+            file,
+            values,
             namespace_name=self._get_namespace_name(),
             namespace_keyword=self._get_namespace_keyword(),
             namespace_query_url=self.identifiers_url,
-            values=values,
-            file=file,
         )
 
     def write_bel_annotation(self, file: TextIO) -> None:
@@ -371,24 +689,57 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
         if not self.is_populated():
             self.populate()
 
-        values = self._get_namespace_name_to_encoding(desc='writing names')
+        values = self._iterate_sorted_namespace_pairs('name', 'encoding', desc='writing names')
+        if values is None:
+            values = self._get_namespace_name_to_encoding(desc='writing names')
 
-        write_annotation(
+        _write_bel_resource(
+            write_annotation,
+            file,
+            values,
             keyword=self._get_namespace_keyword(),
             citation_name=self._get_namespace_name(),
             description='',
-            values=values,
-            file=file,
         )
 
     def write_bel_namespace_mappings(self, file: TextIO, **kwargs) -> None:
         """Write a BEL namespace mapping file."""
-        json.dump(self._get_namespace_identifier_to_name(**kwargs), file, indent=2, sort_keys=True)
+        values = self._iterate_sorted_namespace_pairs('identifier', 'name', **kwargs)
+        if values is None:
+            values = self._get_namespace_identifier_to_name(**kwargs)
+
+        _write_json_object(file, values)
+
+    def write_directory(self, directory: str, compress: bool = False, verify: bool = False) -> bool:
+        """Write a BEL namespace for identifiers, names, name hash, and mappings to the given directory.
+
+        If the columns can be determined with :meth:`_get_namespace_columns`, the files are streamed from two ordered
+        queries: one by identifier for the BEL namespace file and the mapping file, and one by name for the BEL
+        namespace file for names and the hash. They're written next to their final paths first, so they can be
+        discarded if the hash turns out to be unchanged. Otherwise, the namespace models are only iterated once for
+        the hash and all of the files, which are kept in dictionaries.
+
+        :param directory: The directory in which the files are written
+        :param compress: Should the BEL namespace files be compressed with gzip (``.belns.gz``)?
+        :param verify: Should the hash be recomputed instead of using the one stored after the last population?
+        :return: If the files were written. They aren't if the hash is the same as the one already in the directory.
+
+        The hash is compared to the one stored after the last successful population, so checking if anything
+        changed doesn't need to scan the namespace's tables. The namespace's Merkle hash is written next to the hash
+        as ``<module>.belns.merkle``, and the ranges of values that changed since the last time are logged. A Bloom
+        filter of the identifiers and names is written as ``<module>.belns.bloom`` for :meth:`validate_terms`.
+        """
+        if not self.is_populated():
+            self.populate()
 
-    def write_directory(self, directory: str) -> bool:
-        """Write a BEL namespace for identifiers, names, name hash, and mappings to the given directory."""
-        current_md5_hash = self.get_namespace_hash()
+        extension = '.gz' if compress else ''
+        namespace_path = os.path.join(directory, f'{self.module_name}.belns{extension}')
+        names_path = os.path.join(directory, f'{self.module_name}-names.belns{extension}')
+        mapping_path = os.path.join(directory, f'{self.module_name}.belns.mapping')
         md5_hash_path = os.path.join(directory, f'{self.module_name}.belns.md5')
+        merkle_path = os.path.join(directory, f'{self.module_name}.belns.merkle')
+        bloom_path = os.path.join(directory, f'{self.module_name}.belns.bloom')
+        exported = os.path.exists(namespace_path) and os.path.exists(bloom_path)
 
         if not os.path.exists(md5_hash_path):
             old_md5_hash = None
@@ -396,53 +747,413 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
             with open(md5_hash_path) as file:
                 old_md5_hash = file.read().strip()
 
-        if old_md5_hash == current_md5_hash:
+        stored_merkle = None if verify else self.get_stored_namespace_merkle()
+        if stored_merkle is not None and old_md5_hash == stored_merkle['hash'] and exported:
+            return False
+
+        paths = [namespace_path, names_path, mapping_path] if self.has_names else [namespace_path]
+        temp_paths = {}
+
+        desc = f'exporting {self._get_namespace_name()}'
+        if self._get_namespace_columns() is not None:
+            if stored_merkle is None:
+                count = self._count_model(self.namespace_model)
+                hasher = NamespaceHasher(chunk_size=self.namespace_hash_chunk_size)
+            else:
+                count = sum(chunk['size'] for chunk in stored_merkle['chunks'])
+                hasher = None
+            bloom = BloomFilter.for_capacity(2 * count if self.has_names else count)
+
+            temp_paths = {path: f'{path}.tmp' for path in paths}
+            try:
+                self._write_namespace_files_streamed(
+                    namespace_path=temp_paths[namespace_path],
+                    names_path=temp_paths.get(names_path),
+                    mapping_path=temp_paths.get(mapping_path),
+                    compress=compress,
+                    bloom=bloom,
+                    hasher=hasher,
+                    desc=desc,
+                )
+            except Exception:
+                _remove_files(temp_paths.values())
+                raise
+
+            merkle = stored_merkle or hasher.to_json()
+        else:
+            identifier_to_encoding, name_to_encoding, identifier_to_name = self._get_namespace_values(desc=desc)
+            merkle = stored_merkle or NamespaceHasher(chunk_size=self.namespace_hash_chunk_size).update_all(
+                sorted((name_to_encoding if self.has_names else identifier_to_encoding).items())
+            ).to_json()
+
+        if stored_merkle is None:
+            self._store_namespace_merkle(merkle)
+
+        current_md5_hash = merkle['hash']
+        if old_md5_hash == current_md5_hash and exported:
+            _remove_files(temp_paths.values())
             return False
 
+        if os.path.exists(merkle_path):
+            with open(merkle_path) as file:
+                old_merkle = json.load(file)
+        else:
+            old_merkle = None
+
+        changed_chunks = get_changed_chunks(old_merkle, merkle)
+        logger.info(
+            '%s changed in %d of %d chunks: %s', self.module_name, len(changed_chunks), len(merkle['chunks']),
+            ', '.join(f'{first}..{last}' for first, last in changed_chunks[:10]),
+        )
+
+        with open(merkle_path, 'w') as file:
+            json.dump(merkle, file, indent=2)
+
         with open(md5_hash_path, 'w') as file:
             print(current_md5_hash, file=file)
 
-        with open(os.path.join(directory, f'{self.module_name}.belns'), 'w') as file:
-            self.write_bel_namespace(file, use_names=False)
+        if temp_paths:
+            for path, temp_path in temp_paths.items():
+                os.replace(temp_path, path)
+        else:
+            count = sum(chunk['size'] for chunk in merkle['chunks'])
+            bloom = BloomFilter.for_capacity(2 * count if self.has_names else count)
+            bloom.update(identifier_to_encoding)
+            bloom.update(name_to_encoding)
 
-        if self.has_names:
-            with open(os.path.join(directory, f'{self.module_name}-names.belns'), 'w') as file:
-                self.write_bel_namespace(file, use_names=True)
+            with _open_text(namespace_path, compress) as file:
+                self._write_bel_namespace_values(file, identifier_to_encoding)
+
+            if self.has_names:
+                with _open_text(names_path, compress) as file:
+                    self._write_bel_namespace_values(file, name_to_encoding)
 
-            with open(os.path.join(directory, f'{self.module_name}.belns.mapping'), 'w') as file:
-                self.write_bel_namespace_mappings(file, desc='writing mapping')
+                with open(mapping_path, 'w') as file:
+                    _write_json_object(file, identifier_to_name)
+
+        bloom.to_file(bloom_path)
 
         return True
 
+    def _write_namespace_files_streamed(
+        self,
+        namespace_path: str,
+        names_path: Optional[str],
+        mapping_path: Optional[str],
+        compress: bool,
+        bloom: BloomFilter,
+        hasher: Optional[NamespaceHasher] = None,
+        **kwargs
+    ) -> None:
+        """Write the namespace files for :meth:`write_directory` from one query ordered by identifier and one by name.
+
+        The rows ordered by identifier are written to the BEL namespace file and the mapping file at the same time.
+        The identifiers and names are added to the Bloom filter while they're written. If a hasher is given, the
+        values from :meth:`_iterate_sorted_hash_items` are added to it while they're written too.
+
+        :param namespace_path: The path of the BEL namespace file for identifiers
+        :param names_path: The path of the BEL namespace file for names. Not used if the namespace doesn't have names.
+        :param mapping_path: The path of the mapping file. Not used if the namespace doesn't have names.
+        :param compress: Should the BEL namespace files be compressed with gzip?
+        :param bloom: The Bloom filter for the identifiers and names
+        :param hasher: The hasher for the namespace's values, if its hash isn't known yet
+        :param kwargs: Keyword arguments to pass to :func:`tqdm.tqdm`
+        """
+        if not self.has_names:
+            identifier_to_encoding = self._iterate_sorted_namespace_pairs('identifier', 'encoding', **kwargs)
+            if hasher is not None:
+                identifier_to_encoding = _iterate_hashing(hasher, identifier_to_encoding)
+
+            with _open_text(namespace_path, compress) as file:
+                self._write_bel_namespace_values(file, _iterate_adding_keys(bloom, identifier_to_encoding))
+            return
+
+        rows = self._iterate_sorted_namespace_pairs('identifier', 'name', 'encoding', **kwargs)
+        with open(mapping_path, 'w') as mapping_file, _open_text(namespace_path, compress) as file:
+            identifier_to_encoding = (
+                (identifier, encoding)
+                for identifier, _, encoding in _iterate_writing_json_object(mapping_file, rows)
+            )
+            self._write_bel_namespace_values(file, _iterate_adding_keys(bloom, identifier_to_encoding))
+
+        name_to_encoding = self._iterate_sorted_namespace_pairs('name', 'encoding', **kwargs)
+        if hasher is not None:
+            name_to_encoding = _iterate_hashing(hasher, name_to_encoding)
+
+        with _open_text(names_path, compress) as file:
+            self._write_bel_namespace_values(file, _iterate_adding_keys(bloom, name_to_encoding))
+
+    def _get_namespace_values(self, **kwargs) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
+        """Get the identifier to encoding, name to encoding, and identifier to name dictionaries in a single pass.
+
+        The last two are empty if this namespace doesn't have names.
+        """
+        identifier_to_encoding, name_to_encoding, identifier_to_name = {}, {}, {}
+
+        for identifier, name, encoding in self._iterate_namespace_tuples(**kwargs):
+            identifier_to_encoding[identifier] = encoding
+
+            if self.has_names:
+                name_to_encoding[name] = encoding
+                identifier_to_name[identifier] = name
+
+        return identifier_to_encoding, name_to_encoding, identifier_to_name
+
     def _get_namespace_name_to_encoding(self, **kwargs) -> Mapping[str, str]:
         return {
-            self._get_name(model): self._get_encoding(model)
-            for model in self._iterate_namespace_models(**kwargs)
+            name: encoding
+            for _, name, encoding in self._iterate_namespace_tuples(**kwargs)
         }
 
     def _get_namespace_identifier_to_encoding(self, **kwargs) -> Mapping[str, str]:
         return {
-            self._get_identifier(model): self._get_encoding(model)
-            for model in self._iterate_namespace_models(**kwargs)
+            identifier: encoding
+            for identifier, _, encoding in self._iterate_namespace_tuples(**kwargs)
         }
 
     def _get_namespace_identifier_to_name(self, **kwargs) -> Mapping[str, str]:
         return {
-            self._get_identifier(model): self._get_name(model)
-            for model in self._iterate_namespace_models(**kwargs)
+            identifier: name
+            for identifier, name, _ in self._iterate_namespace_tuples(**kwargs)
         }
 
     def get_namespace_hash(self, hash_fn=None) -> str:
         """Get the namespace hash.
 
-        Defaults to MD5.
+        Defaults to MD5. The values are hashed in sorted order, so the hash only changes when the values do.
         """
-        if self.has_names:
-            items = self._get_namespace_name_to_encoding(desc='getting hash').items()
+        return get_namespace_hash(self._iterate_sorted_hash_items(desc='getting hash'), hash_function=hash_fn)
+
+    def get_namespace_merkle(self, hash_fn=None) -> Dict:
+        """Get the namespace hash, the root hash of its chunks, and the chunks.
+
+        See :class:`bio2bel.utils.NamespaceHasher`.
+        """
+        hasher = NamespaceHasher(chunk_size=self.namespace_hash_chunk_size, hash_function=hash_fn)
+        return hasher.update_all(self._iterate_sorted_hash_items(desc='getting hash')).to_json()
+
+    def get_stored_namespace_merkle(self) -> Optional[Dict]:
+        """Get the hash, root hash, and chunks stored after the last successful population.
+
+        :return: The same as :meth:`get_namespace_merkle` gave after the population, or None if the resource hasn't
+         been populated, was dropped since, or no hash was stored
+        """
+        action = Action.get_current_populate(self.module_name, session=self.session)
+        if action is None or action.namespace_hash is None:
+            return
+
+        return action.namespace_hash.merkle
+
+    def _store_namespace_merkle(self, merkle: Mapping) -> None:
+        """Store the hash with the last successful population, if it's missing or different."""
+        action = Action.get_current_populate(self.module_name, session=self.session)
+        if action is None:
+            return
+
+        if action.namespace_hash is not None:
+            if action.namespace_hash.hash == merkle['hash']:
+                return
+            logger.warning('%s changed since it was last populated. Storing its new hash', self.module_name)
+
+        NamespaceHash.store(action, merkle, session=self.session)
+
+    def _store_populate(self) -> Action:
+        action = super()._store_populate()
+        try:
+            NamespaceHash.store(action, self.get_namespace_merkle(), session=self.session)
+        except Exception:
+            logger.exception('could not hash %s. It will be hashed when it is exported', self.module_name)
+            self.session.rollback()
+
+        if self.namespace_index:
+            try:
+                self.build_namespace_index()
+            except Exception:
+                logger.exception('could not index %s. It will be indexed when it is looked up', self.module_name)
         else:
-            items = self._get_namespace_identifier_to_encoding(desc='getting hash').items()
+            self._close_namespace_index()
+
+        return action
+
+    def _store_drop(self) -> Action:
+        action = super()._store_drop()
+        self._remove_namespace_index()
+        return action
 
-        return get_namespace_hash(items, hash_function=hash_fn)
+    def _get_namespace_index_path(self) -> str:
+        """Get the path of the namespace's index file in its data directory.
+
+        The path includes a hash of the connection, so managers for different databases don't share an index.
+        """
+        connection_hash = hashlib.md5(str(self.engine.url).encode('utf8')).hexdigest()[:8]
+        return os.path.join(get_data_dir(self.module_name), f'{self.module_name}.{connection_hash}.belns.index')
+
+    def _get_namespace_index_key(self) -> str:
+        """Get a key for the current contents of the namespace, from its last population and its stored hash.
+
+        It's empty if the resource hasn't been populated since it was last dropped.
+        """
+        action = Action.get_current_populate(self.module_name, session=self.session)
+        if action is None:
+            return ''
+        if action.namespace_hash is None:
+            return str(action.id)
+        return f'{action.id}:{action.namespace_hash.hash}'
+
+    def _close_namespace_index(self) -> None:
+        if self._namespace_index is not None:
+            self._namespace_index.close()
+            self._namespace_index = None
+
+    def _remove_namespace_index(self) -> None:
+        """Close the namespace's index and delete its file, if it exists."""
+        self._close_namespace_index()
+        path = self._get_namespace_index_path()
+        if os.path.exists(path):
+            logger.info('removing the index of %s at %s', self.module_name, path)
+            os.remove(path)
+
+    def build_namespace_index(self, path: Optional[str] = None) -> str:
+        """Build a memory-mapped index of the identifiers and names of the namespace and return its path.
+
+        If the namespace doesn't have names, its identifiers are used as their own names. If the tables don't exist,
+        the index is empty.
+
+        :param path: The path of the index file. Defaults to ``<module>.<connection hash>.belns.index`` in the
+         module's data directory.
+        """
+        if path is None:
+            path = self._get_namespace_index_path()
+
+        if has_schema(self.engine, self._metadata):
+            pairs = (
+                (identifier, name if self.has_names else identifier)
+                for identifier, name, _ in self._iterate_namespace_tuples(
+                    desc=f'indexing {self._get_namespace_name()}',
+                )
+            )
+        else:
+            pairs = ()
+
+        write_namespace_index(path, pairs, key=self._get_namespace_index_key())
+        self._close_namespace_index()
+        return path
+
+    def open_namespace_index(self, path: Optional[str] = None) -> NamespaceIndex:
+        """Open the namespace's index, building it first if it doesn't exist or is stale.
+
+        The index is stale if the resource was populated or dropped since it was built, or if its hash changed.
+        Opening the index only reads its header, and its pages are shared by all processes that open it.
+
+        :param path: The path of the index file. Defaults to ``<module>.<connection hash>.belns.index`` in the
+         module's data directory.
+        """
+        if path is None:
+            path = self._get_namespace_index_path()
+
+        key = self._get_namespace_index_key()
+
+        if os.path.exists(path):
+            index = NamespaceIndex(path)
+            if index.key == key:
+                return index
+            logger.info('the index of %s is stale. Rebuilding it', self.module_name)
+            index.close()
+
+        self.build_namespace_index(path)
+        return NamespaceIndex(path)
+
+    def _get_namespace_index(self) -> NamespaceIndex:
+        """Get the open index, only checking if it's stale every :data:`namespace_index_check_interval` seconds."""
+        now = time.monotonic()
+        due = self.namespace_index_check_interval <= now - self._namespace_index_checked
+        if self._namespace_index is not None and due:
+            if self._namespace_index.key != self._get_namespace_index_key():
+                self._close_namespace_index()
+            else:
+                self._namespace_index_checked = now
+
+        if self._namespace_index is None:
+            self._namespace_index = self.open_namespace_index()
+            self._namespace_index_checked = now
+
+        return self._namespace_index
+
+    def lookup_name(self, identifier: str) -> Optional[str]:
+        """Get the name for the identifier from the namespace's index, or None if it's not in the namespace."""
+        return self._get_namespace_index().lookup_name(identifier)
+
+    def lookup_identifier(self, name: str) -> Optional[str]:
+        """Get the identifier for the name from the namespace's index, or None if it's not in the namespace."""
+        return self._get_namespace_index().lookup_identifier(name)
+
+    def lookup_names(self, identifiers: Iterable[str]) -> List[Optional[str]]:
+        """Get the names for several identifiers from the namespace's index."""
+        return self._get_namespace_index().lookup_names(identifiers)
+
+    def lookup_identifiers(self, names: Iterable[str]) -> List[Optional[str]]:
+        """Get the identifiers for several names from the namespace's index."""
+        return self._get_namespace_index().lookup_identifiers(names)
+
+    def get_namespace_bloom(self, directory: Optional[str] = None) -> BloomFilter:
+        """Get a Bloom filter of the identifiers and names of the namespace.
+
+        :param directory: A directory :meth:`write_directory` wrote to. If it has a ``<module>.belns.bloom`` file,
+         it's read from there. Otherwise, the Bloom filter is built from the database.
+        """
+        if directory is not None:
+            path = os.path.join(directory, f'{self.module_name}.belns.bloom')
+            if os.path.exists(path):
+                return BloomFilter.from_file(path)
+
+        count = self._count_model(self.namespace_model)
+        bloom = BloomFilter.for_capacity(2 * count if self.has_names else count)
+        for identifier, name, _ in self._iterate_namespace_tuples(desc=f'filtering {self._get_namespace_name()}'):
+            bloom.add(identifier)
+            if name:
+                bloom.add(name)
+        return bloom
+
+    def validate_terms(self, terms: Iterable[str], bloom: Optional[BloomFilter] = None) -> List[str]:
+        """Get the terms that are neither identifiers nor names in this namespace.
+
+        The terms are screened with the Bloom filter first, so only the ones that might be in the namespace are
+        looked up in the namespace's index.
+
+        :param terms: The terms to validate
+        :param bloom: A Bloom filter from :meth:`get_namespace_bloom`. Defaults to building one from the database.
+        :return: The invalid terms, in the order they were given
+        """
+        if bloom is None:
+            bloom = self.get_namespace_bloom()
+
+        terms = list(terms)
+        missing, candidates = screen_terms(bloom, terms)
+        logger.debug('%d of %d terms need to be checked in %s', len(candidates), len(terms), self.module_name)
+
+        invalid = set(missing)
+        index = self._get_namespace_index()
+        invalid.update(
+            term
+            for term in candidates
+            if term not in index and index.lookup_identifier(term) is None
+        )
+        return [term for term in terms if term in invalid]
+
+    def _iterate_sorted_hash_items(self, **kwargs) -> Iterable[Tuple[str, str]]:
+        """Iterate over the names, or identifiers if this namespace doesn't have names, and encodings in order.
+
+        They're streamed in sorted order from the database if the columns can be determined with
+        :meth:`_get_namespace_columns`. Otherwise, they're collected in a dictionary and sorted.
+        """
+        key = 'name' if self.has_names else 'identifier'
+        items = self._iterate_sorted_namespace_pairs(key, 'encoding', **kwargs)
+        if items is not None:
+            return items
+
+        if self.has_names:
+            return sorted(self._get_namespace_name_to_encoding(**kwargs).items())
+        return sorted(self._get_namespace_identifier_to_encoding(**kwargs).items())
 
     @staticmethod
     def _cli_add_to_bel_namespace(main: click.Group) -> click.Group:
@@ -488,6 +1199,238 @@ class BELNamespaceManagerMixin(ABC, ConnectionManager, CliMixin):
         return main
 
 
+def _order_by_code_points(column, dialect_name: str):
+    """Get an expression for ordering by the column that compares strings by their code points."""
+    if not isinstance(getattr(column, 'type', None), String):
+        return column
+    if dialect_name == 'mysql':
+        return cast(column, LargeBinary)
+    if dialect_name in _BINARY_COLLATIONS:
+        return column.collate(_BINARY_COLLATIONS[dialect_name])
+    return column
+
+
+def _iterate_last_values(rows: Iterable[Tuple[str, ...]]) -> Iterable[Tuple[str, ...]]:
+    """Iterate over rows sorted by their first value, keeping only the last row for each like a dictionary would."""
+    last_row = None
+    for row in rows:
+        if last_row is not None and row[0] != last_row[0]:
+            yield tuple(last_row)
+        last_row = row
+
+    if last_row is not None:
+        yield tuple(last_row)
+
+
+def _iterate_adding_keys(bloom: BloomFilter, pairs: Iterable[Tuple[str, str]]) -> Iterable[Tuple[str, str]]:
+    """Iterate over the pairs while adding their keys to the Bloom filter."""
+    for key, value in pairs:
+        bloom.add(key)
+        yield key, value
+
+
+def _iterate_hashing(hasher: NamespaceHasher, pairs: Iterable[Tuple[str, str]]) -> Iterable[Tuple[str, str]]:
+    """Iterate over the pairs while adding them to the hasher."""
+    for key, value in pairs:
+        hasher.update(key, value)
+        yield key, value
+
+
+def _write_bel_resource(
+    write_function: Callable,
+    file: TextIO,
+    values: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
+    delimiter: str = '|',
+    **kwargs
+) -> None:
+    """Write a BEL resource file with :func:`bel_resources.write_namespace` or :func:`bel_resources.write_annotation`.
+
+    A dictionary is passed through as-is. Otherwise, the values must already be sorted like :func:`sorted` would, and
+    the body is written line by line after the header the same way :func:`bel_resources.write_utils.iter_body` does,
+    instead of being sorted in memory. If the header doesn't end with an empty ``[Values]`` section like expected,
+    the values are collected in a dictionary and passed through instead.
+    """
+    if isinstance(values, Mapping):
+        write_function(values=values, file=file, delimiter=delimiter, **kwargs)
+        return
+
+    header = StringIO()
+    write_function(values=(), file=header, delimiter=delimiter, **kwargs)
+    header = header.getvalue()
+    if not header.endswith(_EMPTY_VALUES_SECTION):
+        logger.warning('unexpected BEL resource header from %s. Writing from a dictionary', write_function.__name__)
+        write_function(values=dict(values), file=file, delimiter=delimiter, **kwargs)
+        return
+
+    file.write(header[:-len(_EMPTY_VALUES_SECTION)])
+    print('[Values]', file=file)
+
+    for key, encoding in values:
+        key = str(key).strip() if key else ''
+        if key:
+            print(f'{key}{delimiter}{"".join(sorted(encoding))}', file=file)
+
+    print(file=file)
+
+
+def _write_json_object(file: TextIO, values: Union[Mapping[str, str], Iterable[Tuple[str, str]]]) -> None:
+    """Write a JSON object like :func:`json.dump` with ``indent=2`` and ``sort_keys=True``.
+
+    If the values aren't a dictionary, they must already be sorted and are written one at a time.
+    """
+    if isinstance(values, Mapping):
+        json.dump(values, file, indent=2, sort_keys=True)
+        return
+
+    for _ in _iterate_writing_json_object(file, values):
+        pass
+
+
+def _iterate_writing_json_object(file: TextIO, rows: Iterable[Tuple[str, ...]]) -> Iterable[Tuple[str, ...]]:
+    """Iterate over the rows while writing their first two values as the keys and values of a JSON object.
+
+    The object is written like :func:`_write_json_object` and is only finished once all of the rows are consumed.
+    """
+    file.write('{')
+    separator = '\n  '
+    for row in rows:
+        file.write(f'{separator}{json.dumps(row[0])}: {json.dumps(row[1])}')
+        separator = ',\n  '
+        yield row
+
+    file.write('}' if separator == '\n  ' else '\n}')
+
+
+def _remove_files(paths: Iterable[str]) -> None:
+    """Remove the files that exist."""
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _open_text(path: str, compress: bool = False) -> TextIO:
+    """Open a text file for writing, compressed with gzip if requested."""
+    if compress:
+        return gzip.open(path, 'wt')
+    return open(path, 'w')
+
+
+def _make_current_entries_table() -> Table:
+    """Make a temporary table for the current identifiers, names, and encodings of a namespace."""
+    entries = NamespaceEntry.__table__
+    table = Table(
+        'bio2bel_current_entries',
+        MetaData(),
+        *[
+            Column(key, entries.c[key].type)
+            for key in ('identifier', 'name', 'encoding', 'is_name', 'is_annotation')
+        ],
+        Column('namespace_id', entries.c.namespace_id.type),
+        prefixes=['TEMPORARY'],
+    )
+    Index('ix_bio2bel_current_entries_identifier', table.c.identifier)
+    return table
+
+
+def _diff_namespace_entries(
+    connection,
+    entries: Table,
+    current: Table,
+    namespace_id: int,
+    remove: bool = False,
+) -> NamespaceUpdate:
+    """Insert the new entries, update the changed entries, and count or delete the entries no longer present."""
+    existing = exists().where(and_(
+        entries.c.namespace_id == namespace_id,
+        entries.c.identifier == current.c.identifier,
+    ))
+    result = connection.execute(entries.insert().from_select(
+        ['name', 'identifier', 'encoding', 'is_name', 'is_annotation', 'namespace_id'],
+        select([
+            current.c.name,
+            current.c.identifier,
+            current.c.encoding,
+            current.c.is_name,
+            current.c.is_annotation,
+            literal(namespace_id),
+        ]).where(and_(current.c.name.isnot(None), ~existing)),
+    ))
+    new_count = result.rowcount
+
+    keys = ('name', 'encoding', 'is_name', 'is_annotation')
+    changed_rows = [
+        dict(_id=row[0], **{f'_{key}': value for key, value in zip(keys, row[1:])})
+        for row in connection.execute(
+            select([entries.c.id, *(current.c[key] for key in keys)]).where(and_(
+                entries.c.namespace_id == namespace_id,
+                entries.c.identifier == current.c.identifier,
+                current.c.name.isnot(None),
+                or_(*(entries.c[key].is_distinct_from(current.c[key]) for key in keys)),
+            ))
+        )
+    ]
+    if changed_rows:
+        connection.execute(
+            entries.update().where(entries.c.id == bindparam('_id')).values(
+                **{key: bindparam(f'_{key}') for key in keys}
+            ),
+            changed_rows,
+        )
+
+    missing = and_(
+        entries.c.namespace_id == namespace_id,
+        ~exists().where(current.c.identifier == entries.c.identifier),
+    )
+    if remove:
+        removed_count = connection.execute(entries.delete().where(missing)).rowcount
+    else:
+        removed_count = connection.execute(select([func.count()]).select_from(entries).where(missing)).scalar()
+
+    return NamespaceUpdate(new=new_count, changed=len(changed_rows), removed=removed_count)
+
+
+def _iterate_pages(query, model: DeclarativeMeta, batch_size: int) -> Iterable:
+    """Iterate over the results of a query for the model in pages ordered by its primary key.
+
+    Pages after the first are found with the last primary key of the previous page if the model has a single primary
+    key column, and with an offset otherwise.
+    """
+    mapper = inspect(model)
+    primary_key = mapper.primary_key
+    query = query.order_by(*primary_key)
+
+    last, offset = None, 0
+    while True:
+        if len(primary_key) != 1:
+            page = query.offset(offset).limit(batch_size).all()
+        elif last is None:
+            page = query.limit(batch_size).all()
+        else:
+            page = query.filter(primary_key[0] > last).limit(batch_size).all()
+
+        yield from page
+        if len(page) < batch_size:
+            return
+
+        last = mapper.primary_key_from_instance(page[-1])[0]
+        offset += batch_size
+
+
+def _is_inherited(cls, name: str) -> bool:
+    """Check if the class uses the method from :class:`BELNamespaceManagerMixin` instead of overriding it."""
+    for base in cls.__mro__:
+        if name in vars(base):
+            return base is BELNamespaceManagerMixin
+    return False
+
+
+def _get_column(model: DeclarativeMeta, key: str) -> Optional[InstrumentedAttribute]:
+    """Get the column attribute of the model with the given key, if it exists."""
+    attribute = getattr(model, key, None)
+    if isinstance(attribute, InstrumentedAttribute) and isinstance(attribute.property, ColumnProperty):
+        return attribute
+
+
 def add_cli_to_bel_namespace(main: click.Group) -> click.Group:  # noqa: D202
     """Add a ``upload_bel_namespace`` command to main :mod:`click` function."""
 
@@ -506,10 +1449,11 @@ def add_cli_clear_bel_namespace(main: click.Group) -> click.Group:  # noqa: D202
     """Add a ``clear_bel_namespace`` command to main :mod:`click` function."""
 
     @main.command()
+    @click.option('--chunk-size', type=int, help='Delete the entries in chunks of this many')
     @click.pass_obj
-    def drop(manager: BELNamespaceManagerMixin):
+    def drop(manager: BELNamespaceManagerMixin, chunk_size):
         """Clear names/identifiers to terminology store."""
-        namespace = manager.drop_bel_namespace()
+        namespace = manager.drop_bel_namespace(chunk_size=chunk_size)
         if namespace:
             click.echo(f'namespace {namespace} was cleared')
 
@@ -521,10 +1465,12 @@ def add_cli_write_bel_namespace(main: click.Group) -> click.Group:  # noqa: D202
 
     @main.command()
     @directory_option
+    @click.option('--gzip', 'compress', is_flag=True, help='Compress the BEL namespace files')
+    @click.option('--verify', is_flag=True, help='Recompute the hash instead of using the one stored after populating')
     @click.pass_obj
-    def write(manager: BELNamespaceManagerMixin, directory: str):
+    def write(manager: BELNamespaceManagerMixin, directory: str, compress: bool, verify: bool):
         """Write a BEL namespace names/identifiers to terminology store."""
-        manager.write_directory(directory)
+        manager.write_directory(directory, compress=compress, verify=verify)
 
     return main
 
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+"""Utilities for populating staging copies of tables then swapping them in.
+
+The staging copies live in a separate schema. For SQLite, that's a database file next to the main one that is
+attached to each connection. For other databases, it's a schema in the same database. SQLAlchemy's
+``schema_translate_map`` execution option redirects all statements for the declarative base's tables to the staging
+schema, so a manager's populate function can be used as-is.
+
+The swap deletes the rows from the real tables and copies the rows from the staging tables in a single transaction,
+so readers see either the old contents or the new contents, but never empty or partially filled tables.
+"""
+
+import logging
+import os
+import re
+from typing import Optional
+
+from sqlalchemy import Column, MetaData, Table, create_engine, event, func, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateSchema
+
+__all__ = [
+    'get_staging_schema',
+    'build_staging_engine',
+    'swap_staging_tables',
+    'drop_staging',
+]
+
+logger = logging.getLogger(__name__)
+
+
+def get_staging_schema(module_name: str) -> str:
+    """Get the name of the staging schema for the given module."""
+    return 'bio2bel_staging_{}'.format(re.sub(r'\W', '_', module_name))
+
+
+def _get_staging_path(engine: Engine, schema: str) -> Optional[str]:
+    """Get the path of the staging database file if the engine connects to SQLite."""
+    if engine.url.get_backend_name() != 'sqlite':
+        return
+
+    if engine.url.database in {None, '', ':memory:'}:
+        raise ValueError('can not stage the tables of an in-memory SQLite database')
+
+    return f'{engine.url.database}.{schema}'
+
+
+def build_staging_engine(engine: Engine, schema: str) -> Engine:
+    """Build an engine whose statements go to the staging schema.
+
+    :param engine: The engine for the real tables
+    :param schema: The name of the staging schema
+    """
+    staging_engine = create_engine(engine.url)
+    path = _get_staging_path(engine, schema)
+
+    if path is not None:
+        attach = _get_attach_statement(engine, schema)
+
+        @event.listens_for(staging_engine, 'connect')
+        def attach_staging_database(dbapi_connection, connection_record):
+            """Attach the staging database to a new connection."""
+            dbapi_connection.execute(attach, (path,))
+
+    elif schema not in inspect(staging_engine).get_schema_names():
+        with staging_engine.begin() as connection:
+            connection.execute(CreateSchema(schema))
+
+    return staging_engine.execution_options(schema_translate_map={None: schema})
+
+
+def swap_staging_tables(engine: Engine, metadata: MetaData, schema: str) -> None:
+    """Replace the contents of the real tables with the contents of the staging tables in one transaction.
+
+    :param engine: The engine for the real tables
+    :param metadata: The metadata describing the tables to swap
+    :param schema: The name of the staging schema
+    """
+    path = _get_staging_path(engine, schema)
+
+    with engine.connect() as connection:
+        if path is not None:
+            connection.execute(_get_attach_statement(engine, schema), (path,))
+
+        try:
+            with connection.begin():
+                for table in reversed(metadata.sorted_tables):
+                    connection.execute(table.delete())
+
+                for table in metadata.sorted_tables:
+                    staging_table = Table(
+                        table.name,
+                        MetaData(),
+                        *[Column(column.name, column.type) for column in table.columns],
+                        schema=schema,
+                    )
+                    connection.execute(table.insert().from_select(
+                        [column.name for column in table.columns],
+                        select([staging_table]),
+                    ))
+                    logger.debug('swapped in %s', table.name)
+
+                if engine.url.get_backend_name() == 'postgresql':
+                    _reset_sequences(connection, metadata)
+        finally:
+            if path is not None:
+                connection.execute(f'DETACH DATABASE {engine.dialect.identifier_preparer.quote(schema)}')
+
+
+def _get_attach_statement(engine: Engine, schema: str) -> str:
+    """Get the statement for attaching the staging database on SQLite, with the path of its file as a parameter."""
+    return f'ATTACH DATABASE ? AS {engine.dialect.identifier_preparer.quote(schema)}'
+
+
+def _reset_sequences(connection, metadata: MetaData) -> None:
+    """Reset the sequences for the primary keys of the tables, since the copied rows already have their keys.
+
+    ``pg_get_serial_sequence`` parses the table name like an identifier in SQL, so it gets the quoted name, but takes
+    the column name as it is.
+    """
+    preparer = connection.dialect.identifier_preparer
+    for table in metadata.sorted_tables:
+        primary_key_columns = list(table.primary_key.columns)
+        if len(primary_key_columns) != 1 or primary_key_columns[0].autoincrement is False:
+            continue
+        column = primary_key_columns[0]
+        sequence = func.pg_get_serial_sequence(preparer.format_table(table), column.name)
+        connection.execute(select([func.setval(sequence, func.coalesce(func.max(column), 1))]))
+
+
+def drop_staging(staging_engine: Engine, *metadatas: MetaData) -> None:
+    """Drop the staging tables and remove the staging database file if the engine connects to SQLite.
+
+    :param staging_engine: An engine built with :func:`build_staging_engine`
+    :param metadatas: The metadata describing the staging tables
+    """
+    for metadata in metadatas:
+        metadata.drop_all(staging_engine)
+
+    staging_engine.dispose()
+
+    schema = staging_engine.get_execution_options()['schema_translate_map'][None]
+    path = _get_staging_path(staging_engine, schema)
+    if path is not None and os.path.exists(path):
+        os.remove(path)
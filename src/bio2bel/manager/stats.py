@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""Utilities for recording how long a population took, how many rows it inserted, and how much memory it used.
+
+The statistics are stored with the population's action as a :class:`bio2bel.models.ActionStats`.
+"""
+
+import logging
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .streaming import get_rss
+
+__all__ = [
+    'PopulateRecorder',
+]
+
+logger = logging.getLogger(__name__)
+
+
+class PopulateRecorder:
+    """Records the statistics of a population.
+
+    The peak memory is the high-water mark of :mod:`tracemalloc` if it's tracing. Otherwise, the resident memory of
+    the process is sampled in a background thread until :meth:`close` is called, so memory used before the population
+    started doesn't count towards it.
+    """
+
+    def __init__(self, table_names: Iterable[str], sample_interval: float = 0.1) -> None:
+        """Start recording.
+
+        :param table_names: The names of the tables whose inserted rows are counted
+        :param sample_interval: The number of seconds between samples of the resident memory
+        """
+        self.table_names = set(table_names)
+        self.start = time.time()
+
+        #: The number of rows inserted into each table
+        self.rows = Counter()
+        #: The number of seconds spent on each named stage
+        self.stages: Dict[str, float] = {}
+        #: The highest resident memory sampled so far, in bytes, or None if it can't be measured
+        self.peak_rss = get_rss()
+
+        self._stop_sampling = threading.Event()
+        self._sampler = None
+
+        if tracemalloc.is_tracing():
+            if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+                tracemalloc.reset_peak()
+        elif self.peak_rss is not None:
+            self._sampler = threading.Thread(target=self._sample_rss, args=(sample_interval,), daemon=True)
+            self._sampler.start()
+
+    def _sample_rss(self, interval: float) -> None:
+        while not self._stop_sampling.wait(interval):
+            self._update_peak_rss()
+
+    def _update_peak_rss(self) -> None:
+        rss = get_rss()
+        if rss is not None and (self.peak_rss is None or self.peak_rss < rss):
+            self.peak_rss = rss
+
+    def close(self) -> None:
+        """Stop sampling the resident memory."""
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def get_peak_memory(self) -> Optional[int]:
+        """Get the peak memory in bytes since recording started, or None if it can't be measured."""
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[1]
+
+        self._update_peak_rss()
+        return self.peak_rss
+
+    @contextmanager
+    def counting_rows(self, engine: Engine):
+        """Count the rows inserted through the engine while in the context."""
+        event.listen(engine, 'after_cursor_execute', self._count_rows)
+        try:
+            yield
+        finally:
+            event.remove(engine, 'after_cursor_execute', self._count_rows)
+
+    def _count_rows(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is None or not context.isinsert:
+            return
+
+        table_name = context.compiled.statement.table.name
+        if table_name not in self.table_names:
+            return
+
+        if 0 <= cursor.rowcount:
+            self.rows[table_name] += cursor.rowcount
+        else:
+            self.rows[table_name] += len(parameters) if executemany else 1
+
+    @contextmanager
+    def timing_stage(self, name: str):
+        """Add the time spent in the context to the named stage."""
+        t = time.time()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.time() - t
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the statistics recorded so far."""
+        return dict(
+            duration=time.time() - self.start,
+            peak_memory=self.get_peak_memory(),
+            rows=dict(self.rows),
+            stages=dict(self.stages),
+        )
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""Utilities for populating without holding the whole dataset in a session's identity map.
+
+A :class:`StreamingSession` wraps a manager's session. Every few thousand objects that are added, it commits them and
+expunges everything from the session so they can be garbage collected. If a memory limit is set, the resident
+memory of the process is checked regularly, and the objects are committed early when it's over the limit. If it's
+still over the limit at the next check, the memory is probably held by something else, so the checks back off.
+"""
+
+import logging
+import os
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+__all__ = [
+    'StreamingSession',
+    'get_rss',
+]
+
+logger = logging.getLogger(__name__)
+
+
+def get_rss() -> Optional[int]:
+    """Get the resident memory of this process in bytes, or None if it can't be measured.
+
+    Uses :mod:`psutil` if it's installed, otherwise ``/proc/self/statm``.
+    """
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return
+
+
+class StreamingSession:
+    """Commits and expunges the objects added to a session in batches.
+
+    Since the session is emptied after each batch, objects from earlier batches can't be relied on to stay attached.
+    Keep track of the primary keys of earlier objects instead of the objects themselves, or use
+    :meth:`bio2bel.AbstractManager.bulk_load` for association tables.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        batch_size: int = 10000,
+        memory_limit: Optional[int] = None,
+        check_every: int = 1000,
+    ) -> None:
+        """Initialize the streaming session.
+
+        :param session: The session to wrap
+        :param batch_size: The number of objects to add before committing them
+        :param memory_limit: The resident memory, in MiB, over which the objects are committed early
+        :param check_every: The number of objects to add between checks of the resident memory. It's doubled each
+         time the memory is still over the limit after committing early, up to the batch size.
+        """
+        self.session = session
+        self.batch_size = batch_size
+        self.memory_limit = memory_limit
+        self.check_every = check_every
+
+        #: The number of objects added since the last flush
+        self.pending = 0
+        #: The number of objects added in total
+        self.count = 0
+        #: The number of times the objects have been committed and expunged
+        self.flushes = 0
+
+        self._check_interval = check_every
+        self._was_over_memory_limit = False
+
+    def add(self, instance) -> None:
+        """Add an object to the session, committing the batch if it's full or if memory is over the limit."""
+        self.session.add(instance)
+        self.pending += 1
+        self.count += 1
+
+        if self.batch_size <= self.pending:
+            self.flush()
+        elif self.memory_limit is not None and self.pending % self._check_interval == 0 and self._over_memory_limit():
+            self.flush()
+
+    def add_all(self, instances: Iterable) -> None:
+        """Add several objects to the session."""
+        for instance in instances:
+            self.add(instance)
+
+    def flush(self) -> None:
+        """Commit the pending objects and expunge everything from the session."""
+        if not self.pending:
+            return
+
+        self.session.commit()
+        self.session.expunge_all()
+        logger.debug('committed a batch of %d objects (%d total)', self.pending, self.count)
+        self.pending = 0
+        self.flushes += 1
+
+    def _over_memory_limit(self) -> bool:
+        rss = get_rss()
+        if rss is None or rss <= self.memory_limit * 2 ** 20:
+            self._check_interval = self.check_every
+            self._was_over_memory_limit = False
+            return False
+
+        if self._was_over_memory_limit:
+            self._check_interval = min(2 * self._check_interval, self.batch_size)
+            logger.warning(
+                'resident memory is still %.0f MiB after committing early. Checking again after %d objects',
+                rss / 2 ** 20, self._check_interval,
+            )
+        else:
+            logger.info('resident memory is %.0f MiB. Committing %d objects early', rss / 2 ** 20, self.pending)
+
+        self._was_over_memory_limit = True
+        return True
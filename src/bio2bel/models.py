@@ -15,19 +15,53 @@ The most recent population action from a given module can be retrieved with the
     session = _make_session()
     action = session.query(Action).filter(Action.resource == 'kegg').order_by(Action.created.desc()).first()
 
+How long each population took, how many rows it inserted into each table, how much memory it used, and how long
+each of its named stages took are stored as an :class:`ActionStats` attached to its action.
+
+The hash of a namespace's values is computed after each successful population of a namespace manager and stored as
+a :class:`NamespaceHash` attached to its ``populate`` action, so checking if the namespace changed doesn't need to
+scan its tables.
+
+The source files used by each successful population, along with their MD5 checksums, are stored as :class:`Source`
+instances attached to its ``populate`` action.
+
+Bio2BEL also keeps track of which declarative bases have already had their tables created in a given database, so
+instantiating a manager doesn't need to inspect the database each time. A hash of each declarative base's metadata is
+stored in the :class:`Schema` table after its tables have been created and is cleared when they are dropped.
+
+Actions stored without a session are written through an engine that is shared for the rest of the process. When
+many ``drop`` actions are stored in a loop, they can be buffered and written in batches with an :class:`ActionBuffer`.
+This includes the ones stored by managers for the same connection, like when ``bio2bel drop`` drops every module:
+
+.. code-block:: python
+
+    from bio2bel.models import Action, ActionBuffer
+
+    with ActionBuffer():
+        for resource in ['hgnc', 'chebi', 'go']:
+            Action.store_drop(resource)
 """
 
 from __future__ import annotations
 
 import datetime
+import hashlib
+import json
 import logging
-from typing import List, Optional
-
-from sqlalchemy import Column, DateTime, Integer, String, create_engine
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import (
+    BigInteger, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Text, UniqueConstraint, inspect, select,
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm import Session, backref, relationship, sessionmaker
 
 from .constants import get_global_connection
+from .engines import _is_memory_connection, _normalize_connection, get_engine
+from .utils import get_file_md5
 
 log = logging.getLogger(__name__)
 
@@ -35,6 +69,18 @@ Base = declarative_base()
 
 TABLE_PREFIX = 'bio2bel'
 ACTION_TABLE_NAME = '{}_action'.format(TABLE_PREFIX)
+SCHEMA_TABLE_NAME = '{}_schema'.format(TABLE_PREFIX)
+CHECKPOINT_TABLE_NAME = '{}_checkpoint'.format(TABLE_PREFIX)
+SOURCE_TABLE_NAME = '{}_action_source'.format(TABLE_PREFIX)
+STATS_TABLE_NAME = '{}_action_stats'.format(TABLE_PREFIX)
+NAMESPACE_HASH_TABLE_NAME = '{}_action_namespace_hash'.format(TABLE_PREFIX)
+
+#: Pairs of connection strings and metadata hashes that have been verified during this process
+_VERIFIED_SCHEMAS: Set[Tuple[str, str]] = set()
+
+#: The stack of active action buffers. Drop actions go to the innermost one for their connection.
+_ACTION_BUFFERS: List[ActionBuffer] = []
+_ACTION_BUFFERS_LOCK = threading.Lock()
 
 
 class Action(Base):
@@ -112,6 +158,36 @@ class Action(Base):
         _store_helper(action, session=session)
         return action
 
+    @classmethod
+    def get_last_populate(cls, resource: str, session: Session) -> Optional[Action]:
+        """Get the last successful population of the resource, or None if it has never been populated.
+
+        :param resource: The normalized name of the resource
+        :param session: A session
+        """
+        return (
+            session.query(cls)
+            .filter(cls.resource == resource.lower(), cls.action == 'populate')
+            .order_by(cls.created.desc(), cls.id.desc())
+            .first()
+        )
+
+    @classmethod
+    def get_current_populate(cls, resource: str, session: Session) -> Optional[Action]:
+        """Get the last successful population of the resource, or None if it was dropped afterwards.
+
+        :param resource: The normalized name of the resource
+        :param session: A session
+        """
+        action = (
+            session.query(cls)
+            .filter(cls.resource == resource.lower(), cls.action.in_(['populate', 'drop']))
+            .order_by(cls.created.desc(), cls.id.desc())
+            .first()
+        )
+        if action is not None and action.action == 'populate':
+            return action
+
     @classmethod
     def ls(cls, session: Optional[Session] = None) -> List[Action]:
         """Get all actions."""
@@ -133,8 +209,314 @@ class Action(Base):
         return count
 
 
+class Checkpoint(Base):
+    """Represents a completed stage of a population that can be skipped when the population is resumed."""
+
+    __tablename__ = CHECKPOINT_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    resource = Column(String(32), nullable=False, index=True,
+                      doc='The normalized name of the Bio2BEL package (e.g., hgnc, chebi, etc)')
+    stage = Column(String(255), nullable=False, doc='The name of the stage')
+    offset = Column(Integer, nullable=True, doc='The number of chunks of the stage that have been completed')
+    created = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, doc='The date and time of completion')
+
+    __table_args__ = (
+        UniqueConstraint(resource, stage),
+    )
+
+    def __repr__(self):  # noqa: D105
+        return '{} {} ({}) at {}'.format(self.resource, self.stage, self.offset, self.created)
+
+    @classmethod
+    def get(cls, resource: str, stage: str, session: Session) -> Optional[Checkpoint]:
+        """Get the checkpoint for the given stage, if it has been completed."""
+        return session.query(cls).filter(cls.resource == resource.lower(), cls.stage == stage).one_or_none()
+
+    @classmethod
+    def store(cls, resource: str, stage: str, session: Session, offset: Optional[int] = None) -> Checkpoint:
+        """Store the completion of a stage, or of a number of chunks of a stage if an offset is given."""
+        checkpoint = cls.get(resource, stage, session=session)
+        if checkpoint is None:
+            checkpoint = cls(resource=resource.lower(), stage=stage)
+            session.add(checkpoint)
+
+        checkpoint.offset = offset
+        checkpoint.created = datetime.datetime.utcnow()
+        session.commit()
+        return checkpoint
+
+    @classmethod
+    def clear(cls, resource: str, session: Session) -> int:
+        """Delete all checkpoints for the given resource."""
+        count = session.query(cls).filter(cls.resource == resource.lower()).delete(synchronize_session=False)
+        session.commit()
+        return count
+
+
+class Source(Base):
+    """Represents a source file used by a successful population."""
+
+    __tablename__ = SOURCE_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    action_id = Column(Integer, ForeignKey(f'{ACTION_TABLE_NAME}.id'), nullable=False, index=True)
+    action = relationship(Action, backref=backref('sources'))
+
+    url = Column(Text, nullable=False, doc='The URL the file was downloaded from')
+    path = Column(Text, nullable=False, doc='The path of the cached file')
+    md5 = Column(String(32), nullable=False, doc='The MD5 checksum of the file')
+
+    def __repr__(self):  # noqa: D105
+        return '{} ({})'.format(self.url, self.md5)
+
+    @classmethod
+    def store(cls, action: Action, sources: Mapping[str, str], session: Session) -> List[Source]:
+        """Store the checksums of the source files used by a population.
+
+        :param action: The ``populate`` action
+        :param sources: A dictionary from the paths of the source files to the URLs they came from. See
+         :func:`bio2bel.utils.track_sources`.
+        :param session: A session
+        """
+        rv = [
+            cls(action=action, url=url, path=path, md5=get_file_md5(path))
+            for path, url in sorted(sources.items())
+        ]
+        session.add_all(rv)
+        session.commit()
+        return rv
+
+    @classmethod
+    def get_last(cls, resource: str, session: Session) -> Optional[List[Source]]:
+        """Get the source files used by the current population of the resource.
+
+        :param resource: The normalized name of the resource
+        :param session: A session
+        :return: The source files, or None if the resource has never been populated or was dropped afterwards
+        """
+        action = Action.get_current_populate(resource, session=session)
+        if action is None:
+            return
+
+        return session.query(cls).filter(cls.action_id == action.id).all()
+
+
+class ActionStats(Base):
+    """Represents the performance statistics of a population."""
+
+    __tablename__ = STATS_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    action_id = Column(Integer, ForeignKey(f'{ACTION_TABLE_NAME}.id'), nullable=False, unique=True, index=True)
+    action = relationship(Action, backref=backref('stats', uselist=False))
+
+    duration = Column(Float, nullable=False, doc='The number of seconds the population took')
+    peak_memory = Column(BigInteger, nullable=True, doc='The peak memory in bytes')
+    rows_json = Column(Text, nullable=False, doc='A JSON object of the number of rows inserted into each table')
+    stages_json = Column(Text, nullable=False, doc='A JSON object of the number of seconds each named stage took')
+
+    def __repr__(self):  # noqa: D105
+        return '{} in {:.1f} seconds'.format(self.action, self.duration)
+
+    @property
+    def rows(self) -> Dict[str, int]:
+        """Get the number of rows inserted into each table."""
+        return json.loads(self.rows_json)
+
+    @property
+    def stages(self) -> Dict[str, float]:
+        """Get the number of seconds each named stage took."""
+        return json.loads(self.stages_json)
+
+    @classmethod
+    def store(
+        cls,
+        action: Action,
+        duration: float,
+        session: Session,
+        peak_memory: Optional[int] = None,
+        rows: Optional[Mapping[str, int]] = None,
+        stages: Optional[Mapping[str, float]] = None,
+    ) -> ActionStats:
+        """Store the statistics of a population.
+
+        :param action: The ``populate`` or ``populate_failed`` action
+        :param duration: The number of seconds the population took
+        :param session: A session
+        :param peak_memory: The peak memory in bytes
+        :param rows: The number of rows inserted into each table
+        :param stages: The number of seconds each named stage took
+        """
+        session.add(action)  # the action might have been detached after it was stored
+        stats = cls(
+            action=action,
+            duration=duration,
+            peak_memory=peak_memory,
+            rows_json=json.dumps(rows or {}, sort_keys=True),
+            stages_json=json.dumps(stages or {}),
+        )
+        session.add(stats)
+        session.commit()
+        return stats
+
+    def to_json(self) -> Dict[str, Any]:
+        """Get the statistics and their action as a JSON object."""
+        return dict(
+            resource=self.action.resource,
+            action=self.action.action,
+            created=self.action.created.isoformat(),
+            duration=self.duration,
+            peak_memory=self.peak_memory,
+            rows=self.rows,
+            stages=self.stages,
+        )
+
+
+class NamespaceHash(Base):
+    """Represents the hash of a namespace's values after a successful population."""
+
+    __tablename__ = NAMESPACE_HASH_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    action_id = Column(Integer, ForeignKey(f'{ACTION_TABLE_NAME}.id'), nullable=False, unique=True, index=True)
+    action = relationship(Action, backref=backref('namespace_hash', uselist=False))
+
+    hash = Column(String(128), nullable=False, doc='The hash of all of the values')
+    merkle_json = Column(Text, nullable=False, doc='A JSON object of the root hash and the hashes of the chunks')
+
+    def __repr__(self):  # noqa: D105
+        return '{} for {}'.format(self.hash, self.action)
+
+    @property
+    def merkle(self) -> Dict[str, Any]:
+        """Get the hash, root hash, and chunks. See :meth:`bio2bel.utils.NamespaceHasher.to_json`."""
+        return json.loads(self.merkle_json)
+
+    @classmethod
+    def store(cls, action: Action, merkle: Mapping[str, Any], session: Session) -> NamespaceHash:
+        """Store the hash of a namespace with the population it was computed after.
+
+        :param action: The ``populate`` action
+        :param merkle: The hash, root hash, and chunks from :meth:`bio2bel.utils.NamespaceHasher.to_json`
+        :param session: A session
+        """
+        session.add(action)  # the action might have been detached after it was stored
+        if action.namespace_hash is not None:
+            session.delete(action.namespace_hash)
+            session.flush()
+
+        namespace_hash = cls(action=action, hash=merkle['hash'], merkle_json=json.dumps(merkle))
+        session.add(namespace_hash)
+        session.commit()
+        return namespace_hash
+
+
+class Schema(Base):
+    """Represents a declarative base whose tables have been created in the database."""
+
+    __tablename__ = SCHEMA_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    hash = Column(String(32), nullable=False, unique=True, index=True,
+                  doc='The MD5 hash of the declarative base\'s metadata. See :func:`get_metadata_hash`')
+    created = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, doc='The date and time of creation')
+
+    def __repr__(self):  # noqa: D105
+        return '{} at {}'.format(self.hash, self.created)
+
+
+class ActionBuffer:
+    """Buffers the ``drop`` actions stored for a connection and writes them in batches.
+
+    Only ``drop`` actions are buffered, since nothing else refers to them. They're buffered whether they're stored
+    without a session or with a session for the same connection, and written through the buffer's connection when
+    the threshold is reached and when the context is exited. In-memory databases are never buffered, since the
+    buffer's engine wouldn't share their database.
+    """
+
+    def __init__(self, connection: Optional[str] = None, threshold: int = 100):
+        """Initialize the buffer.
+
+        :param connection: The connection to buffer the actions for. Defaults to the global connection.
+        :param threshold: The number of actions to buffer before writing them
+        """
+        self.connection = _normalize_connection(connection or get_global_connection())
+        self.threshold = threshold
+        self.actions: List[Action] = []
+        self._lock = threading.Lock()
+
+    def add(self, action: Action) -> None:
+        """Add an action to the buffer and write the buffer if it's full."""
+        if action.created is None:
+            # Keep the time it was stored instead of the time it's written
+            action.created = datetime.datetime.utcnow()
+
+        with self._lock:
+            self.actions.append(action)
+            full = self.threshold <= len(self.actions)
+
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered actions."""
+        with self._lock:
+            actions, self.actions = self.actions, []
+
+        if not actions:
+            return
+
+        session = _make_session(connection=self.connection)
+        session.add_all(actions)
+        session.commit()
+        session.close()
+
+        log.debug('wrote %d buffered actions', len(actions))
+
+    def __enter__(self) -> ActionBuffer:  # noqa: D105
+        with _ACTION_BUFFERS_LOCK:
+            _ACTION_BUFFERS.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):  # noqa: D105
+        with _ACTION_BUFFERS_LOCK:
+            _ACTION_BUFFERS.remove(self)
+        self.flush()
+
+
+def _get_action_buffer(session: Optional[Session] = None) -> Optional[ActionBuffer]:
+    """Get the innermost action buffer for the session's connection, or the global connection if there's no session."""
+    if not _ACTION_BUFFERS:
+        return
+
+    if session is None:
+        connection = _normalize_connection(get_global_connection())
+    else:
+        connection = _normalize_connection(session.get_bind().url)
+
+    if _is_memory_connection(connection):
+        return
+
+    with _ACTION_BUFFERS_LOCK:
+        for buffer in reversed(_ACTION_BUFFERS):
+            if buffer.connection == connection:
+                return buffer
+
+
 def _store_helper(model: Action, session: Optional[Session] = None) -> None:
     """Help store an action."""
+    if model.action == 'drop':
+        buffer = _get_action_buffer(session)
+        if buffer is not None:
+            buffer.add(model)
+            return
+
     if session is None:
         session = _make_session()
 
@@ -144,13 +526,17 @@ def _store_helper(model: Action, session: Optional[Session] = None) -> None:
 
 
 def _make_session(connection: Optional[str] = None) -> Session:
-    """Make a session."""
+    """Make a session.
+
+    The engine is shared with the rest of the process (see :func:`bio2bel.engines.get_engine`) and the Bio2BEL
+    tables are only checked the first time (see :func:`ensure_schema`).
+    """
     if connection is None:
         connection = get_global_connection()
 
-    engine = create_engine(connection)
+    engine = get_engine(connection)
 
-    create_all(engine)
+    ensure_schema(engine)
 
     session_cls = sessionmaker(bind=engine)
     session = session_cls()
@@ -161,3 +547,131 @@ def _make_session(connection: Optional[str] = None) -> Session:
 def create_all(engine, checkfirst=True):
     """Create the tables for Bio2BEL."""
     Base.metadata.create_all(bind=engine, checkfirst=checkfirst)
+
+
+def get_metadata_hash(metadata: MetaData) -> str:
+    """Get a hash of the tables, columns, and indexes described by the metadata."""
+    m = hashlib.md5()
+    for table in sorted(metadata.tables.values(), key=lambda t: t.fullname):
+        m.update(table.fullname.encode('utf8'))
+        for column in table.columns:
+            m.update(f'{column.name}:{column.type!r}:{column.nullable}:{column.primary_key}'.encode('utf8'))
+        for index in sorted(table.indexes, key=lambda i: i.name or ''):
+            m.update(f'{index.name}:{index.unique}:{",".join(index.columns.keys())}'.encode('utf8'))
+    return m.hexdigest()
+
+
+def ensure_schema(engine: Engine, metadata: Optional[MetaData] = None) -> None:
+    """Create the tables described by the metadata unless they are already known to exist.
+
+    After the first time, this is a set lookup for the rest of the process. In new processes, it costs a single
+    query against the :class:`Schema` table instead of inspecting each table.
+
+    :param engine: A SQLAlchemy engine
+    :param metadata: The metadata from a declarative base. Defaults to the metadata for Bio2BEL's own tables.
+    """
+    if metadata is None:
+        metadata = Base.metadata
+
+    metadata_hash = get_metadata_hash(metadata)
+    key = _get_schema_key(engine, metadata_hash)
+
+    if key is not None and key in _VERIFIED_SCHEMAS:
+        return
+
+    if not _has_schema_hash(engine, metadata_hash):
+        create_schema(engine, metadata)
+    elif key is not None:
+        _VERIFIED_SCHEMAS.add(key)
+
+
+def create_schema(engine: Engine, metadata: MetaData, checkfirst: bool = True) -> bool:
+    """Create the tables described by the metadata and record them as created if they all match it.
+
+    Tables that already exist aren't changed by :meth:`sqlalchemy.sql.schema.MetaData.create_all`, so if any of them
+    are missing columns or indexes (see :func:`get_stale_tables`), the schema isn't recorded. It's then inspected again
+    the next time and :meth:`bio2bel.AbstractManager.reset` drops and creates the tables instead of emptying them.
+
+    :return: If the tables match the metadata and were recorded as created
+    """
+    stale_tables = get_stale_tables(engine, metadata)
+    metadata.create_all(bind=engine, checkfirst=checkfirst)
+
+    if stale_tables:
+        log.warning('tables do not match their models: %s', ', '.join(stale_tables))
+        return False
+
+    store_schema(engine, metadata)
+    return True
+
+
+def get_stale_tables(engine: Engine, metadata: MetaData) -> List[str]:
+    """Get the names of the existing tables whose columns or indexes don't match the ones described by the metadata."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    rv = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        if columns != set(table.columns.keys()) or not {index.name for index in table.indexes} <= indexes:
+            rv.append(table.name)
+
+    return rv
+
+
+def _get_schema_key(engine: Engine, metadata_hash: str) -> Optional[Tuple[str, str]]:
+    """Get the key for remembering the schema was created, or None if the engine's database can't be remembered.
+
+    Every engine for an in-memory SQLite database has the same URL but its own database, so they're never cached.
+    """
+    if _is_memory_connection(str(engine.url)):
+        return
+    return str(engine.url), metadata_hash
+
+
+def has_schema(engine: Engine, metadata: MetaData) -> bool:
+    """Check if the tables described by the metadata are recorded as created, without using the cache."""
+    return _has_schema_hash(engine, get_metadata_hash(metadata))
+
+
+def _has_schema_hash(engine: Engine, metadata_hash: str) -> bool:
+    """Check if the hash is stored in the database. Returns false if the schema table doesn't exist yet."""
+    query = select([Schema.id]).where(Schema.hash == metadata_hash)
+    try:
+        with engine.connect() as connection:
+            return connection.execute(query).first() is not None
+    except DBAPIError:
+        return False
+
+
+def store_schema(engine: Engine, metadata: MetaData) -> None:
+    """Record that the tables described by the metadata have been created."""
+    metadata_hash = get_metadata_hash(metadata)
+
+    if not _has_schema_hash(engine, metadata_hash):
+        Schema.__table__.create(bind=engine, checkfirst=True)
+        try:
+            with engine.begin() as connection:
+                connection.execute(Schema.__table__.insert(), {'hash': metadata_hash})
+        except IntegrityError:  # another process got there first
+            pass
+
+    key = _get_schema_key(engine, metadata_hash)
+    if key is not None:
+        _VERIFIED_SCHEMAS.add(key)
+
+
+def clear_schema(engine: Engine, metadata: MetaData) -> None:
+    """Forget that the tables described by the metadata have been created, e.g., after dropping them."""
+    metadata_hash = get_metadata_hash(metadata)
+    _VERIFIED_SCHEMAS.discard(_get_schema_key(engine, metadata_hash))
+
+    try:
+        with engine.begin() as connection:
+            connection.execute(Schema.__table__.delete().where(Schema.hash == metadata_hash))
+    except DBAPIError:
+        log.debug('could not clear schema %s', metadata_hash)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""Utilities for running Bio2BEL modules in parallel worker processes.
+
+Each worker process builds its own engines. When the target database is SQLite, which only allows one writer at a
+time, the workers share a lock that is held from a connection's first write until it commits or rolls back. This
+serializes the writes while still letting the downloading and parsing that happen in between overlap.
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import Pool
+
+from .engines import dispose_all
+from .utils import get_data_dir
+
+__all__ = [
+    'WorkerResult',
+    'run_in_pool',
+    'exclusive_writes',
+    'module_logging',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The lock shared by the worker processes for serializing writes to SQLite
+_WRITE_LOCK = None
+
+#: The number of connections in this process that are currently in a write transaction
+_WRITE_LOCK_HOLDERS = 0
+
+_READ_PREFIXES = ('SELECT', 'PRAGMA')
+
+
+class WorkerResult(NamedTuple):
+    """The result of running a module in a worker process."""
+
+    #: The name of the module
+    name: str
+    #: A short description of the outcome, like "populated" or "failed"
+    status: str
+    #: The number of seconds it took
+    duration: float
+    #: An optional explanation of the status
+    message: Optional[str] = None
+    #: The path to the log file for the module
+    log_path: Optional[str] = None
+
+
+def run_in_pool(
+    func: Callable[..., WorkerResult],
+    names: Iterable[str],
+    jobs: int,
+    connection: str,
+    **kwargs
+) -> Iterable[WorkerResult]:
+    """Run the function for each module in a pool of worker processes and yield the results as they finish.
+
+    :param func: A module-level function that takes the name of a module, the connection, and the keyword
+     arguments then returns a :class:`WorkerResult`
+    :param names: The names of the modules
+    :param jobs: The number of worker processes
+    :param connection: The connection string passed to each call of the function
+    :param kwargs: Additional keyword arguments passed to each call of the function
+    """
+    lock = multiprocessing.Lock() if make_url(connection).get_backend_name() == 'sqlite' else None
+
+    # Don't let the workers inherit pooled connections
+    dispose_all()
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_initialize_worker, initargs=(lock,)) as executor:
+        futures = {
+            executor.submit(func, name, connection, **kwargs): name
+            for name in names
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                yield future.result()
+            except Exception as e:
+                logger.exception('worker for %s crashed', name)
+                yield WorkerResult(name=name, status='failed', duration=0.0, message=str(e))
+
+
+def _initialize_worker(lock) -> None:
+    """Set up a worker process."""
+    global _WRITE_LOCK
+    _WRITE_LOCK = lock
+
+    if lock is not None:
+        event.listen(Engine, 'before_cursor_execute', _acquire_write_lock)
+        event.listen(Engine, 'commit', _release_write_lock)
+        event.listen(Engine, 'rollback', _release_write_lock)
+        event.listen(Pool, 'reset', _release_write_lock_on_reset)
+
+
+def _acquire_write_lock(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Acquire the shared write lock before a connection's first write in a transaction."""
+    global _WRITE_LOCK_HOLDERS
+
+    if conn.info.get('bio2bel_write_lock') or statement.lstrip().upper().startswith(_READ_PREFIXES):
+        return
+
+    if _WRITE_LOCK_HOLDERS == 0:
+        _WRITE_LOCK.acquire()
+    _WRITE_LOCK_HOLDERS += 1
+    conn.info['bio2bel_write_lock'] = True
+
+
+def _release_write_lock(conn) -> None:
+    """Release the shared write lock after a connection that acquired it commits or rolls back."""
+    global _WRITE_LOCK_HOLDERS
+
+    if not conn.info.pop('bio2bel_write_lock', False):
+        return
+
+    _WRITE_LOCK_HOLDERS -= 1
+    if _WRITE_LOCK_HOLDERS == 0:
+        _WRITE_LOCK.release()
+
+
+@contextmanager
+def exclusive_writes():
+    """Hold the shared write lock while in the context.
+
+    This is needed when a check and a write have to happen together, like when tables are created only if they
+    don't already exist. Outside of worker processes for SQLite, this does nothing.
+    """
+    global _WRITE_LOCK_HOLDERS
+
+    if _WRITE_LOCK is None:
+        yield
+        return
+
+    if _WRITE_LOCK_HOLDERS == 0:
+        _WRITE_LOCK.acquire()
+    _WRITE_LOCK_HOLDERS += 1
+
+    try:
+        yield
+    finally:
+        _WRITE_LOCK_HOLDERS -= 1
+        if _WRITE_LOCK_HOLDERS == 0:
+            _WRITE_LOCK.release()
+
+
+def _release_write_lock_on_reset(dbapi_connection, connection_record) -> None:
+    """Release the shared write lock if a connection is returned to the pool in the middle of a transaction."""
+    _release_write_lock(connection_record)
+
+
+@contextmanager
+def module_logging(name: str, command: str):
+    """Send all logging in this process to a file in the module's data directory while in the context.
+
+    :param name: The name of the module
+    :param command: The name of the command, used for the name of the log file
+    :return: The path to the log file
+    """
+    path = os.path.join(get_data_dir(name), f'{command}.log')
+    handler = logging.FileHandler(path, mode='w')
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    old_level = root.level
+    root.setLevel(logging.INFO)
+
+    try:
+        yield path
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(old_level)
+        handler.close()
+        dispose_all()
@@ -258,30 +258,33 @@ class Manager(CompathManager):
 
     def populate(self, *args, **kwargs) -> None:
         """Populate the PID database."""
-        obo = get_obo()
-
-        x = {
-            reference.identifier: Protein(
-                entrez_id=hgnc_id_to_entrez_id.get(reference.identifier),
-                hgnc_id=reference.identifier,
-                hgnc_symbol=reference.name,
-            )
-            for term in obo
+        # Iterating the ontology builds its terms again each time, so build them once
+        terms = list(get_obo())
+
+        protein_rows = {}
+        for term in terms:
+            for reference in term.get_relationships(pathway_has_part):
+                protein_rows[reference.identifier] = dict(
+                    entrez_id=hgnc_id_to_entrez_id.get(reference.identifier),
+                    hgnc_id=reference.identifier,
+                    hgnc_symbol=reference.name,
+                )
+        logger.info('extracted %d proteins from pid.pathway', len(protein_rows))
+        self.bulk_load(Protein, protein_rows.values())
+
+        self.bulk_load(Pathway, (
+            dict(identifier=term.identifier, name=term.name)
+            for term in terms
+        ))
+
+        # Let the database assign the primary keys, then look them up to link the pathways and proteins
+        hgnc_id_to_protein_id = dict(self.session.query(Protein.hgnc_id, Protein.id))
+        pathway_identifier_to_id = dict(self.session.query(Pathway.identifier, Pathway.id))
+        self.bulk_load(pathway_protein, {
+            (pathway_identifier_to_id[term.identifier], hgnc_id_to_protein_id[reference.identifier])
+            for term in terms
             for reference in term.get_relationships(pathway_has_part)
-        }
-        logger.info('extracted %d proteins from pid.pathway', len(x))
-
-        for term in obo:
-            pathway = Pathway(
-                identifier=term.identifier,
-                name=term.name,
-                proteins=[
-                    x[reference.identifier]
-                    for reference in term.get_relationships(pathway_has_part)
-                ]
-            )
-            self.session.add(pathway)
-        self.session.commit()
+        })
 
 
 main = Manager.get_cli()
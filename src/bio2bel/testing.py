@@ -13,6 +13,7 @@ import unittest
 from typing import Type
 from unittest import mock
 
+from .engines import dispose_all
 from .exc import Bio2BELManagerTypeError, Bio2BELTestMissingManagerError
 from .manager.abstract_manager import AbstractManager
 
@@ -41,6 +42,7 @@ class TemporaryConnectionMethodMixin(unittest.TestCase):
 
     def tearDown(self):
         """Close the connection to the database and removes the files created for it."""
+        dispose_all()
         os.close(self.fd)
         os.remove(self.path)
 
@@ -67,6 +69,7 @@ class TemporaryConnectionMixin(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         """Close the connection to the database and removes the files created for it."""
+        dispose_all()
         os.close(cls.fd)
         os.remove(cls.path)
 
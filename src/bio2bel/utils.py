@@ -7,7 +7,8 @@ import logging
 import os
 import shutil
 import types
-from typing import Iterable, Mapping, Optional, Tuple, Type
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Type
 from urllib.parse import urlparse
 from urllib.request import urlretrieve
 
@@ -21,6 +22,8 @@ __all__ = [
     'prefix_directory_join',
     'get_url_filename',
     'ensure_path',
+    'track_sources',
+    'get_file_md5',
     'get_connection',
     'get_version',
     'get_bio2bel_modules',
@@ -29,6 +32,9 @@ __all__ = [
 
 logger = logging.getLogger(__name__)
 
+#: The stack of active source trackers. See :func:`track_sources`.
+_SOURCE_TRACKERS: List[Dict[str, str]] = []
+
 
 def get_data_dir(module_name: str) -> str:
     """Ensure the appropriate Bio2BEL data directory exists for the given module, then returns the file path.
@@ -64,9 +70,39 @@ def ensure_path(prefix: str, url: str, path: Optional[str] = None) -> str:
         logger.info('downloading %s to %s', url, path)
         urlretrieve(url, path)
 
+    _record_source(url, path)
     return path
 
 
+@contextmanager
+def track_sources() -> Iterator[Dict[str, str]]:
+    """Keep track of the files used through :func:`ensure_path` and :func:`bio2bel.downloading.make_downloader`.
+
+    :return: A dictionary from the paths of the files used while in the context to the URLs they came from
+    """
+    sources = {}
+    _SOURCE_TRACKERS.append(sources)
+    try:
+        yield sources
+    finally:
+        _SOURCE_TRACKERS.remove(sources)
+
+
+def _record_source(url: str, path: str) -> None:
+    """Record that the file at the given path, which came from the given URL, was used."""
+    for sources in _SOURCE_TRACKERS:
+        sources[os.path.abspath(path)] = url
+
+
+def get_file_md5(path: str, chunk_size: int = 2 ** 20) -> str:
+    """Get the MD5 checksum of a file, reading it in chunks."""
+    md5 = hashlib.md5()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
 class _AbstractModuleConfig(EasyConfig):
     connection: str = None
 
@@ -177,3 +213,95 @@ def get_namespace_hash(items, hash_function=None) -> str:
     for name, encoding in items:
         m.update(f'{name}:{encoding}'.encode('utf8'))
     return m.hexdigest()
+
+
+class NamespaceHasher:
+    """Hashes the sorted values of a namespace, both as a whole and in chunks.
+
+    The chunks end after each value whose own hash is divisible by the chunk size, so they're about the chunk size
+    on average, and adding or removing a value only changes the chunk it's in instead of shifting all the chunks
+    after it. The root hash is the hash of the chunks' hashes.
+    """
+
+    def __init__(self, chunk_size: int = 1000, hash_function=None) -> None:
+        """Initialize the hasher.
+
+        :param chunk_size: The average number of values in a chunk
+        :param hash_function: The hash function. Defaults to MD5.
+        """
+        self.chunk_size = chunk_size
+        self.hash_function = hash_function or hashlib.md5
+
+        self._hash = self.hash_function()
+        self._chunk_hash = None
+        self._first = self._last = None
+        self._size = 0
+
+        #: The first value, last value, number of values, and hash of each finished chunk
+        self.chunks: List[Dict] = []
+
+    def update(self, name: str, encoding: str) -> None:
+        """Add the next value and its encoding. They must be added in sorted order."""
+        line = f'{name}:{encoding}'.encode('utf8')
+        self._hash.update(line)
+
+        if self._chunk_hash is None:
+            self._chunk_hash = self.hash_function()
+            self._first = name
+        self._chunk_hash.update(line)
+        self._last = name
+        self._size += 1
+
+        if int(hashlib.md5(str(name).encode('utf8')).hexdigest()[:8], 16) % self.chunk_size == 0:
+            self._finish_chunk()
+
+    def update_all(self, items: Iterable[Tuple[str, str]]) -> 'NamespaceHasher':
+        """Add several values and their encodings, in sorted order."""
+        for name, encoding in items:
+            self.update(name, encoding)
+        return self
+
+    def _finish_chunk(self) -> None:
+        self.chunks.append(dict(first=self._first, last=self._last, size=self._size, hash=self._chunk_hash.hexdigest()))
+        self._chunk_hash = self._first = self._last = None
+        self._size = 0
+
+    def hexdigest(self) -> str:
+        """Get the hash of all of the values, the same as :func:`get_namespace_hash` gives."""
+        return self._hash.hexdigest()
+
+    def to_json(self) -> Dict:
+        """Get the hash of all of the values, the root hash, and the chunks."""
+        if self._chunk_hash is not None:
+            self._finish_chunk()
+
+        root = self.hash_function()
+        for chunk in self.chunks:
+            root.update(chunk['hash'].encode('utf8'))
+
+        return dict(
+            hash=self.hexdigest(),
+            root=root.hexdigest(),
+            chunk_size=self.chunk_size,
+            chunks=self.chunks,
+        )
+
+
+def get_changed_chunks(old: Optional[Mapping], new: Mapping) -> List[Tuple[str, str]]:
+    """Get the ranges of values that changed between two results of :meth:`NamespaceHasher.to_json`.
+
+    These are the new chunks whose hashes weren't in the old ones and the old chunks whose hashes aren't in the new
+    ones, sorted by their first value. If there isn't an old result or the chunk sizes differ, everything changed.
+    """
+    if old is None or old.get('chunk_size') != new['chunk_size']:
+        return [(chunk['first'], chunk['last']) for chunk in new['chunks']]
+
+    if old.get('root') == new['root']:
+        return []
+
+    old_hashes = {chunk['hash'] for chunk in old['chunks']}
+    new_hashes = {chunk['hash'] for chunk in new['chunks']}
+
+    added = [(chunk['first'], chunk['last']) for chunk in new['chunks'] if chunk['hash'] not in old_hashes]
+    removed = [(chunk['first'], chunk['last']) for chunk in old['chunks'] if chunk['hash'] not in new_hashes]
+    return sorted(added + removed)
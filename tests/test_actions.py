@@ -2,15 +2,35 @@
 
 """Test that actions are stored properly for population and dropping."""
 
+import json
 import logging
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+from unittest import mock
 
-from bio2bel.models import Action, create_all
+from click.testing import CliRunner
+
+from bio2bel import cli
+from bio2bel.manager.stats import PopulateRecorder
+from bio2bel.models import Action, ActionBuffer, create_all
 from bio2bel.testing import MockConnectionMixin, TemporaryConnectionMethodMixin
-from tests.constants import Manager
+from tests.constants import Manager, NUMBER_TEST_MODELS
 
 log = logging.getLogger(__name__)
 
 
+class TimedManager(Manager):
+    """A manager whose population has a timed stage."""
+
+    def populate(self, *args, **kwargs) -> None:
+        """Add five models to the store in a timed stage."""
+        with self.time_stage('models'):
+            super().populate(*args, **kwargs)
+
+
 class TestActions(TemporaryConnectionMethodMixin, MockConnectionMixin):
     """Test actions."""
 
@@ -49,3 +69,93 @@ class TestActions(TemporaryConnectionMethodMixin, MockConnectionMixin):
             action = actions[0]
             self.assertEqual(manager.module_name, action.resource)
             self.assertEqual('populate', action.action)
+
+    def test_action_buffer(self):
+        """Test that actions stored without a session are written in batches."""
+        with self.mock_global_connection:
+            with ActionBuffer(threshold=2):
+                Action.store_drop('a')
+                self.assertEqual(0, Action.count())
+                Action.store_drop('b')
+                self.assertEqual(2, Action.count())
+                Action.store_drop('c')
+                self.assertEqual(2, Action.count())
+
+            self.assertEqual(3, Action.count())
+
+    def test_action_buffer_sessions(self):
+        """Test that drop actions stored by managers for the buffer's connection are buffered too."""
+        manager = Manager(connection=self.connection)
+        manager.populate()
+
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        self.addCleanup(os.close, fd)
+        other_manager = Manager(connection=f'sqlite:///{path}')
+
+        with ActionBuffer(connection=self.connection) as buffer:
+            manager.drop_all()
+            other_manager.drop_all()
+            self.assertEqual(['drop'], [action.action for action in buffer.actions])
+            self.assertEqual(['populate'], [action.action for action in Action.ls(session=manager.session)])
+            self.assertEqual(['drop'], [action.action for action in Action.ls(session=other_manager.session)])
+
+        actions = sorted(Action.ls(session=manager.session), key=lambda action: action.id)
+        self.assertEqual(['populate', 'drop'], [action.action for action in actions])
+
+    def test_action_stats(self):
+        """Test that the statistics of a population are stored with its action."""
+        manager = TimedManager(connection=self.connection)
+        manager.populate()
+
+        action = manager.session.query(Action).filter(Action.action == 'populate').first()
+        self.assertIsNotNone(action.stats)
+        self.assertLessEqual(0, action.stats.duration)
+        self.assertEqual({'test_model': NUMBER_TEST_MODELS}, action.stats.rows)
+        self.assertEqual(['models'], list(action.stats.stages))
+
+        result = CliRunner().invoke(cli.main, ['actions', '--connection', self.connection, '--json'])
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertEqual(
+            [('test', 'populate', {'test_model': NUMBER_TEST_MODELS})],
+            [(stats['resource'], stats['action'], stats['rows']) for stats in json.loads(result.output)],
+        )
+
+        result = CliRunner().invoke(cli.main, ['actions', '--connection', self.connection, '--stats'])
+        self.assertEqual(0, result.exit_code, msg=result.output)
+        self.assertIn(f'rows in test_model: {NUMBER_TEST_MODELS}', result.output)
+
+    def test_action_stats_modes(self):
+        """Test that only the rows inserted by the population are counted when populating staging tables or in memory.
+
+        The rows copied into the real tables afterwards aren't counted again.
+        """
+        manager = TimedManager(connection=self.connection)
+        for kwargs in ({'shadow': True}, {'in_memory': True}):
+            with self.subTest(**kwargs):
+                manager.reset()
+                manager.populate(**kwargs)
+                action = (
+                    manager.session.query(Action)
+                    .filter(Action.action == 'populate')
+                    .order_by(Action.id.desc())
+                    .first()
+                )
+                self.assertEqual({'test_model': NUMBER_TEST_MODELS}, action.stats.rows)
+                self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+    @unittest.skipIf(tracemalloc.is_tracing(), 'the peak memory comes from tracemalloc while it is tracing')
+    def test_peak_memory(self):
+        """Test that the peak memory is sampled during the recording instead of over the life of the process."""
+        rss = [300]
+        with mock.patch('bio2bel.manager.stats.get_rss', side_effect=lambda: rss[0]):
+            recorder = PopulateRecorder([], sample_interval=0.01)
+            rss[0] = 500
+            time.sleep(0.1)
+            rss[0] = 400
+            self.assertEqual(500, recorder.get_stats()['peak_memory'])
+            recorder.close()
+
+            recorder = PopulateRecorder([], sample_interval=0.01)
+            self.assertEqual(400, recorder.get_stats()['peak_memory'])
+            recorder.close()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the process-wide engine registry."""
+
+from bio2bel.engines import dispose_all, get_engine
+from bio2bel.testing import TemporaryConnectionMethodMixin
+from tests.constants import Manager
+
+
+class TestEngines(TemporaryConnectionMethodMixin):
+    """Tests for sharing engines between managers."""
+
+    def test_shared(self):
+        """Test that the same engine is returned for the same connection."""
+        self.assertIs(get_engine(self.connection), get_engine(self.connection))
+
+    def test_managers_share_engine(self):
+        """Test that two managers on the same connection share an engine."""
+        m1 = Manager(connection=self.connection)
+        m2 = Manager(connection=self.connection)
+        self.assertIs(m1.engine, m2.engine)
+        self.assertIsNot(m1.session, m2.session)
+
+    def test_memory_not_shared(self):
+        """Test that in-memory databases do not get shared, since they would be different databases."""
+        self.assertIsNot(get_engine('sqlite://'), get_engine('sqlite://'))
+
+    def test_memory_schemas(self):
+        """Test that each in-memory database gets its own tables, even though they all have the same URL."""
+        for _ in range(2):
+            manager = Manager(connection='sqlite://')
+            manager.populate()
+            self.assertTrue(manager.is_populated())
+
+    def test_dispose_all(self):
+        """Test that disposing all engines clears the registry."""
+        engine = get_engine(self.connection)
+        dispose_all()
+        self.assertIsNot(engine, get_engine(self.connection))
+
+    def test_sqlite_profile(self):
+        """Test that the PRAGMAs from a SQLite profile are applied to new connections."""
+        engine = get_engine(self.connection, sqlite_profile='bulk')
+        self.assertIsNot(engine, get_engine(self.connection))
+        self.assertEqual('wal', engine.execute('PRAGMA journal_mode').scalar())
+        self.assertEqual(0, engine.execute('PRAGMA synchronous').scalar())
+        self.assertEqual(2, engine.execute('PRAGMA temp_store').scalar())
+
+    def test_invalid_sqlite_profile(self):
+        """Test that an unknown profile raises an error."""
+        with self.assertRaises(ValueError):
+            get_engine(self.connection, sqlite_profile='nope')
@@ -2,16 +2,29 @@
 
 """Tests for the Bio2BEL AbstractManager."""
 
+import os
+import sqlite3
+import tempfile
 import unittest
+from typing import Set
+from unittest import mock
 
+from click.testing import CliRunner
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 
 import tests.constants
-from bio2bel import AbstractManager
+from bio2bel import AbstractManager, cli
+from bio2bel.downloading import make_downloader
+from bio2bel.engines import dispose_all
 from bio2bel.exc import Bio2BELMissingNameError, Bio2BELModuleCaseError
-from bio2bel.models import Action
+from bio2bel.manager.staging import _reset_sequences
+from bio2bel.manager.streaming import StreamingSession
+from bio2bel.models import Action, Source, _VERIFIED_SCHEMAS, get_metadata_hash, get_stale_tables, has_schema
 from bio2bel.testing import AbstractTemporaryCacheClassMixin, MockConnectionMixin, TemporaryConnectionMethodMixin
+from bio2bel.utils import get_file_md5
 from tests.constants import NUMBER_TEST_MODELS
 
 
@@ -156,5 +169,622 @@ class TestConnectionLoading(AbstractTemporaryCacheClassMixin):
         self.assertIsNone(self.manager.get_model_by_model_id(150))
 
 
+class TestBulkLoad(TemporaryConnectionMethodMixin):
+    """Tests for bulk loading rows."""
+
+    def test_bulk_load_dicts(self):
+        """Test bulk loading dictionaries in several batches."""
+        manager = tests.constants.Manager(connection=self.connection)
+        count = manager.bulk_load(tests.constants.Model, (
+            dict(test_id=f'MODEL:{i}', name=f'name{i}')
+            for i in range(7)
+        ), batch_size=3)
+        self.assertEqual(7, count)
+        self.assertEqual(7, manager.count_model())
+        self.assertEqual('name3', manager.get_model_by_model_id('MODEL:3').name)
+
+    def test_bulk_load_tuples(self):
+        """Test bulk loading tuples with given columns."""
+        manager = tests.constants.Manager(connection=self.connection)
+        rows = [('MODEL:1', 'name1'), ('MODEL:2', 'name2')]
+        manager.bulk_load(tests.constants.Model.__table__, rows, columns=['test_id', 'name'])
+        self.assertEqual(2, manager.count_model())
+        self.assertEqual(2, manager._bulk_load_counts['test_model'])
+
+
+class StagedManager(tests.constants.Manager):
+    """A manager whose population has two stages, the second of which fails the first time."""
+
+    def __init__(self, *args, **kwargs):  # noqa: D107
+        super().__init__(*args, **kwargs)
+        self.fail = True
+        self.stages_run = []
+
+    def populate(self, *args, **kwargs) -> None:
+        """Populate the database in two stages."""
+        self.run_stage('models', self._populate_models)
+        self.run_stage('chunks', self._populate_chunks)
+
+    def _populate_models(self):
+        self.stages_run.append('models')
+        self.session.add_all(tests.constants.Model.from_id(i) for i in range(NUMBER_TEST_MODELS))
+
+    def _populate_chunks(self):
+        self.stages_run.append('chunks')
+        for offset in range(self.get_checkpoint_offset('chunks'), 3):
+            if self.fail and offset == 1:
+                raise ValueError
+            self.store_checkpoint('chunks', offset=offset + 1)
+
+
+class TestCheckpoints(TemporaryConnectionMethodMixin):
+    """Tests for resuming populations from checkpoints."""
+
+    def test_resume(self):
+        """Test that completed stages are skipped when resuming."""
+        manager = StagedManager(connection=self.connection)
+
+        with self.assertRaises(ValueError):
+            manager.populate()
+        self.assertEqual(['models', 'chunks'], manager.stages_run)
+        self.assertTrue(manager.has_checkpoints())
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+        manager.fail = False
+        manager.stages_run = []
+        manager.populate(resume=True)
+        self.assertEqual(['chunks'], manager.stages_run)
+        self.assertFalse(manager.has_checkpoints())
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+        actions = [action.action for action in Action.ls(session=manager.session)]
+        self.assertEqual({'populate', 'populate_failed'}, set(actions))
+
+    def test_no_resume(self):
+        """Test that checkpoints are ignored when not resuming."""
+        manager = StagedManager(connection=self.connection)
+
+        with self.assertRaises(ValueError):
+            manager.populate()
+
+        manager.drop_all()
+        manager.create_all()
+        manager.stages_run = []
+        with self.assertRaises(ValueError):
+            manager.populate()
+        self.assertEqual(['models', 'chunks'], manager.stages_run)
+
+    def test_cleared_on_reset(self):
+        """Test that resuming after the tables were dropped or reset runs every stage again."""
+        for clear in ('drop_all', 'reset'):
+            with self.subTest(clear=clear):
+                manager = StagedManager(connection=self.connection)
+                with self.assertRaises(ValueError):
+                    manager.populate()
+
+                getattr(manager, clear)()
+                self.assertFalse(manager.has_checkpoints())
+
+                manager.create_all()
+                manager.fail = False
+                manager.stages_run = []
+                manager.populate(resume=True)
+                self.assertEqual(['models', 'chunks'], manager.stages_run)
+                self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+                manager.drop_all()
+                manager.create_all()
+
+
+class ShadowManager(tests.constants.Manager):
+    """A manager that looks at the real tables in the middle of its population."""
+
+    def __init__(self, *args, **kwargs):  # noqa: D107
+        super().__init__(*args, **kwargs)
+        self.fail = False
+        self.reader = tests.constants.Manager(connection=self.connection)
+        self.counts_seen = []
+
+    def populate(self, *args, **kwargs) -> None:
+        """Add five models to the store, then check what readers of the real tables see."""
+        self.session.add_all(tests.constants.Model.from_id(i) for i in range(NUMBER_TEST_MODELS))
+        self.session.commit()
+        self.counts_seen.append(self.reader.count_model())
+        if self.fail:
+            raise ValueError
+
+
+class TestShadow(TemporaryConnectionMethodMixin):
+    """Tests for populating staging tables then swapping them in."""
+
+    def test_shadow(self):
+        """Test that the real tables keep their contents until the population is done."""
+        manager = ShadowManager(connection=self.connection)
+        manager.populate()
+        self.assertEqual([NUMBER_TEST_MODELS], manager.counts_seen)
+
+        manager.populate(shadow=True)
+        self.assertEqual([NUMBER_TEST_MODELS, NUMBER_TEST_MODELS], manager.counts_seen)
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+        self.assertFalse(os.path.exists(f'{self.path}.bio2bel_staging_test'))
+
+        actions = [action.action for action in Action.ls(session=manager.session)]
+        self.assertEqual(['populate', 'populate'], actions)
+
+    def test_shadow_failed(self):
+        """Test that the real tables are left alone when the population fails."""
+        manager = ShadowManager(connection=self.connection)
+        manager.populate()
+
+        manager.fail = True
+        with self.assertRaises(ValueError):
+            manager.populate(shadow=True)
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+        actions = [action.action for action in Action.ls(session=manager.session)]
+        self.assertEqual({'populate', 'populate_failed'}, set(actions))
+
+
+class TestStagingQuoting(unittest.TestCase):
+    """Tests for quoting the names and paths put into the statements for staging tables."""
+
+    def test_path_with_quote(self):
+        """Test the staging database can be attached when the path of the database has a quote in it."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bio2bel's.db")
+            manager = ShadowManager(connection=f'sqlite:///{path}')
+            manager.populate()
+            manager.populate(shadow=True)
+            self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+            self.assertFalse(os.path.exists(f'{path}.bio2bel_staging_test'))
+            dispose_all()
+
+    def test_reset_sequences(self):
+        """Test the names of the tables and columns are quoted when resetting sequences on PostgreSQL."""
+        metadata = MetaData()
+        Table('Mixed Case', metadata, Column('Order', Integer, primary_key=True))
+
+        connection = mock.MagicMock(dialect=postgresql.dialect())
+        _reset_sequences(connection, metadata)
+
+        (statement,), _ = connection.execute.call_args
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.assertEqual(
+            'SELECT setval(pg_get_serial_sequence(%(pg_get_serial_sequence_1)s, %(pg_get_serial_sequence_2)s), '
+            'coalesce(max("Mixed Case"."Order"), %(coalesce_1)s)) AS setval_1 \nFROM "Mixed Case"',
+            str(compiled),
+        )
+        self.assertEqual(['"Mixed Case"', 'Order'], [compiled.params[f'pg_get_serial_sequence_{i}'] for i in (1, 2)])
+
+
+class SourceManager(tests.constants.Manager):
+    """A manager that populates from a downloaded file."""
+
+    url: str
+    path: str
+
+    def populate(self, *args, **kwargs) -> None:
+        """Add a model for each line in the downloaded file."""
+        with open(make_downloader(self.url, self.path)()) as file:
+            self.session.add_all(tests.constants.Model.from_id(int(line)) for line in file)
+        self.session.commit()
+
+
+class TestSources(TemporaryConnectionMethodMixin):
+    """Tests for checking if the source files changed since the last population."""
+
+    def setUp(self):
+        """Make an upstream file and a path where it gets cached."""
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.upstream_path = os.path.join(self.directory.name, 'upstream.txt')
+        self._write_upstream(range(NUMBER_TEST_MODELS))
+
+        self.manager = SourceManager(connection=self.connection)
+        self.manager.url = 'file://' + self.upstream_path
+        self.manager.path = os.path.join(self.directory.name, 'cached.txt')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+        super().tearDown()
+
+    def _write_upstream(self, ids):
+        with open(self.upstream_path, 'w') as file:
+            print(*ids, sep='\n', file=file)
+
+    def test_sources_changed(self):
+        """Test the checksums of the source files are stored and compared."""
+        self.assertTrue(self.manager.sources_changed(), msg='never populated')
+
+        self.manager.populate()
+        self.assertEqual(NUMBER_TEST_MODELS, self.manager.count_model())
+        sources = Source.get_last('test', session=self.manager.session)
+        self.assertEqual([self.manager.url], [source.url for source in sources])
+
+        self.assertFalse(self.manager.sources_changed())
+
+        self._write_upstream(range(NUMBER_TEST_MODELS + 1))
+        self.assertTrue(self.manager.sources_changed())
+        self.assertEqual(get_file_md5(self.upstream_path), get_file_md5(self.manager.path), msg='cache not updated')
+
+        self.manager.populate(shadow=True)
+        self.assertEqual(NUMBER_TEST_MODELS + 1, self.manager.count_model())
+        self.assertFalse(self.manager.sources_changed())
+
+    def _patch_source(self):
+        """Set the source on the class, since the command line makes its own manager."""
+        return mock.patch.multiple(SourceManager, url=self.manager.url, path=self.manager.path, create=True)
+
+    def test_populate_if_changed(self):
+        """Test populating from the command line skips unchanged sources and repopulates changed ones."""
+        main = SourceManager.get_cli()
+        args = ['--connection', self.connection, 'populate', '--if-changed']
+
+        with self._patch_source():
+            result = CliRunner().invoke(main, args)
+            self.assertEqual(0, result.exit_code, msg=result.output)
+            self.assertEqual(NUMBER_TEST_MODELS, self.manager.count_model())
+
+            result = CliRunner().invoke(main, args)
+            self.assertEqual(0, result.exit_code, msg=result.output)
+            self.assertIn('Sources unchanged', result.output)
+
+            self._write_upstream(range(NUMBER_TEST_MODELS + 1))
+            result = CliRunner().invoke(main, args)
+            self.assertEqual(0, result.exit_code, msg=result.output)
+            self.assertIn('Deleting the previous instance', result.output)
+
+        self.assertEqual(NUMBER_TEST_MODELS + 1, self.manager.count_model())
+        self.assertFalse(self.manager.sources_changed())
+
+    def test_populate_all_if_changed(self):
+        """Test populating all modules repopulates the ones whose sources changed."""
+        args = ['populate', '--connection', self.connection, '--if-changed']
+
+        with self._patch_source(), mock.patch.dict(cli.MANAGERS, {'test': SourceManager}, clear=True):
+            self.manager.populate()
+
+            result = CliRunner().invoke(cli.main, args)
+            self.assertEqual(0, result.exit_code, msg=result.output)
+            self.assertIn('sources for test are unchanged', result.output)
+
+            self._write_upstream(range(NUMBER_TEST_MODELS + 1))
+            result = CliRunner().invoke(cli.main, args)
+            self.assertEqual(0, result.exit_code, msg=result.output)
+            self.assertIn('deleting the previous instance of test', result.output)
+            self.assertEqual(NUMBER_TEST_MODELS + 1, self.manager.count_model())
+
+            result = cli._populate_worker('test', self.connection, reset=False, force=False, resume=False, if_changed=True)
+            self.assertEqual('skipped', result.status)
+
+            self._write_upstream(range(NUMBER_TEST_MODELS + 2))
+            result = cli._populate_worker('test', self.connection, reset=False, force=False, resume=False, if_changed=True)
+            self.assertEqual('populated', result.status, msg=result.message)
+            self.assertEqual(NUMBER_TEST_MODELS + 2, self.manager.count_model())
+
+    def test_sources_changed_after_drop(self):
+        """Test the sources count as changed after the tables are dropped or reset."""
+        for clear in ('drop_all', 'reset'):
+            with self.subTest(clear=clear):
+                self.manager.populate()
+                self.assertFalse(self.manager.sources_changed())
+
+                getattr(self.manager, clear)()
+                self.assertIsNone(Source.get_last('test', session=self.manager.session))
+                self.assertTrue(self.manager.sources_changed(), msg='not populated')
+                self.manager.create_all()
+
+
+class TestStreaming(TemporaryConnectionMethodMixin):
+    """Tests for adding objects to the session in batches."""
+
+    def test_streaming(self):
+        """Test that objects are committed and expunged in batches."""
+        manager = tests.constants.Manager(connection=self.connection)
+
+        with manager.streaming(batch_size=2) as session:
+            session.add_all(tests.constants.Model.from_id(i) for i in range(NUMBER_TEST_MODELS))
+            self.assertEqual(NUMBER_TEST_MODELS % 2, len(manager.session.identity_map) + len(manager.session.new))
+
+        self.assertEqual(NUMBER_TEST_MODELS, session.count)
+        self.assertEqual(NUMBER_TEST_MODELS // 2 + 1, session.flushes)
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+    def test_memory_limit(self):
+        """Test that objects are committed early when the memory is over the limit."""
+        manager = tests.constants.Manager(connection=self.connection)
+        session = StreamingSession(manager.session, memory_limit=0, check_every=1)
+
+        with mock.patch('bio2bel.manager.streaming.get_rss', return_value=2 ** 20), \
+                self.assertLogs('bio2bel.manager.streaming', level='WARNING'):
+            session.add_all(tests.constants.Model.from_id(i) for i in range(NUMBER_TEST_MODELS))
+
+        # The checks back off while the memory stays over the limit, so the early commits are after the 1st, 2nd,
+        # and 4th objects
+        self.assertEqual(3, session.flushes)
+        session.flush()
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+        with mock.patch('bio2bel.manager.streaming.get_rss', return_value=0):
+            session.add_all(tests.constants.Model.from_id(NUMBER_TEST_MODELS + i) for i in range(4))
+        self.assertEqual(1, session._check_interval, msg='the checks should stop backing off under the limit')
+
+
+def _get_index_names(manager) -> Set[str]:
+    return {index['name'] for index in inspect(manager.engine).get_indexes('test_model')}
+
+
+class IndexManager(tests.constants.Manager):
+    """A manager that looks at the indexes in the middle of its population."""
+
+    def __init__(self, *args, **kwargs):  # noqa: D107
+        super().__init__(*args, **kwargs)
+        self.fail = False
+        self.indexes_seen = None
+
+    def populate(self, *args, **kwargs) -> None:
+        """Add five models to the store, then check which indexes exist."""
+        self.session.add_all(tests.constants.Model.from_id(i) for i in range(NUMBER_TEST_MODELS))
+        self.session.commit()
+        self.indexes_seen = _get_index_names(self)
+        if self.fail:
+            raise ValueError
+
+
+class TestDeferIndexes(TemporaryConnectionMethodMixin):
+    """Tests for building the indexes after the population."""
+
+    def test_defer_indexes(self):
+        """Test the non-unique indexes are dropped during the population and built again after."""
+        manager = IndexManager(connection=self.connection)
+        indexes = _get_index_names(manager)
+        self.assertIn('ix_test_model_name', indexes)
+
+        manager.populate(defer_indexes=True)
+        self.assertNotIn('ix_test_model_name', manager.indexes_seen)
+        self.assertIn('ix_test_model_test_id', manager.indexes_seen, msg='unique indexes should be kept')
+        self.assertEqual(indexes, _get_index_names(manager))
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+    def test_defer_indexes_failed(self):
+        """Test the indexes are built again and the failure is recorded when the population fails."""
+        manager = IndexManager(connection=self.connection)
+        indexes = _get_index_names(manager)
+
+        manager.fail = True
+        with self.assertRaises(ValueError):
+            manager.populate(defer_indexes=True)
+        self.assertEqual(indexes, _get_index_names(manager))
+
+        actions = [action.action for action in Action.ls(session=manager.session)]
+        self.assertEqual(['populate_failed'], actions)
+
+    def test_defer_missing_indexes(self):
+        """Test only the indexes that existed are counted as dropped."""
+        manager = IndexManager(connection=self.connection)
+        manager.engine.execute('DROP INDEX ix_test_model_name')
+
+        with self.assertLogs('bio2bel.manager.abstract_manager', level='INFO') as logs:
+            manager.populate(defer_indexes=True)
+        self.assertIn('dropped 0 indexes', '\n'.join(logs.output))
+        self.assertIn('ix_test_model_name', _get_index_names(manager))
+
+
+class LockCheckingManager(ShadowManager):
+    """A manager that tries to write to the file in the middle of its population and while its tables are copied."""
+
+    def __init__(self, *args, **kwargs):  # noqa: D107
+        super().__init__(*args, **kwargs)
+        self.write_errors = []
+        self.tables_seen = set()
+
+    def _try_write(self) -> None:
+        with sqlite3.connect(self.reader.engine.url.database, timeout=0) as connection:
+            try:
+                connection.execute(
+                    'INSERT INTO bio2bel_action (resource, action, created) VALUES (?, ?, ?)',
+                    ('other', 'drop', '2020-01-01 00:00:00'),
+                )
+            except sqlite3.OperationalError as e:
+                self.write_errors.append(str(e))
+
+    def populate(self, *args, **kwargs) -> None:
+        """Try to write to the file, then populate the database."""
+        self._try_write()
+        self.tables_seen.update(inspect(self.engine).get_table_names())
+        super().populate(*args, **kwargs)
+
+    def _copy_tables(self, *args, **kwargs) -> None:
+        self._try_write()
+        super()._copy_tables(*args, **kwargs)
+
+
+class TestInMemory(TemporaryConnectionMethodMixin):
+    """Tests for populating the tables in memory."""
+
+    def test_in_memory(self):
+        """Test that the population is copied to the file and the action is stored after."""
+        manager = ShadowManager(connection=self.connection)
+        Action.store_drop('other', session=manager.session)
+
+        manager.populate(in_memory=True)
+        self.assertEqual([0], manager.counts_seen, msg='the file should not be written during the population')
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+        actions = [action.action for action in Action.ls(session=manager.session)]
+        self.assertEqual({'drop', 'populate'}, set(actions), msg='other contents of the database should be kept')
+
+    def test_in_memory_failed(self):
+        """Test that nothing is copied to the file when the population fails."""
+        manager = ShadowManager(connection=self.connection)
+        manager.fail = True
+
+        with self.assertRaises(ValueError):
+            manager.populate(in_memory=True)
+        self.assertEqual(0, manager.count_model())
+
+        actions = [action.action for action in Action.ls(session=manager.session)]
+        self.assertEqual(['populate_failed'], actions)
+
+    def test_in_memory_invalid(self):
+        """Test that populating in memory needs a SQLite file."""
+        manager = tests.constants.Manager(connection='sqlite://')
+        with self.assertRaises(ValueError):
+            manager.populate(in_memory=True)
+
+    def test_in_memory_resume(self):
+        """Test that a population in memory can't be resumed."""
+        manager = tests.constants.Manager(connection=self.connection)
+        with self.assertRaises(ValueError):
+            manager.populate(in_memory=True, resume=True)
+
+    def test_in_memory_locked(self):
+        """Test that other connections can only write to the file until the tables are copied."""
+        manager = LockCheckingManager(connection=self.connection)
+        manager.engine.execute('CREATE TABLE test_other (id INTEGER PRIMARY KEY)')
+        tests.constants.Manager(connection=self.connection).populate()
+
+        manager.populate(in_memory=True)
+        self.assertEqual([NUMBER_TEST_MODELS], manager.counts_seen)
+        self.assertEqual(['database is locked'], manager.write_errors, msg='only the write while copying should fail')
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+        self.assertNotIn('test_other', manager.tables_seen, msg='other tables should not be copied into memory')
+        self.assertIn('test_model', manager.tables_seen)
+
+        actions = [action.action for action in Action.ls(session=manager.session)]
+        self.assertEqual(2, actions.count('populate'))
+        self.assertEqual(1, actions.count('drop'), msg='the write during the population should be kept')
+
+
+ChangedBase = declarative_base()
+
+
+class ChangedModel(ChangedBase):
+    """A newer version of the test model with an extra column."""
+
+    __tablename__ = 'test_model'
+
+    id = Column(Integer, primary_key=True)
+
+    test_id = Column(String(15), nullable=False, index=True, unique=True)
+    name = Column(String(255), nullable=False, index=True)
+    extra = Column(String(255))
+
+
+class ChangedManager(tests.constants.Manager):
+    """A manager whose model gained a column since the tables were created."""
+
+    @property
+    def _base(self):
+        return ChangedBase
+
+    def count_model(self) -> int:
+        """Count the changed model."""
+        return self._count_model(ChangedModel)
+
+    def populate(self, *args, **kwargs) -> None:
+        """Add five models with the extra column to the store."""
+        self.session.add_all([
+            ChangedModel(test_id=str(model_id), name=str(model_id), extra=str(model_id))
+            for model_id in range(NUMBER_TEST_MODELS)
+        ])
+        self.session.commit()
+
+
+class TestReset(TemporaryConnectionMethodMixin):
+    """Tests for emptying the tables."""
+
+    def test_reset(self):
+        """Test that the tables are emptied without being dropped."""
+        manager = tests.constants.Manager(connection=self.connection)
+        manager.populate()
+
+        with mock.patch.object(manager, 'drop_all') as mock_drop_all:
+            manager.reset()
+            mock_drop_all.assert_not_called()
+        self.assertEqual(0, manager.count_model())
+
+        manager.populate()
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+        actions = sorted(Action.ls(session=manager.session), key=lambda action: action.id)
+        self.assertEqual(['populate', 'drop', 'populate'], [action.action for action in actions])
+
+    def test_reset_changed(self):
+        """Test that the tables are dropped and created again when they don't match the declarative base."""
+        tests.constants.Manager(connection=self.connection).populate()
+
+        # In a new process, the model has a new column
+        _VERIFIED_SCHEMAS.clear()
+        manager = ChangedManager(connection=self.connection)
+        self.assertFalse(has_schema(manager.engine, manager._metadata))
+
+        with mock.patch.object(manager, 'drop_all', wraps=manager.drop_all) as mock_drop_all:
+            manager.reset()
+            mock_drop_all.assert_called_once()
+        self.assertEqual(0, manager.count_model())
+        self.assertTrue(has_schema(manager.engine, manager._metadata))
+
+        manager.populate()
+        self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+
+    def test_reset_without_inspecting(self):
+        """Test that the tables aren't inspected when the schema is recorded as created."""
+        manager = tests.constants.Manager(connection=self.connection)
+        manager.populate()
+
+        with mock.patch('sqlalchemy.engine.reflection.Inspector.get_columns') as mock_get_columns:
+            manager.reset()
+            mock_get_columns.assert_not_called()
+        self.assertEqual(0, manager.count_model())
+
+
+class TestSchema(TemporaryConnectionMethodMixin):
+    """Tests that the schema is only checked once."""
+
+    def test_skip_create_all(self):
+        """Test the tables are not checked again after the first instantiation."""
+        tests.constants.Manager(connection=self.connection)
+
+        with mock.patch.object(tests.constants.TestBase.metadata, 'create_all') as mock_create_all:
+            tests.constants.Manager(connection=self.connection)
+            mock_create_all.assert_not_called()
+
+            # In a new process, the hash is looked up in the database
+            _VERIFIED_SCHEMAS.clear()
+            tests.constants.Manager(connection=self.connection)
+            mock_create_all.assert_not_called()
+
+    def test_drop_clears(self):
+        """Test that dropping the tables means they are created again on the next instantiation."""
+        manager = tests.constants.Manager(connection=self.connection)
+        manager.drop_all()
+
+        manager = tests.constants.Manager(connection=self.connection)
+        self.assertFalse(manager.is_populated())
+
+    def test_stale_tables(self):
+        """Test that the schema isn't recorded when existing tables don't match the declarative base."""
+        tests.constants.Manager(connection=self.connection)
+
+        manager = ChangedManager(connection=self.connection)
+        self.assertFalse(has_schema(manager.engine, manager._metadata))
+        self.assertEqual(['test_model'], get_stale_tables(manager.engine, manager._metadata))
+
+        manager.create_all()
+        self.assertFalse(has_schema(manager.engine, manager._metadata), msg='create_all does not change the table')
+
+        manager.drop_all()
+        manager.create_all()
+        self.assertTrue(has_schema(manager.engine, manager._metadata))
+
+    def test_metadata_hash(self):
+        """Test the metadata hash is stable."""
+        metadata = tests.constants.TestBase.metadata
+        self.assertEqual(get_metadata_hash(metadata), get_metadata_hash(metadata))
+        self.assertNotEqual(get_metadata_hash(metadata), get_metadata_hash(Action.metadata))
+
+
 if __name__ == '__main__':
     unittest.main()
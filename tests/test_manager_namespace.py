@@ -2,16 +2,35 @@
 
 """Testing constants and utilities for Bio2BEL."""
 
+import functools
+import gzip
+import json
 import logging
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
 from click.testing import CliRunner
+from sqlalchemy import literal
+from sqlalchemy.dialects import postgresql
 
 import pybel
-from bio2bel.manager.namespace_manager import BELNamespaceManagerMixin, Bio2BELMissingNamespaceModelError
+from bel_resources import write_annotation, write_namespace
+from bio2bel.manager.bloom import BloomFilter, screen_terms
+from bio2bel.manager.namespace_index import NamespaceIndex, write_namespace_index
+from bio2bel.manager.namespace_manager import (
+    BELNamespaceManagerMixin, Bio2BELMissingNamespaceModelError, NamespaceUpdate, _iterate_last_values,
+    _write_bel_resource,
+)
+from bio2bel.models import Action
 from bio2bel.testing import AbstractTemporaryCacheMethodMixin, MockConnectionMixin, TemporaryConnectionMethodMixin
+from bio2bel.utils import NamespaceHasher, get_changed_chunks
 from pybel import BELGraph
 from pybel.manager.models import Namespace, NamespaceEntry
-from tests.constants import Manager, Model, NUMBER_TEST_MODELS, TEST_MODEL_ID_FORMAT, TEST_MODEL_NAME_FORMAT
+from tests.constants import (
+    Manager, Model, NUMBER_TEST_MODELS, TEST_MODEL_ID_FORMAT, TEST_MODEL_NAME_FORMAT, TestBase,
+)
 
 log = logging.getLogger(__name__)
 
@@ -23,6 +42,10 @@ class NamespaceManager(Manager, BELNamespaceManagerMixin):
 
     # automate by defining identifier column?
 
+    @staticmethod
+    def _get_encoding(model: Model) -> str:
+        return 'A'
+
     def _create_namespace_entry_from_model(self, model: Model, namespace=None):
         return NamespaceEntry(
             name=model.name,
@@ -31,6 +54,17 @@ class NamespaceManager(Manager, BELNamespaceManagerMixin):
         )
 
 
+def _strip_created(text: str) -> str:
+    """Remove the line with the time a BEL resource file was created, so files written at different times compare."""
+    return ''.join(line for line in text.splitlines(keepends=True) if not line.startswith('CreatedDateTime='))
+
+
+class ProjectedNamespaceManager(NamespaceManager):
+    """A namespace manager that declares the column for its encoding."""
+
+    namespace_encoding_column = literal('A')
+
+
 class TestFailure(TemporaryConnectionMethodMixin):
     """Test various failures and exceptions."""
 
@@ -63,6 +97,59 @@ class TestFailure(TemporaryConnectionMethodMixin):
             _TestManager(connection=self.connection)
 
 
+class ConnectionNamespaceManager(BELNamespaceManagerMixin):
+    """A namespace manager that uses the mixin without the abstract manager."""
+
+    module_name = 'test'
+    namespace_model = Model
+
+    def _get_query(self, model):
+        return self.session.query(model)
+
+    def _count_model(self, model) -> int:
+        return self._get_query(model).count()
+
+    def _create_namespace_entry_from_model(self, model: Model, namespace=None):
+        return NamespaceEntry(name=model.name, identifier=model.test_id, namespace=namespace)
+
+    @staticmethod
+    def _get_old_entry_identifiers(namespace: Namespace):
+        # Overridden so updating inserts the new entries instead of comparing them in a temporary table
+        return {entry.identifier for entry in namespace.entries}
+
+
+class TestWithoutAbstractManager(TemporaryConnectionMethodMixin):
+    """Test the mixin can make and update a namespace without the abstract manager."""
+
+    def setUp(self):
+        """Make a manager with the test models in its database."""
+        super().setUp()
+        self.manager = ConnectionNamespaceManager(connection=self.connection)
+        TestBase.metadata.create_all(self.manager.engine)
+        self.manager.session.add_all(Model.from_id(model_id) for model_id in range(NUMBER_TEST_MODELS))
+        self.manager.session.commit()
+
+    def test_make_namespace(self):
+        """Test the entries are inserted through the session."""
+        with mock.patch.object(
+            self.manager.session, 'bulk_insert_mappings', wraps=self.manager.session.bulk_insert_mappings,
+        ) as mock_bulk_insert_mappings:
+            namespace = self.manager._make_namespace()
+            mock_bulk_insert_mappings.assert_called_once()
+
+        self.assertEqual(NUMBER_TEST_MODELS, namespace.entries.count())
+
+    def test_update_namespace(self):
+        """Test new entries are inserted through the session."""
+        namespace = self.manager._make_namespace()
+        self.manager.session.add(Model.from_id(NUMBER_TEST_MODELS))
+        self.manager.session.commit()
+
+        update = self.manager._update_namespace(namespace)
+        self.assertEqual(NamespaceUpdate(new=1, changed=0, removed=0), update)
+        self.assertEqual(NUMBER_TEST_MODELS + 1, namespace.entries.count())
+
+
 class TestAwesome(AbstractTemporaryCacheMethodMixin):
     """Tests for namespace management."""
 
@@ -109,6 +196,37 @@ class TestAwesome(AbstractTemporaryCacheMethodMixin):
         # self.assertEqual(0, self.manager.session.query(Namespace).count())
         # self.assertEqual(0, self.manager.session.query(NamespaceEntry).count())
 
+    def test_make_namespace_in_pages(self):
+        """Test the entries are inserted while the models are still being loaded in pages."""
+        iterate_models = functools.partial(self.manager._iterate_namespace_models, batch_size=2)
+        bulk_load = functools.partial(self.manager.bulk_load, batch_size=2)
+        with mock.patch.object(self.manager, '_iterate_namespace_models', iterate_models), \
+                mock.patch.object(self.manager, 'bulk_load', bulk_load):
+            namespace = self.manager._make_namespace()
+
+        self.assertEqual(
+            {TEST_MODEL_ID_FORMAT.format(i) for i in range(NUMBER_TEST_MODELS)},
+            {entry.identifier for entry in namespace.entries},
+        )
+
+    def test_make_namespace_bulk(self):
+        """Test the entries are inserted in batches without going through the session."""
+        with mock.patch.object(self.manager.session, 'add_all') as mock_add_all:
+            namespace = self.manager._make_namespace()
+            mock_add_all.assert_not_called()
+
+        self.assertEqual(NUMBER_TEST_MODELS, self.manager._bulk_load_counts[NamespaceEntry.__tablename__])
+        self.assertEqual(NUMBER_TEST_MODELS, namespace.entries.count())
+
+    def test_make_namespace_failed(self):
+        """Test the namespace is removed if its entries can't be inserted."""
+        with mock.patch.object(self.manager, '_create_namespace_entry_from_model', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                self.manager._make_namespace()
+
+        self.assertIsNone(self.manager._get_default_namespace())
+        self.assertEqual(0, self.manager.session.query(NamespaceEntry).count())
+
     def test_update_namespace(self):
         """Test when a namespace must be updated."""
         namespace = self.manager._make_namespace()
@@ -124,9 +242,77 @@ class TestAwesome(AbstractTemporaryCacheMethodMixin):
         self.manager.session.add_all(models)
         self.manager.session.commit()
 
-        self.manager._update_namespace(namespace)
+        update = self.manager._update_namespace(namespace)
+        self.assertEqual(NamespaceUpdate(new=_number_to_add, changed=0, removed=0), update)
         self.assertEqual(NUMBER_TEST_MODELS + _number_to_add, namespace.entries.count())
 
+        # nothing changed since the last update
+        self.assertEqual(NamespaceUpdate(new=0, changed=0, removed=0), self.manager._update_namespace(namespace))
+
+    def test_update_namespace_unchanged(self):
+        """Test updating right after making the namespace changes nothing."""
+        namespace = self.manager._make_namespace()
+        self.assertEqual(NamespaceUpdate(new=0, changed=0, removed=0), self.manager._update_namespace(namespace))
+
+    def test_update_namespace_old_entry_identifiers(self):
+        """Test overriding the old entry identifiers decides which entries are added."""
+        namespace = self.manager._make_namespace()
+        self.manager.session.query(NamespaceEntry).filter(
+            NamespaceEntry.identifier == TEST_MODEL_ID_FORMAT.format(0),
+        ).delete()
+        self.manager.session.commit()
+
+        known = {TEST_MODEL_ID_FORMAT.format(i) for i in range(NUMBER_TEST_MODELS)}
+        with mock.patch.object(NamespaceManager, '_get_old_entry_identifiers', return_value=known):
+            self.assertEqual(NamespaceUpdate(new=0, changed=0, removed=0), self.manager._update_namespace(namespace))
+
+        with mock.patch.object(NamespaceManager, '_get_old_entry_identifiers', return_value=set()):
+            self.assertEqual(
+                NamespaceUpdate(new=NUMBER_TEST_MODELS, changed=0, removed=0),
+                self.manager._update_namespace(namespace),
+            )
+
+    def test_update_namespace_changed_removed(self):
+        """Test that renamed entries are updated and missing entries are only deleted when requested."""
+        namespace = self.manager._make_namespace()
+
+        renamed, removed = self.manager.session.query(Model).order_by(Model.id).limit(2).all()
+        renamed.name = 'renamed'
+        removed_identifier = removed.test_id
+        self.manager.session.delete(removed)
+        self.manager.session.commit()
+
+        update = self.manager._update_namespace(namespace)
+        self.assertEqual(NamespaceUpdate(new=0, changed=1, removed=1), update)
+        self.assertEqual(NUMBER_TEST_MODELS, namespace.entries.count())
+        self.assertEqual('renamed', namespace.entries.filter_by(identifier=renamed.test_id).one().name)
+
+        update = self.manager._update_namespace(namespace, remove=True)
+        self.assertEqual(NamespaceUpdate(new=0, changed=0, removed=1), update)
+        self.assertEqual(NUMBER_TEST_MODELS - 1, namespace.entries.count())
+        self.assertIsNone(namespace.entries.filter_by(identifier=removed_identifier).one_or_none())
+
+    def test_drop_namespace(self):
+        """Test dropping a namespace deletes its entries without loading them."""
+        self.manager._make_namespace()
+        self.manager.session.expunge_all()
+
+        with mock.patch.object(self.manager.session, 'delete', wraps=self.manager.session.delete) as mock_delete:
+            namespace = self.manager.drop_bel_namespace()
+            mock_delete.assert_called_once_with(namespace)
+
+        self.assertIsNone(self.manager._get_default_namespace())
+        self.assertEqual(0, self.manager.session.query(NamespaceEntry).count())
+
+    def test_drop_namespace_chunked(self):
+        """Test dropping a namespace in chunks."""
+        self.manager._make_namespace()
+        self.assertIsNotNone(self.manager.drop_bel_namespace(chunk_size=2))
+        self.assertIsNone(self.manager._get_default_namespace())
+        self.assertEqual(0, self.manager.session.query(NamespaceEntry).count())
+
+        self.assertIsNone(self.manager.drop_bel_namespace(chunk_size=2), msg='nothing left to drop')
+
     def test_add_namespace_to_graph(self):
         """Test adding namespace information to a graph."""
         graph = BELGraph()
@@ -137,6 +323,543 @@ class TestAwesome(AbstractTemporaryCacheMethodMixin):
         self.assertIn(self.manager.module_name, graph.annotation_list['bio2bel'])
 
 
+class TestWriteDirectory(AbstractTemporaryCacheMethodMixin):
+    """Tests for writing the namespace files."""
+
+    Manager = NamespaceManager
+
+    def populate(self):
+        """Populate the manager."""
+        self.manager.populate()
+
+    def test_write_directory(self):
+        """Test the namespace files are written in a single pass and only when the namespace changed."""
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch.object(
+                self.manager, '_iterate_namespace_models', wraps=self.manager._iterate_namespace_models,
+            ) as mock_iterate:
+                self.assertTrue(self.manager.write_directory(directory))
+                mock_iterate.assert_called_once()
+
+            self.assertEqual(
+                {
+                    'test.belns', 'test-names.belns', 'test.belns.mapping', 'test.belns.md5', 'test.belns.merkle',
+                    'test.belns.bloom',
+                },
+                set(os.listdir(directory)),
+            )
+
+            with open(os.path.join(directory, 'test.belns')) as file:
+                identifiers = [line.strip() for line in file if line.startswith(TEST_MODEL_ID_FORMAT[:6])]
+            self.assertEqual([f'{TEST_MODEL_ID_FORMAT.format(i)}|A' for i in range(NUMBER_TEST_MODELS)], identifiers)
+
+            with open(os.path.join(directory, 'test.belns.mapping')) as file:
+                mapping = json.load(file)
+            self.assertEqual(TEST_MODEL_NAME_FORMAT.format(0), mapping[TEST_MODEL_ID_FORMAT.format(0)])
+
+            with open(os.path.join(directory, 'test.belns.md5')) as file:
+                self.assertEqual(self.manager.get_namespace_hash(), file.read().strip())
+
+            self.assertFalse(self.manager.write_directory(directory), msg='namespace did not change')
+
+
+class TestStreamingWriters(TemporaryConnectionMethodMixin):
+    """Tests for streaming the BEL namespace files in sorted order from the database."""
+
+    def setUp(self):
+        """Set up a manager that streams and one that doesn't, on the same database."""
+        super().setUp()
+        self.manager = ProjectedNamespaceManager(connection=self.connection)
+        self.manager.populate()
+        # this one can't determine its encoding column, so it builds dictionaries
+        self.dict_manager = NamespaceManager(connection=self.connection)
+
+    def _write(self, manager, method, **kwargs) -> str:
+        file = StringIO()
+        getattr(manager, method)(file, **kwargs)
+        return file.getvalue()
+
+    def test_same_output(self):
+        """Test the streamed files are the same as the ones written from dictionaries."""
+        for method, kwargs in [
+            ('write_bel_namespace', {}),
+            ('write_bel_namespace', {'use_names': True}),
+            ('write_bel_annotation', {}),
+            ('write_bel_namespace_mappings', {}),
+        ]:
+            with self.subTest(method=method, **kwargs):
+                with mock.patch.object(self.manager, '_iterate_namespace_models') as mock_iterate:
+                    streamed = self._write(self.manager, method, **kwargs)
+                    mock_iterate.assert_not_called()
+
+                self.assertEqual(self._write(self.dict_manager, method, **kwargs), streamed)
+
+    def test_same_output_ties(self):
+        """Test repeated keys and strings that collations sort differently are streamed like the dictionaries."""
+        # the later model for a repeated name has the smaller identifier, so ordering by value would keep the other
+        for test_id, name in [('MODEL:b', 'dup'), ('MODEL:a', 'dup'), ('MODEL:B', 'b'), ('MODEL:é', 'B'), ('x', 'é')]:
+            self.manager.session.add(Model(test_id=test_id, name=name))
+        self.manager.session.commit()
+
+        self.assertEqual(
+            sorted(self.dict_manager._get_namespace_identifier_to_name().items()),
+            list(self.manager._iterate_sorted_namespace_pairs('identifier', 'name')),
+        )
+        name_to_identifier = {name: identifier for identifier, name, _ in self.dict_manager._iterate_namespace_tuples()}
+        self.assertEqual('MODEL:a', name_to_identifier['dup'])
+        self.assertEqual(
+            sorted(name_to_identifier.items()),
+            list(self.manager._iterate_sorted_namespace_pairs('name', 'identifier')),
+        )
+
+        for method, kwargs in [
+            ('write_bel_namespace', {}),
+            ('write_bel_namespace', {'use_names': True}),
+            ('write_bel_namespace_mappings', {}),
+        ]:
+            with self.subTest(method=method, **kwargs):
+                self.assertEqual(
+                    _strip_created(self._write(self.dict_manager, method, **kwargs)),
+                    _strip_created(self._write(self.manager, method, **kwargs)),
+                )
+
+    def test_binary_collation(self):
+        """Test strings are ordered by their code points on PostgreSQL instead of with the database's collation."""
+        with mock.patch.object(self.manager.engine.dialect, 'name', 'postgresql'):
+            query = self.manager._get_sorted_namespace_query('name', 'encoding')
+        sql = str(query.statement.compile(dialect=postgresql.dialect()))
+        self.assertIn('ORDER BY test_model.name COLLATE "C", test_model.id', sql)
+
+    def test_same_as_bel_resources(self):
+        """Test the streamed files are the same, byte for byte, as the ones bel_resources writes for the same data."""
+        values = {'b': 'GP', 'a': 'A', ' padded ': 'RGP', '': 'A', 'é': 'B', 'B': 'O', 12: 'A', 'Z z': 'PR'}
+        sorted_values = sorted(values.items(), key=lambda item: str(item[0]))
+        for write_function, kwargs in [
+            (write_namespace, dict(namespace_name='test', namespace_keyword='TEST', namespace_created='2020-01-01')),
+            (write_annotation, dict(keyword='TEST', citation_name='test', description='', created='2020-01-01')),
+        ]:
+            with self.subTest(write_function=write_function.__name__):
+                expected = StringIO()
+                write_function(values={str(key): value for key, value in values.items()}, file=expected, **kwargs)
+
+                streamed = StringIO()
+                _write_bel_resource(write_function, streamed, iter(sorted_values), **kwargs)
+                self.assertEqual(expected.getvalue(), streamed.getvalue())
+
+    def test_unexpected_header(self):
+        """Test the values are passed through as a dictionary if the header doesn't end like expected."""
+        def write_function(values, file, delimiter):
+            file.write(f'[Values]\n{json.dumps(sorted(dict(values).items()))}\n')
+
+        file = StringIO()
+        with self.assertLogs('bio2bel.manager.namespace_manager', level='WARNING'):
+            _write_bel_resource(write_function, file, iter([('a', 'A'), ('b', 'B')]))
+        self.assertEqual('[Values]\n[["a", "A"], ["b", "B"]]\n', file.getvalue())
+
+    def test_last_values(self):
+        """Test only the last value of each key is kept, like in a dictionary."""
+        pairs = [('a', 'x'), ('a', 'y'), ('b', 'z')]
+        self.assertEqual(list(dict(pairs).items()), list(_iterate_last_values(pairs)))
+        self.assertEqual([], list(_iterate_last_values([])))
+
+    def test_write_directory_compressed(self):
+        """Test the BEL namespace files can be compressed."""
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertTrue(self.manager.write_directory(directory, compress=True))
+            self.assertEqual(
+                {
+                    'test.belns.gz', 'test-names.belns.gz', 'test.belns.mapping', 'test.belns.md5',
+                    'test.belns.merkle', 'test.belns.bloom',
+                },
+                set(os.listdir(directory)),
+            )
+
+            with gzip.open(os.path.join(directory, 'test.belns.gz'), 'rt') as file:
+                self.assertEqual(self._write(self.manager, 'write_bel_namespace'), file.read())
+
+            with open(os.path.join(directory, 'test.belns.md5')) as file:
+                self.assertEqual(self.manager.get_namespace_hash(), file.read().strip())
+
+            self.assertFalse(self.manager.write_directory(directory, compress=True), msg='namespace did not change')
+            self.assertTrue(self.manager.write_directory(directory), msg='uncompressed files are missing')
+
+    def test_write_directory_two_queries(self):
+        """Test the files are streamed from one query ordered by identifier and one by name."""
+        for verify in (False, True):
+            with self.subTest(verify=verify), tempfile.TemporaryDirectory() as directory:
+                with mock.patch.object(
+                    self.manager, '_iterate_sorted_namespace_pairs', wraps=self.manager._iterate_sorted_namespace_pairs,
+                ) as mock_iterate:
+                    self.assertTrue(self.manager.write_directory(directory, verify=verify))
+                self.assertEqual(
+                    [('identifier', 'name', 'encoding'), ('name', 'encoding')],
+                    [call.args for call in mock_iterate.call_args_list],
+                )
+                self.assertFalse(any(name.endswith('.tmp') for name in os.listdir(directory)))
+
+                with tempfile.TemporaryDirectory() as dict_directory:
+                    self.assertTrue(self.dict_manager.write_directory(dict_directory))
+                    for name in ('test.belns', 'test-names.belns', 'test.belns.mapping', 'test.belns.md5'):
+                        with open(os.path.join(directory, name)) as file:
+                            with open(os.path.join(dict_directory, name)) as dict_file:
+                                self.assertEqual(_strip_created(dict_file.read()), _strip_created(file.read()))
+
+                self.assertFalse(self.manager.write_directory(directory, verify=verify))
+                self.assertFalse(any(name.endswith('.tmp') for name in os.listdir(directory)))
+
+
+class TestMerkle(AbstractTemporaryCacheMethodMixin):
+    """Tests for the deterministic, chunked namespace hash."""
+
+    Manager = NamespaceManager
+
+    def populate(self):
+        """Populate the manager."""
+        self.manager.populate()
+
+    def test_deterministic(self):
+        """Test the hash doesn't depend on the order the models were inserted in."""
+        md5_hash = self.manager.get_namespace_hash()
+        merkle = self.manager.get_namespace_merkle()
+        self.assertEqual(md5_hash, merkle['hash'])
+
+        self.manager.session.query(Model).delete()
+        self.manager.session.add_all(Model.from_id(i) for i in reversed(range(NUMBER_TEST_MODELS)))
+        self.manager.session.commit()
+
+        self.assertEqual(md5_hash, self.manager.get_namespace_hash())
+        self.assertEqual(merkle, self.manager.get_namespace_merkle())
+
+    def test_changed_chunks(self):
+        """Test only the chunk containing a changed value is reported."""
+        items = [(f'name{i:03}', 'A') for i in range(300)]
+        old = NamespaceHasher(chunk_size=10).update_all(items).to_json()
+        self.assertLess(1, len(old['chunks']))
+        self.assertEqual(sum(chunk['size'] for chunk in old['chunks']), len(items))
+        self.assertEqual([], get_changed_chunks(old, old))
+
+        items[150] = ('name150', 'G')
+        new = NamespaceHasher(chunk_size=10).update_all(items).to_json()
+        self.assertNotEqual(old['root'], new['root'])
+
+        changed = get_changed_chunks(old, new)
+        self.assertEqual(2, len(changed), msg='the old and new versions of the same chunk')
+        self.assertEqual(changed[0], changed[1])
+        first, last = changed[0]
+        self.assertTrue(first <= 'name150' <= last)
+
+        self.assertEqual(len(new['chunks']), len(get_changed_chunks(None, new)))
+
+    def test_write_directory(self):
+        """Test the Merkle hash is written next to the hash."""
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertTrue(self.manager.write_directory(directory))
+            with open(os.path.join(directory, 'test.belns.merkle')) as file:
+                self.assertEqual(self.manager.get_namespace_merkle(), json.load(file))
+
+
+class TestStoredHash(AbstractTemporaryCacheMethodMixin):
+    """Tests for the namespace hash stored after populating."""
+
+    Manager = NamespaceManager
+
+    def populate(self):
+        """Populate the manager."""
+        self.manager.populate()
+
+    def test_stored_after_populate(self):
+        """Test the hash is stored with the populate action."""
+        action = Action.get_last_populate(self.manager.module_name, session=self.manager.session)
+        self.assertIsNotNone(action.namespace_hash)
+        self.assertEqual(self.manager.get_namespace_hash(), action.namespace_hash.hash)
+        self.assertEqual(self.manager.get_namespace_merkle(), self.manager.get_stored_namespace_merkle())
+
+    def test_write_directory(self):
+        """Test checking if the namespace changed uses the stored hash unless it's verified."""
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertTrue(self.manager.write_directory(directory))
+
+            with mock.patch.object(self.manager, '_iterate_namespace_models') as mock_iterate:
+                self.assertFalse(self.manager.write_directory(directory))
+                mock_iterate.assert_not_called()
+
+            # change the namespace without populating, which the stored hash doesn't know about
+            self.manager.session.add(Model.from_id(NUMBER_TEST_MODELS + 1))
+            self.manager.session.commit()
+
+            self.assertFalse(self.manager.write_directory(directory))
+            self.assertTrue(self.manager.write_directory(directory, verify=True))
+            self.assertEqual(self.manager.get_namespace_hash(), self.manager.get_stored_namespace_merkle()['hash'])
+            self.assertFalse(self.manager.write_directory(directory))
+
+
+class IndexedNamespaceManager(NamespaceManager):
+    """A namespace manager that builds its index after populating."""
+
+    namespace_index = True
+
+
+class TemporaryDataDirectoryMixin(TemporaryConnectionMethodMixin):
+    """Keeps the files the namespace managers write to their data directory in a temporary directory."""
+
+    def setUp(self):
+        """Keep the index files in a temporary directory."""
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        patcher = mock.patch('bio2bel.manager.namespace_manager.get_data_dir', return_value=self.directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+
+
+class TestNamespaceIndex(TemporaryDataDirectoryMixin):
+    """Tests for the memory-mapped namespace index."""
+
+    def test_write(self):
+        """Test looking up identifiers and names in an index file."""
+        path = os.path.join(self.directory.name, 'test.index')
+        pairs = [
+            ('b', 'beta'), ('a', 'alpha'), ('c', 'alpha'), ('d', ''), ('f', None), ('', 'zeta'), ('é', 'épsilon'),
+            ('a', 'alpha2'), (12, 34),
+        ]
+        self.assertEqual(7, write_namespace_index(path, pairs))
+
+        with NamespaceIndex(path) as index:
+            self.assertEqual(7, len(index))
+            self.assertEqual(['alpha2', 'beta', 'alpha', None, 'épsilon', None, None], index.lookup_names('abcdéfz'))
+            self.assertEqual([True, True, True, False], ['d' in index, 'f' in index, 12 in index, 'z' in index])
+            self.assertEqual('34', index.lookup_name('12'))
+            self.assertEqual(['c', 'b', 'é', 'a', '12', None, None], index.lookup_identifiers(
+                ['alpha', 'beta', 'épsilon', 'alpha2', 34, 'zeta', ''],
+            ))
+
+        write_namespace_index(path, [])
+        with NamespaceIndex(path) as index:
+            self.assertEqual(0, len(index))
+            self.assertIsNone(index.lookup_name('a'))
+            self.assertIsNone(index.lookup_identifier('alpha'))
+
+    def test_built_after_populate(self):
+        """Test the index is built after populating and used for lookups."""
+        manager = IndexedNamespaceManager(connection=self.connection)
+        manager.populate()
+        self.assertTrue(os.path.exists(manager._get_namespace_index_path()))
+
+        identifier, name = TEST_MODEL_ID_FORMAT.format(1), TEST_MODEL_NAME_FORMAT.format(1)
+        with mock.patch.object(manager, '_iterate_namespace_models') as mock_iterate:
+            self.assertEqual(name, manager.lookup_name(identifier))
+            self.assertEqual(identifier, manager.lookup_identifier(name))
+            self.assertEqual([name, None], manager.lookup_names([identifier, 'nope']))
+            self.assertEqual([identifier, None], manager.lookup_identifiers([name, 'nope']))
+            mock_iterate.assert_not_called()
+
+    def test_built_on_lookup(self):
+        """Test the index is built when it's first used if it's missing."""
+        manager = NamespaceManager(connection=self.connection)
+        manager.populate()
+        path = manager._get_namespace_index_path()
+        self.assertFalse(os.path.exists(path))
+
+        self.assertEqual(TEST_MODEL_NAME_FORMAT.format(2), manager.lookup_name(TEST_MODEL_ID_FORMAT.format(2)))
+        self.assertTrue(os.path.exists(path))
+
+    def test_removed_on_drop(self):
+        """Test the index is removed when the tables are dropped or reset."""
+        identifier = TEST_MODEL_ID_FORMAT.format(1)
+        for clear in ('drop_all', 'reset'):
+            with self.subTest(clear=clear):
+                manager = IndexedNamespaceManager(connection=self.connection)
+                manager.populate()
+                self.assertEqual(TEST_MODEL_NAME_FORMAT.format(1), manager.lookup_name(identifier))
+
+                getattr(manager, clear)()
+                self.assertFalse(os.path.exists(manager._get_namespace_index_path()))
+                self.assertIsNone(manager.lookup_name(identifier))
+                manager.create_all()
+
+    def test_rebuilt_when_stale(self):
+        """Test the index is rebuilt if the resource was populated again since it was built."""
+        manager = IndexedNamespaceManager(connection=self.connection)
+        manager.populate()
+        identifier = TEST_MODEL_ID_FORMAT.format(1)
+        self.assertEqual(TEST_MODEL_NAME_FORMAT.format(1), manager.lookup_name(identifier))
+
+        other = IndexedNamespaceManager(connection=self.connection)
+        other.session.query(Model).filter(Model.test_id == identifier).update({Model.name: 'renamed'})
+        other.session.commit()
+        other._store_populate()
+
+        # The open index is only checked again after the interval
+        self.assertEqual(TEST_MODEL_NAME_FORMAT.format(1), manager.lookup_name(identifier))
+
+        manager.namespace_index_check_interval = 0
+        self.assertEqual('renamed', manager.lookup_name(identifier))
+        self.assertEqual(identifier, manager.lookup_identifier('renamed'))
+
+    def test_lookup_without_queries(self):
+        """Test lookups with an open index don't query the database."""
+        manager = IndexedNamespaceManager(connection=self.connection)
+        manager.populate()
+        identifier = TEST_MODEL_ID_FORMAT.format(1)
+        self.assertEqual(TEST_MODEL_NAME_FORMAT.format(1), manager.lookup_name(identifier))
+
+        with mock.patch.object(manager, '_get_namespace_index_key') as mock_key:
+            for _ in range(100):
+                manager.lookup_name(identifier)
+                manager.lookup_identifiers([TEST_MODEL_NAME_FORMAT.format(1)])
+            mock_key.assert_not_called()
+
+        # Populating again with the same manager closes the index right away
+        manager.session.query(Model).filter(Model.test_id == identifier).update({Model.name: 'renamed'})
+        manager.session.commit()
+        manager._store_populate()
+        self.assertEqual('renamed', manager.lookup_name(identifier))
+
+    def test_connection_specific(self):
+        """Test managers for different databases don't share an index."""
+        manager = IndexedNamespaceManager(connection=self.connection)
+        manager.populate()
+        self.assertEqual(TEST_MODEL_NAME_FORMAT.format(1), manager.lookup_name(TEST_MODEL_ID_FORMAT.format(1)))
+
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        self.addCleanup(os.close, fd)
+        other = IndexedNamespaceManager(connection=f'sqlite:///{path}')
+        self.assertNotEqual(manager._get_namespace_index_path(), other._get_namespace_index_path())
+        self.assertIsNone(other.lookup_name(TEST_MODEL_ID_FORMAT.format(1)))
+
+
+class TestBloom(TemporaryDataDirectoryMixin):
+    """Tests for the namespace Bloom filters."""
+
+    def test_bloom_filter(self):
+        """Test the Bloom filter never misses values and rarely has false positives."""
+        bloom = BloomFilter.for_capacity(1000, error_rate=0.01)
+        values = [f'value{i}' for i in range(1000)]
+        bloom.update(values)
+        self.assertTrue(all(bloom.might_contain(value) for value in values))
+
+        false_positives = sum(f'other{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+        path = os.path.join(self.directory.name, 'test.bloom')
+        bloom.to_file(path)
+        loaded = BloomFilter.from_file(path)
+        self.assertEqual((bloom.size, bloom.hash_count, bloom.bits), (loaded.size, loaded.hash_count, loaded.bits))
+
+    def test_write_directory(self):
+        """Test the Bloom filter written with the namespace files has all of the identifiers and names."""
+        for manager_cls in (NamespaceManager, ProjectedNamespaceManager):
+            with self.subTest(manager=manager_cls.__name__), tempfile.TemporaryDirectory() as directory:
+                manager = manager_cls(connection=self.connection)
+                manager.populate()
+                self.assertTrue(manager.write_directory(directory))
+
+                bloom = BloomFilter.from_file(os.path.join(directory, 'test.belns.bloom'))
+                for i in range(NUMBER_TEST_MODELS):
+                    self.assertTrue(bloom.might_contain(TEST_MODEL_ID_FORMAT.format(i)))
+                    self.assertTrue(bloom.might_contain(TEST_MODEL_NAME_FORMAT.format(i)))
+
+                manager.drop_all()
+                manager.create_all()
+
+    def test_validate_terms(self):
+        """Test terms that the Bloom filter rules out aren't looked up exactly."""
+        manager = NamespaceManager(connection=self.connection)
+        manager.populate()
+
+        with tempfile.TemporaryDirectory() as directory:
+            manager.write_directory(directory)
+            bloom = manager.get_namespace_bloom(directory)
+
+        valid = [TEST_MODEL_ID_FORMAT.format(1), TEST_MODEL_NAME_FORMAT.format(2)]
+        invalid = [f'nope{i}' for i in range(100)]
+
+        ruled_out, candidates = screen_terms(bloom, invalid + valid)
+        self.assertLess(90, len(ruled_out), msg='the Bloom filter should rule out most of the invalid terms')
+        self.assertTrue(set(valid) <= set(candidates))
+
+        index = manager._get_namespace_index()
+        with mock.patch.object(index, '_find_identifier', wraps=index._find_identifier) as mock_find, \
+                mock.patch.object(index, 'lookup_identifier', wraps=index.lookup_identifier) as mock_lookup:
+            self.assertEqual(invalid, manager.validate_terms(invalid + valid, bloom=bloom))
+
+        looked_up = [call.args[0] for call in mock_find.call_args_list + mock_lookup.call_args_list]
+        self.assertEqual(set(candidates), set(looked_up), msg='only the candidates should be looked up')
+        self.assertFalse(set(ruled_out) & set(looked_up), msg='the ruled out terms should never be looked up')
+
+        self.assertEqual(['nope'], manager.validate_terms(valid + ['nope']))
+
+    def test_validate_unnamed_terms(self):
+        """Test identifiers without names are valid."""
+        manager = NamespaceManager(connection=self.connection)
+        manager.populate()
+        identifier = TEST_MODEL_ID_FORMAT.format(0)
+        manager.session.query(Model).filter(Model.test_id == identifier).update({Model.name: ''})
+        manager.session.commit()
+
+        self.assertIsNone(manager.lookup_name(identifier))
+        self.assertEqual(['nope'], manager.validate_terms([identifier, 'nope']))
+
+    def test_integers(self):
+        """Test values that aren't strings can be added to a Bloom filter."""
+        bloom = BloomFilter.for_capacity(10)
+        bloom.update([1, 2, 3])
+        self.assertTrue(all(bloom.might_contain(value) for value in (1, '2', 3)))
+
+
+class ProjectedIdentifiersManager(ProjectedNamespaceManager):
+    """A namespace manager that declares its columns but doesn't have names."""
+
+    has_names = False
+
+
+class TestProjection(TemporaryConnectionMethodMixin):
+    """Tests for querying only the columns needed for exporting the namespace."""
+
+    def test_columns(self):
+        """Test the columns are only used when they can all be determined."""
+        self.assertIsNone(NamespaceManager._get_namespace_columns(), msg='_get_encoding is overridden')
+        self.assertIsNotNone(ProjectedNamespaceManager._get_namespace_columns())
+
+    def test_projection(self):
+        """Test the projected rows are the same as the ones from the models, without loading the models."""
+        manager = ProjectedNamespaceManager(connection=self.connection)
+        manager.populate()
+
+        with mock.patch.object(manager, '_iterate_namespace_models') as mock_iterate:
+            projected = list(manager._iterate_namespace_tuples(yield_per=2))
+            mock_iterate.assert_not_called()
+
+        expected = list(NamespaceManager(connection=self.connection)._iterate_namespace_tuples())
+        self.assertEqual(NUMBER_TEST_MODELS, len(expected))
+        self.assertEqual(sorted(expected), sorted(projected))
+
+    def test_write_directory_without_names(self):
+        """Test the files are streamed for a namespace without names."""
+        manager = ProjectedIdentifiersManager(connection=self.connection)
+        manager.populate()
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertTrue(manager.write_directory(directory))
+            self.assertEqual(
+                {'test.belns', 'test.belns.md5', 'test.belns.merkle', 'test.belns.bloom'},
+                set(os.listdir(directory)),
+            )
+
+            with open(os.path.join(directory, 'test.belns')) as file:
+                identifiers = [line.strip() for line in file if line.startswith(TEST_MODEL_ID_FORMAT[:6])]
+            self.assertEqual([f'{TEST_MODEL_ID_FORMAT.format(i)}|A' for i in range(NUMBER_TEST_MODELS)], identifiers)
+
+    def test_update_namespace(self):
+        """Test updating right after making the namespace changes nothing, even if the export columns differ."""
+        manager = ProjectedNamespaceManager(connection=self.connection)
+        manager.populate()
+        namespace = manager._make_namespace()
+
+        self.assertEqual(NamespaceUpdate(new=0, changed=0, removed=0), manager._update_namespace(namespace))
+
+
 class TestCli(MockConnectionMixin):
     """Tests the CLI for uploading a BEL namespace."""
 
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for running modules in parallel."""
+
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from click.testing import CliRunner
+
+from bio2bel import cli, parallel
+from bio2bel.models import Action
+from bio2bel.testing import TemporaryConnectionMethodMixin
+from tests.constants import Manager, NUMBER_TEST_MODELS
+from tests.test_manager_namespace import NamespaceManager
+
+
+class TestWriteBelnsWorker(TemporaryConnectionMethodMixin):
+    """Tests for the worker that writes BEL namespaces."""
+
+    def test_write(self):
+        """Test writing a namespace in a worker."""
+        with mock.patch.dict(cli.MANAGERS, {'test': NamespaceManager, 'other': Manager}), \
+                tempfile.TemporaryDirectory() as directory:
+            result = cli._write_belns_worker('test', self.connection, directory)
+            self.assertEqual('written', result.status, msg=result.message)
+            self.assertTrue(os.path.exists(os.path.join(directory, 'test.belns')))
+
+            result = cli._write_belns_worker('test', self.connection, directory)
+            self.assertEqual('unchanged', result.status, msg=result.message)
+
+            result = cli._write_belns_worker('test', self.connection, directory, verify=True)
+            self.assertEqual('unchanged', result.status, msg=result.message)
+
+            result = cli._write_belns_worker('other', self.connection, directory)
+            self.assertEqual('unavailable', result.status)
+
+    def test_force(self):
+        """Test the tables are dropped, created again, and populated before writing when forced."""
+        with mock.patch.dict(cli.MANAGERS, {'test': NamespaceManager}), tempfile.TemporaryDirectory() as directory:
+            manager = NamespaceManager(connection=self.connection)
+            manager.populate()
+
+            result = cli._write_belns_worker('test', self.connection, directory, force=True)
+            self.assertEqual('written', result.status, msg=result.message)
+            self.assertEqual(NUMBER_TEST_MODELS, manager.count_model())
+            self.assertEqual(
+                ['drop', 'populate', 'populate'],
+                sorted(action.action for action in Action.ls(session=manager.session)),
+            )
+
+    def test_serial(self):
+        """Test writing the namespaces without worker processes goes through the worker."""
+        with mock.patch.dict(cli.MANAGERS, {'test': NamespaceManager, 'other': Manager}, clear=True), \
+                mock.patch.object(cli, '_write_belns_worker', wraps=cli._write_belns_worker) as mock_worker, \
+                tempfile.TemporaryDirectory() as directory:
+            result = CliRunner().invoke(cli.main, ['belns', 'write', '-c', self.connection, '-d', directory])
+            self.assertEqual(0, result.exit_code, msg=result.output)
+            self.assertIn('test written', result.output)
+            self.assertTrue(os.path.exists(os.path.join(directory, 'test.belns')))
+            mock_worker.assert_called_once_with(
+                'test', self.connection, directory=directory, force=False, compress=False, verify=False,
+            )
+
+    def test_failed(self):
+        """Test a failed export is reported instead of raised."""
+        with mock.patch.dict(cli.MANAGERS, {'test': NamespaceManager}), \
+                mock.patch.object(NamespaceManager, 'write_directory', side_effect=ValueError('broken')):
+            result = cli._write_belns_worker('test', self.connection, 'nowhere')
+            self.assertEqual('failed', result.status)
+            self.assertEqual('broken', result.message)
+
+
+class TestPopulateWorker(TemporaryConnectionMethodMixin):
+    """Tests for the populate worker."""
+
+    def test_populate(self):
+        """Test populating a module in a worker."""
+        with mock.patch.dict(cli.MANAGERS, {'test': Manager}):
+            result = cli._populate_worker('test', self.connection, reset=False, force=False, resume=False)
+            self.assertEqual('populated', result.status, msg=result.message)
+
+            manager = Manager(connection=self.connection)
+            self.assertTrue(manager.is_populated())
+            self.assertEqual(['populate'], [action.action for action in Action.ls(session=manager.session)])
+
+            result = cli._populate_worker('test', self.connection, reset=False, force=False, resume=False)
+            self.assertEqual('skipped', result.status)
+
+
+class TestWriteLock(TemporaryConnectionMethodMixin):
+    """Tests for serializing writes to SQLite."""
+
+    def setUp(self):
+        """Set up a lock that is shared by the write lock event handlers."""
+        super().setUp()
+        self.lock = threading.Lock()
+        self.patch_lock = mock.patch.object(parallel, '_WRITE_LOCK', self.lock)
+
+    def test_write_lock(self):
+        """Test the lock is held from the first write until the commit."""
+        conn = mock.MagicMock(info={})
+        with self.patch_lock:
+            parallel._acquire_write_lock(conn, None, 'SELECT 1', None, None, False)
+            self.assertFalse(self.lock.locked())
+
+            parallel._acquire_write_lock(conn, None, 'INSERT INTO x VALUES (1)', None, None, False)
+            self.assertTrue(self.lock.locked())
+            parallel._acquire_write_lock(conn, None, 'INSERT INTO x VALUES (2)', None, None, False)
+
+            parallel._release_write_lock(conn)
+            self.assertFalse(self.lock.locked())
+
+            # Releasing a connection that didn't write does nothing
+            parallel._release_write_lock(conn)
+            self.assertFalse(self.lock.locked())